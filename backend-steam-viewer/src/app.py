@@ -2,10 +2,45 @@
 Steam Library Viewer - Aplicación Principal
 API FastAPI para visualizar y exportar bibliotecas de Steam
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.config.config import Config
+from src.http_cache import ConditionalCacheMiddleware
 from src.routes.main_routes import router
+from src.services.http_client import steam_http_client
+from src.services.database_service import DatabaseService
+from src.services.game_priority_service import game_priority_service
+from src.services.job_service import job_manager
+from src.services.library_state import library_state
+from src.services.steamspy_store import steamspy_store
+from src.services.worker_pool import cpu_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida de la aplicación: carga el CSV de Metacritic y lo vigila
+    mientras está en marcha, y libera recursos compartidos al apagar
+    
+    Args:
+        app: Aplicación FastAPI
+    """
+    # Cargar Metacritic antes de atender peticiones (lectura e índice fuera del bucle)
+    await game_priority_service.load()
+    game_priority_service.start_watching()
+    yield
+    await game_priority_service.stop_watching()
+    # Cancelar los trabajos en segundo plano pendientes
+    await job_manager.shutdown()
+    # Cerrar el pool de procesos de análisis de CSV
+    cpu_pool.shutdown()
+    # Cerrar el pool de conexiones HTTP hacia Steam
+    await steam_http_client.close()
+    # Volcar el historial pendiente y cerrar las bases de datos
+    DatabaseService.shutdown()
+    library_state.close()
+    steamspy_store.close()
 
 
 def create_app():
@@ -18,9 +53,13 @@ def create_app():
     app = FastAPI(
         title="Steam Library Viewer API",
         description="API para visualizar y exportar bibliotecas de Steam",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
     
+    # Caché HTTP condicional (ETag, 304 y Cache-Control por ruta)
+    app.add_middleware(ConditionalCacheMiddleware)
+    
     # Configurar CORS para permitir peticiones desde el frontend React
     app.add_middleware(
         CORSMiddleware,
@@ -0,0 +1,362 @@
+"""
+Comandos de línea de comandos para tareas de mantenimiento
+
+Uso:
+    python -m src.cli warm-steamspy <steam_id> [--concurrency N] [--force]
+    python -m src.cli migrate-tinydb [--source RUTA]
+    python -m src.cli bench-json [--games N] [--repeat N]
+    python -m src.cli bench-games [--games N] [--repeat N]
+    python -m src.cli bench-fetch [--requests N] [--min-latency MS] [--max-latency MS]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from fastapi.encoders import jsonable_encoder
+from src.config.config import Config
+from src.responses import FastJSONResponse, dump_json, orjson, raw_json
+from src.services.cache_service import response_cache
+from src.services.http_client import steam_http_client
+from src.services.library_state import LibraryState
+from src.services.profile_storage import SQLiteProfileStorage, TINYDB_PATH, migrate_tinydb_to_sqlite
+from src.services.steam_service import SteamService
+
+
+async def warm_steamspy(steam_id: str, concurrency: int, force: bool):
+    """
+    Precarga en disco los detalles de SteamSpy de toda la biblioteca de un usuario
+    
+    Args:
+        steam_id: Steam ID del usuario
+        concurrency: Número máximo de peticiones simultáneas
+        force: Si descargar también los juegos que ya están al día
+    """
+    try:
+        games = await SteamService.get_owned_games(steam_id)
+        if not games:
+            print(f"No se pudieron obtener los juegos de {steam_id}")
+            return
+        
+        appids = [game['appid'] for game in games]
+        print(f"Precargando detalles de SteamSpy para {len(appids)} juegos...")
+        result = await SteamService.prefetch_steamspy_details(appids, concurrency=concurrency, force=force)
+        print(
+            f"Descargados: {result['fetched']} | "
+            f"Ya al día: {result['skipped']} | "
+            f"Fallidos: {result['failed']}"
+        )
+    finally:
+        await steam_http_client.close()
+
+
+def migrate_tinydb(source: str):
+    """
+    Importa en SQLite el historial y los favoritos de un archivo TinyDB
+    
+    Args:
+        source: Ruta del archivo JSON de TinyDB
+    """
+    if not os.path.exists(source):
+        print(f"No se encontró el archivo de TinyDB en {source}")
+        return
+    
+    storage = SQLiteProfileStorage()
+    try:
+        result = migrate_tinydb_to_sqlite(source, storage)
+        print(f"Migrados: {result['profiles']} perfiles, {result['favorites']} favoritos")
+    finally:
+        storage.close()
+
+
+def synthetic_library(game_count: int) -> List[Dict]:
+    """Biblioteca sintética con el formato de GetOwnedGames"""
+    return [
+        {
+            'appid': appid,
+            'name': f'Juego {appid}',
+            'playtime_forever': appid % 5000,
+            'playtime_2weeks': appid % 120,
+            'rtime_last_played': 1700000000 + appid if appid % 3 else 0,
+            'img_icon_url': f'{appid:040x}'
+        }
+        for appid in range(game_count)
+    ]
+
+
+def bench_json(game_count: int, repeat: int):
+    """
+    Compara el tiempo de serialización de una respuesta de /api/games
+    con la codificación por defecto de FastAPI y con FastJSONResponse
+    
+    Args:
+        game_count: Número de juegos de la biblioteca sintética
+        repeat: Repeticiones de cada medición (se toma la mejor)
+    """
+    games = SteamService.process_games_data(synthetic_library(game_count))
+    content = {
+        'player': {'steamid': '0', 'personaname': 'Benchmark'},
+        'games': games,
+        'stats': SteamService.calculate_statistics(games),
+        'is_favorite': False
+    }
+    
+    def default_encoder():
+        # Lo que hace FastAPI con un dict devuelto por la ruta
+        return json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(',', ':')
+        ).encode('utf-8')
+    
+    def fast_encoder():
+        return FastJSONResponse(content).body
+    
+    serializer = 'orjson' if orjson is not None else 'json (orjson no instalado)'
+    print(f"Serializando {game_count} juegos, mejor de {repeat} repeticiones")
+    for label, encode in (('jsonable_encoder + json', default_encoder), (f'FastJSONResponse [{serializer}]', fast_encoder)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = encode()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(
+            f"{label}: {best * 1000:.1f} ms "
+            f"({best * 1000 * 10000 / game_count:.1f} ms por 10k juegos, {len(body) / 1024:.0f} KB)"
+        )
+
+
+def process_games_as_dicts(games: List[Dict]) -> List[Dict]:
+    """Versión anterior de process_games_data (un diccionario por juego), para comparar"""
+    games_list = []
+    for game in games:
+        last_played = game.get('rtime_last_played', 0)
+        appid = game['appid']
+        img_icon_url = game.get('img_icon_url', '')
+        img_logo_url = game.get('img_logo_url', '')
+        games_list.append({
+            'appid': appid,
+            'name': game.get('name', f"AppID {appid}"),
+            'playtime_hours': round(game.get('playtime_forever', 0) / 60, 1),
+            'playtime_2weeks': round(game.get('playtime_2weeks', 0) / 60, 1) if 'playtime_2weeks' in game else 0,
+            'last_played': datetime.fromtimestamp(last_played).strftime('%Y-%m-%d %H:%M') if last_played > 0 else 'Nunca',
+            'img_icon_url': f"https://media.steampowered.com/steamcommunity/public/images/apps/{appid}/{img_icon_url}.jpg" if img_icon_url else '',
+            'img_logo_url': f"https://media.steampowered.com/steamcommunity/public/images/apps/{appid}/{img_logo_url}.jpg" if img_logo_url else ''
+        })
+    games_list.sort(key=lambda x: x['playtime_hours'], reverse=True)
+    return games_list
+
+
+def bench_games(game_count: int, repeat: int):
+    """
+    Compara memoria y tiempo de process_games_data (GameRecord) con la
+    versión anterior basada en diccionarios
+    
+    La serialización sigue el camino de /api/games: los diccionarios se
+    codifican directamente y los GameRecord con LibraryState.games_json
+    (la primera vez y, ya en caché, para la misma versión de la biblioteca).
+    
+    Args:
+        game_count: Número de juegos de la biblioteca sintética
+        repeat: Repeticiones de cada medición de tiempo (se toma la mejor)
+    """
+    raw_games = synthetic_library(game_count)
+    print(f"Procesando {game_count} juegos, mejor de {repeat} repeticiones")
+    
+    def serialize_dicts(games: List[Dict]) -> bytes:
+        return dump_json({'games': games})
+    
+    def serialize_records(library: LibraryState) -> bytes:
+        return dump_json({'games': raw_json(library.games_json)})
+    
+    for label, process in (('dict', process_games_as_dicts), ('GameRecord', SteamService.process_games_data)):
+        tracemalloc.start()
+        games = process(raw_games)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        
+        process_times, stats_times, serialize_times, cached_times = [], [], [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            games = process(raw_games)
+            process_times.append(time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            SteamService.calculate_statistics(games)
+            stats_times.append(time.perf_counter() - start)
+            
+            if label == 'dict':
+                start = time.perf_counter()
+                serialize_dicts(games)
+                serialize_times.append(time.perf_counter() - start)
+            else:
+                library = LibraryState('0', '', {}, {}, games, None, 0)
+                start = time.perf_counter()
+                serialize_records(library)
+                serialize_times.append(time.perf_counter() - start)
+                
+                start = time.perf_counter()
+                serialize_records(library)
+                cached_times.append(time.perf_counter() - start)
+        
+        line = (
+            f"{label}: {memory / 1024:.0f} KB ({memory / game_count:.0f} B por juego) | "
+            f"procesar {min(process_times) * 1000:.1f} ms | "
+            f"estadísticas {min(stats_times) * 1000:.1f} ms | "
+            f"serializar {min(serialize_times) * 1000:.1f} ms | "
+            f"procesar + serializar {(min(process_times) + min(serialize_times)) * 1000:.1f} ms"
+        )
+        if cached_times:
+            line += f" | serializar la misma versión {min(cached_times) * 1000:.1f} ms"
+        print(line)
+
+
+def fake_steam_server(games: List[Dict], min_latency: float, max_latency: float) -> ThreadingHTTPServer:
+    """
+    Arranca en segundo plano un servidor local que imita GetOwnedGames y
+    GetPlayerSummaries con una latencia aleatoria por petición
+    
+    Args:
+        games: Juegos que devuelve GetOwnedGames
+        min_latency: Latencia mínima en segundos
+        max_latency: Latencia máxima en segundos
+        
+    Returns:
+        Servidor en marcha (llamar a shutdown() al terminar)
+    """
+    owned_games = json.dumps({'response': {'game_count': len(games), 'games': games}}).encode('utf-8')
+    
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+        
+        def do_GET(self):
+            time.sleep(random.uniform(min_latency, max_latency))
+            if self.path.startswith('/IPlayerService/GetOwnedGames/'):
+                body = owned_games
+            else:
+                body = json.dumps({'response': {'players': [{'steamid': '0', 'personaname': 'Benchmark'}]}}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def bench_fetch(requests: int, min_latency: float, max_latency: float):
+    """
+    Compara la latencia de obtener juegos y perfil una petición tras otra
+    o en paralelo (get_library_and_player) contra un Steam falso local
+    
+    Args:
+        requests: Llamadas de cada variante
+        min_latency: Latencia mínima del servidor falso en segundos
+        max_latency: Latencia máxima del servidor falso en segundos
+    """
+    server = fake_steam_server(synthetic_library(100), min_latency, max_latency)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    original_urls = (Config.STEAM_OWNED_GAMES_URL, Config.STEAM_PLAYER_SUMMARY_URL)
+    Config.STEAM_OWNED_GAMES_URL = f'{base_url}/IPlayerService/GetOwnedGames/v0001/'
+    Config.STEAM_PLAYER_SUMMARY_URL = f'{base_url}/ISteamUser/GetPlayerSummaries/v0002/'
+    
+    async def sequential(steam_id: str):
+        games = await SteamService.get_owned_games(steam_id)
+        player = await SteamService.get_player_summary(steam_id)
+        return games, player
+    
+    print(
+        f"{requests} llamadas por variante, latencia del servidor "
+        f"{min_latency * 1000:.0f}-{max_latency * 1000:.0f} ms"
+    )
+    try:
+        for label, fetch in (('secuencial', sequential), ('concurrente', SteamService.get_library_and_player)):
+            timings = []
+            for index in range(requests):
+                # Sin caché: cada llamada va al servidor
+                response_cache.clear()
+                start = time.perf_counter()
+                games, player = await fetch(str(index))
+                timings.append(time.perf_counter() - start)
+                if not games or player is None:
+                    print(f"{label}: respuesta incompleta en la llamada {index}")
+                    return
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            print(f"{label}: p50 {statistics.median(timings) * 1000:.1f} ms | p99 {p99 * 1000:.1f} ms")
+    finally:
+        Config.STEAM_OWNED_GAMES_URL, Config.STEAM_PLAYER_SUMMARY_URL = original_urls
+        response_cache.clear()
+        await steam_http_client.close()
+        server.shutdown()
+
+
+def main():
+    """Función principal de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Herramientas de Steam Library Viewer")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    warm_parser = subparsers.add_parser(
+        'warm-steamspy',
+        help='Precarga los detalles de SteamSpy de la biblioteca de un usuario'
+    )
+    warm_parser.add_argument('steam_id', help='Steam ID del usuario')
+    warm_parser.add_argument('--concurrency', type=int, default=4, help='Peticiones simultáneas')
+    warm_parser.add_argument('--force', action='store_true', help='Descargar también los datos al día')
+    
+    migrate_parser = subparsers.add_parser(
+        'migrate-tinydb',
+        help='Importa en SQLite los perfiles y favoritos guardados con TinyDB'
+    )
+    migrate_parser.add_argument('--source', default=None, help='Ruta del archivo profiles.json')
+    
+    bench_parser = subparsers.add_parser(
+        'bench-json',
+        help='Mide el tiempo de serialización de una biblioteca grande'
+    )
+    bench_parser.add_argument('--games', type=int, default=10000, help='Número de juegos')
+    bench_parser.add_argument('--repeat', type=int, default=5, help='Repeticiones de cada medición')
+    
+    games_parser = subparsers.add_parser(
+        'bench-games',
+        help='Compara memoria y tiempo de process_games_data con la versión basada en diccionarios'
+    )
+    games_parser.add_argument('--games', type=int, default=10000, help='Número de juegos')
+    games_parser.add_argument('--repeat', type=int, default=5, help='Repeticiones de cada medición')
+    
+    fetch_parser = subparsers.add_parser(
+        'bench-fetch',
+        help='Compara la obtención secuencial y concurrente de juegos y perfil contra un Steam falso'
+    )
+    fetch_parser.add_argument('--requests', type=int, default=200, help='Llamadas de cada variante')
+    fetch_parser.add_argument('--min-latency', type=float, default=40, help='Latencia mínima (ms)')
+    fetch_parser.add_argument('--max-latency', type=float, default=80, help='Latencia máxima (ms)')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'warm-steamspy':
+        asyncio.run(warm_steamspy(args.steam_id, args.concurrency, args.force))
+    elif args.command == 'migrate-tinydb':
+        migrate_tinydb(args.source or TINYDB_PATH)
+    elif args.command == 'bench-json':
+        bench_json(args.games, args.repeat)
+    elif args.command == 'bench-games':
+        bench_games(args.games, args.repeat)
+    elif args.command == 'bench-fetch':
+        asyncio.run(bench_fetch(args.requests, args.min_latency / 1000, args.max_latency / 1000))
+
+
+if __name__ == '__main__':
+    main()
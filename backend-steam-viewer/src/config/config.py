@@ -17,6 +17,12 @@ class Config:
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', 5000))
     
+    # Base de datos de perfiles: 'sqlite' (por defecto) o 'tinydb'
+    DB_BACKEND = os.getenv('DB_BACKEND', 'sqlite').lower()
+    # Escritura diferida del historial: intervalo (segundos) y tamaño de lote
+    DB_FLUSH_INTERVAL = float(os.getenv('DB_FLUSH_INTERVAL', 2))
+    DB_FLUSH_BATCH_SIZE = int(os.getenv('DB_FLUSH_BATCH_SIZE', 100))
+    
     # Steam API
     STEAM_API_KEY = os.getenv('STEAM_API_KEY')
     
@@ -25,11 +31,79 @@ class Config:
     STEAM_OWNED_GAMES_URL = f'{STEAM_API_BASE_URL}/IPlayerService/GetOwnedGames/v0001/'
     STEAM_PLAYER_SUMMARY_URL = f'{STEAM_API_BASE_URL}/ISteamUser/GetPlayerSummaries/v0002/'
     
+    # Tienda de Steam (wishlist)
+    STEAM_STORE_BASE_URL = os.getenv('STEAM_STORE_BASE_URL', 'https://store.steampowered.com')
+    # Juegos por página de wishlistdata (fijo en Steam)
+    WISHLIST_PAGE_SIZE = 100
+    # Páginas de la wishlist que se descargan a la vez y máximo de páginas
+    WISHLIST_PAGE_CONCURRENCY = int(os.getenv('WISHLIST_PAGE_CONCURRENCY', 4))
+    WISHLIST_MAX_PAGES = int(os.getenv('WISHLIST_MAX_PAGES', 50))
+    
+    # Máximo de steamids por petición a GetPlayerSummaries
+    PLAYER_SUMMARIES_BATCH_SIZE = 100
+    # Máximo de perfiles aceptados por /api/profiles/batch
+    MAX_BATCH_PROFILES = int(os.getenv('MAX_BATCH_PROFILES', 1000))
+    
+    # Agregación de bibliotecas: máximo de perfiles y descargas simultáneas
+    MAX_AGGREGATE_PROFILES = int(os.getenv('MAX_AGGREGATE_PROFILES', 100))
+    AGGREGATE_CONCURRENCY = int(os.getenv('AGGREGATE_CONCURRENCY', 8))
+    
+    # Similitud mínima (0-1) para cruzar títulos de forma aproximada
+    TITLE_MATCH_THRESHOLD = float(os.getenv('TITLE_MATCH_THRESHOLD', 0.75))
+    
+    # Segundos entre comprobaciones de cambios en el CSV de Metacritic (0 = no vigilar)
+    METACRITIC_RELOAD_INTERVAL = float(os.getenv('METACRITIC_RELOAD_INTERVAL', 5))
+    
+    # Pool de procesos para analizar CSV: procesos, tareas pendientes
+    # (en curso o en cola) antes de responder 503 y plazo por tarea
+    CPU_POOL_WORKERS = int(os.getenv('CPU_POOL_WORKERS', min(4, os.cpu_count() or 1)))
+    CPU_POOL_MAX_PENDING = int(os.getenv('CPU_POOL_MAX_PENDING', 2 * CPU_POOL_WORKERS))
+    CPU_TASK_TIMEOUT = float(os.getenv('CPU_TASK_TIMEOUT', 60))
+    # Tamaño máximo de los CSV subidos (bytes)
+    MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 200 * 1024 * 1024))
+    
+    # Trabajos en segundo plano: almacén ('memory' o 'redis'), trabajos
+    # simultáneos y segundos que se conservan los resultados
+    JOB_STORE = os.getenv('JOB_STORE', 'memory').lower()
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+    JOB_CONCURRENCY = int(os.getenv('JOB_CONCURRENCY', 4))
+    JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', 3600))
+    # Segundos entre reintentos de un trabajo cuando el pool de procesos está lleno
+    JOB_POOL_RETRY_DELAY = float(os.getenv('JOB_POOL_RETRY_DELAY', 1))
+    
+    # Segundos que el navegador puede reutilizar una respuesta sin revalidarla
+    HTTP_MAX_AGE_GAME_DETAILS = int(os.getenv('HTTP_MAX_AGE_GAME_DETAILS', 3600))
+    HTTP_MAX_AGE_WISHLIST = int(os.getenv('HTTP_MAX_AGE_WISHLIST', 300))
+    
+    # Bibliotecas procesadas que se conservan en memoria para actualizarlas por diferencias
+    LIBRARY_STATE_MAX_PROFILES = int(os.getenv('LIBRARY_STATE_MAX_PROFILES', 256))
+    
     # URLs de SteamSpy
     STEAMSPY_API_URL = 'https://steamspy.com/api.php'
     
     # Timeouts para requests
     REQUEST_TIMEOUT = 10
+    STEAMSPY_TIMEOUT = 5
+    # Plazo máximo compartido para las peticiones concurrentes de un endpoint
+    STEAM_FETCH_DEADLINE = float(os.getenv('STEAM_FETCH_DEADLINE', 15))
+    
+    # Pool de conexiones HTTP compartido
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', 200))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', 50))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', 100))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 30))
+    
+    # Caché en memoria de respuestas de Steam (TTL en segundos)
+    CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    CACHE_TTL_OWNED_GAMES = int(os.getenv('CACHE_TTL_OWNED_GAMES', 300))
+    CACHE_TTL_PLAYER_SUMMARY = int(os.getenv('CACHE_TTL_PLAYER_SUMMARY', 30))
+    CACHE_TTL_STEAMSPY = int(os.getenv('CACHE_TTL_STEAMSPY', 6 * 3600))
+    CACHE_TTL_WISHLIST = int(os.getenv('CACHE_TTL_WISHLIST', 300))
+    
+    # Almacén persistente de SteamSpy (segundos hasta considerar obsoletos los datos)
+    STEAMSPY_STALE_AFTER = int(os.getenv('STEAMSPY_STALE_AFTER', 24 * 3600))
+    # SteamSpy permite como máximo 1 petición por segundo a appdetails
+    STEAMSPY_REQUESTS_PER_SECOND = float(os.getenv('STEAMSPY_REQUESTS_PER_SECOND', 1))
     
     @classmethod
     def validate(cls):
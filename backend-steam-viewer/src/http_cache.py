@@ -0,0 +1,78 @@
+"""
+Caché HTTP condicional de las rutas GET
+Añade Cache-Control por ruta; el ETag y la respuesta 304 los genera cada ruta
+(ver make_etag y not_modified en src.responses) antes de hacer el trabajo
+"""
+import re
+from typing import List, NamedTuple, Optional, Pattern
+from src.config.config import Config
+
+
+class CachePolicy(NamedTuple):
+    """Política de caché de un grupo de rutas"""
+    pattern: Pattern
+    cache_control: str
+
+
+# Políticas por ruta (gana la primera que coincide). Estas rutas calculan su
+# propio ETag (versión en caché o de los datos guardados) antes de generar
+# la respuesta.
+CACHE_POLICIES: List[CachePolicy] = [
+    CachePolicy(re.compile(r'^/api/game/\d+$'), f'public, max-age={Config.HTTP_MAX_AGE_GAME_DETAILS}'),
+    CachePolicy(re.compile(r'^/api/wishlist/[^/]+$'), f'private, max-age={Config.HTTP_MAX_AGE_WISHLIST}'),
+    CachePolicy(re.compile(r'^/api/games/[^/]+/changes$'), 'private, no-cache'),
+    CachePolicy(re.compile(r'^/api/games/[^/]+(/priority)?$'), 'private, no-cache'),
+    CachePolicy(re.compile(r'^/api/profiles/(recent|history)$'), 'private, no-cache'),
+    CachePolicy(re.compile(r'^/api/favorites(/[^/]+/check)?$'), 'private, no-cache'),
+    CachePolicy(re.compile(r'^/api/(admin|cache|jobs)/'), 'no-store'),
+]
+
+
+def find_policy(path: str, policies: List[CachePolicy] = CACHE_POLICIES) -> Optional[CachePolicy]:
+    """Obtiene la política de caché de una ruta (o None)"""
+    for policy in policies:
+        if policy.pattern.match(path):
+            return policy
+    return None
+
+
+class ConditionalCacheMiddleware:
+    """
+    Middleware ASGI de caché HTTP para las peticiones GET
+    
+    Añade Cache-Control según la política de la ruta a las respuestas 200 y
+    304 que no lo traen; el resto de respuestas pasan sin cambios.
+    """
+    
+    def __init__(self, app, policies: List[CachePolicy] = CACHE_POLICIES):
+        """
+        Args:
+            app: Aplicación ASGI
+            policies: Políticas de caché por ruta
+        """
+        self.app = app
+        self.policies = policies
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            await self.app(scope, receive, send)
+            return
+        
+        policy = find_policy(scope['path'], self.policies)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+        
+        cache_control = policy.cache_control.encode('latin-1')
+        
+        async def send_with_cache(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                # Los errores no se cachean
+                cacheable = message['status'] in (200, 304)
+                if cacheable and not any(name.lower() == b'cache-control' for name, _ in headers):
+                    headers.append((b'cache-control', cache_control))
+                message = {**message, 'headers': headers}
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cache)
@@ -0,0 +1,129 @@
+"""
+Respuestas JSON rápidas para las rutas con listas grandes de juegos
+Serializan con orjson si está instalado (y si no con json de la biblioteca estándar)
+sin pasar por jsonable_encoder
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional
+import numpy as np
+from fastapi.responses import JSONResponse, Response
+from src.services.game_record import GameRecord
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Convierte los tipos que el serializador no conoce"""
+    if isinstance(value, GameRecord):
+        return value.to_dict()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f'Tipo no serializable a JSON: {type(value).__name__}')
+
+
+def _replace_nan(value: Any) -> Any:
+    """Sustituye los NaN por None (solo sin orjson; json no admite NaN en JSON válido)"""
+    if isinstance(value, float):
+        return None if value != value else value
+    if isinstance(value, dict):
+        return {key: _replace_nan(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_replace_nan(item) for item in value]
+    return value
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Serializa un valor a JSON compacto en UTF-8
+    
+    Los NaN se convierten en null con los dos serializadores.
+    
+    Args:
+        content: Valor a serializar (dicts, listas, tipos básicos y de NumPy)
+        
+    Returns:
+        JSON en bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        _replace_nan(content),
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(',', ':')
+    ).encode('utf-8')
+
+
+def raw_json(encoded: bytes) -> Any:
+    """
+    Envuelve JSON ya codificado para incluirlo en otra respuesta sin
+    volver a serializarlo (sin orjson se decodifica, más lento)
+    
+    Args:
+        encoded: JSON en bytes (por ejemplo, de dump_json)
+        
+    Returns:
+        Valor que dump_json escribe tal cual
+    """
+    if orjson is not None:
+        return orjson.Fragment(encoded)
+    return json.loads(encoded)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON que serializa directamente el contenido
+    
+    Las rutas deben devolver la instancia (no un dict) para que FastAPI no
+    recorra antes el contenido con jsonable_encoder; el response_model de
+    la ruta queda solo para la documentación.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Calcula un ETag a partir de los datos de los que depende una respuesta
+    
+    Args:
+        *parts: Valores que determinan la respuesta (deben poder serializarse)
+        
+    Returns:
+        ETag entre comillas
+    """
+    return f'"{hashlib.sha1(dump_json(parts)).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Comprueba si la cabecera If-None-Match incluye el ETag (comparación débil)
+    
+    Args:
+        if_none_match: Valor de la cabecera (o None)
+        etag: ETag actual de la respuesta
+        
+    Returns:
+        True si el cliente ya tiene la versión actual
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(candidate.strip().removeprefix('W/') == opaque for candidate in if_none_match.split(','))
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Respuesta 304 sin cuerpo con el ETag actual"""
+    return Response(status_code=304, headers={**(headers or {}), 'ETag': etag})
@@ -1,21 +1,36 @@
 """
 Rutas principales de la aplicación Steam Library Viewer
 """
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import pandas as pd
 from datetime import datetime
-import io
-import csv
-from typing import List, Dict
-from src.services.steam_service import SteamService
+from functools import partial
+from typing import Any, List, Dict, Optional
+from src.config.config import Config
+from src.responses import FastJSONResponse, etag_matches, make_etag, not_modified, raw_json
+from src.services.steam_service import SteamService, SteamUpstreamError
 from src.services.database_service import DatabaseService
 from src.services.game_priority_service import game_priority_service
+from src.services.cache_service import response_cache
+from src.services.custom_csv_service import CustomCsvService, UploadTooLargeError
+from src.services.export_service import ExportService, EXPORT_FORMATS
+from src.services.event_stream_service import (
+    EventStreamService, EVENT_CHUNK_SIZE, EVENT_STREAM_FORMATS, EVENT_STREAM_HEADERS
+)
+from src.services.job_service import JobProgress, job_manager
+from src.services.library_state import library_state
+from src.services.wishlist_analytics import WishlistAnalyticsService
+from src.services.worker_pool import PoolSaturatedError, cpu_pool
 
 # Crear router
 router = APIRouter(prefix="/api", tags=["steam"])
 
+# Campos de los eventos 'priority' del streaming de juegos
+PRIORITY_EVENT_FIELDS = ('appid', 'metacritic_score', 'duration_hours', 'priority', 'has_metacritic_data')
+
 # Instanciar servicios
 steam_service = SteamService()
 db_service = DatabaseService()
@@ -27,20 +42,124 @@ class FavoriteRequest(BaseModel):
     avatar: str
 
 
-@router.get("/games/{steam_id}")
-async def get_games(steam_id: str):
+class BatchProfilesRequest(BaseModel):
+    steam_ids: List[str]
+
+
+class AggregateLibrariesRequest(BaseModel):
+    steam_ids: List[str]
+
+
+# Modelos de respuesta: solo documentan la API (las rutas devuelven
+# FastJSONResponse, que no valida ni recorre el contenido)
+
+class GameStats(BaseModel):
+    total_games: int
+    total_hours: float
+    games_played: int
+    games_never_played: int
+    average_hours: float
+
+
+class ProcessedGame(BaseModel):
+    appid: int
+    name: str
+    playtime_hours: float
+    playtime_2weeks: float
+    last_played: str
+    img_icon_url: str
+    img_logo_url: str
+
+
+class GamesResponse(BaseModel):
+    player: Optional[Dict[str, Any]]
+    games: List[ProcessedGame]
+    stats: GameStats
+    is_favorite: bool
+
+
+class PrioritizedGame(ProcessedGame):
+    metacritic_score: Optional[float]
+    duration_hours: Optional[float]
+    priority: float
+    has_metacritic_data: bool
+    accounts: Optional[str]
+
+
+class PriorityStats(GameStats):
+    with_metacritic_data: int
+    avg_priority: float
+
+
+class PriorityGamesResponse(BaseModel):
+    player: Optional[Dict[str, Any]]
+    games: List[PrioritizedGame]
+    stats: PriorityStats
+    is_favorite: bool
+
+
+class WishlistGame(BaseModel):
+    appid: int
+    name: str
+    capsule: str
+    review_score: int
+    review_desc: str
+    reviews_total: Any
+    reviews_percent: int
+    release_date: Any
+    release_string: str
+    platform_icons: str
+    subs: List[Dict[str, Any]]
+    type: str
+    screenshots: List[str]
+    review_css: str
+    priority: int
+    added: int
+    background: str
+    rank: Any
+    tags: List[str]
+    is_free_game: bool
+    win: Any
+    mac: Any
+    linux: Any
+
+
+class WishlistStats(BaseModel):
+    total_items: int
+    free_games: int
+    paid_games: int
+    with_positive_reviews: int
+    review_categories: Dict[str, int]
+    price_distribution: Dict[str, int]
+    prices: Dict[str, float]
+    platforms: Dict[str, int]
+    top_tags: List[Dict[str, Any]]
+    release_years: Dict[str, int]
+    without_release_date: int
+
+
+class WishlistResponse(BaseModel):
+    wishlist: List[WishlistGame]
+    stats: WishlistStats
+
+
+@router.get("/games/{steam_id}", response_model=GamesResponse, response_class=FastJSONResponse)
+async def get_games(steam_id: str, request: Request):
     """
     API endpoint para obtener los juegos de un usuario
     
+    La biblioteca se actualiza por diferencias con la última versión
+    procesada. Responde 304 si el cliente envía en If-None-Match el ETag
+    de la versión actual.
+    
     Args:
         steam_id: Steam ID del usuario
         
     Returns:
         JSON con información del jugador, juegos y estadísticas
     """
-    # Obtener datos de Steam
-    games = steam_service.get_owned_games(steam_id)
-    player = steam_service.get_player_summary(steam_id)
+    # Obtener datos de Steam (juegos y perfil en paralelo)
+    games, player = await steam_service.get_library_and_player(steam_id)
     
     if not games:
         raise HTTPException(
@@ -49,105 +168,443 @@ async def get_games(steam_id: str):
                    'Verifica que el perfil sea público y el Steam ID sea correcto.'
         )
     
-    # Procesar los datos
-    games_list = steam_service.process_games_data(games)
-    
-    # Calcular estadísticas
-    stats = steam_service.calculate_statistics(games_list)
+    # Procesar solo los juegos que cambiaron desde la última versión
+    library = await run_in_threadpool(library_state.refresh, steam_id, games)
     
     # Guardar en historial
     if player:
-        db_service.save_profile_search(steam_id, player)
-        db_service.update_profile_stats(steam_id, stats['total_games'])
+        db_service.record_profile_search(steam_id, player, library.stats['total_games'])
     
     # Verificar si es favorito
     is_favorite = db_service.is_favorite(steam_id)
     
-    return {
+    etag = make_etag(library.etag, player, is_favorite)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    
+    return FastJSONResponse({
         'player': player,
-        'games': games_list,
-        'stats': stats,
+        'games': raw_json(library.games_json),
+        'stats': library.stats,
         'is_favorite': is_favorite
-    }
+    }, headers={'ETag': etag})
 
 
-@router.get("/export/{steam_id}")
-async def export_csv(steam_id: str):
+@router.get("/games/{steam_id}/stream")
+async def stream_games(
+    steam_id: str,
+    format: str = Query('sse', description="Formato: sse o ndjson")
+):
     """
-    Exporta los juegos a CSV
+    Envía la biblioteca de un usuario por partes a medida que está disponible
+    
+    Eventos, en este orden:
+    - player: perfil del jugador (o null)
+    - games: bloques de juegos procesados
+    - stats: estadísticas e is_favorite
+    - priority: bloques con los datos de Metacritic de los juegos que los tienen
+    - done: fin del envío
+    - failed: error (termina el envío); {'detail': mensaje}
     
     Args:
         steam_id: Steam ID del usuario
+        format: 'sse' (Server-Sent Events) o 'ndjson' (un evento JSON por línea)
         
     Returns:
-        Archivo CSV con la biblioteca de juegos
+        Respuesta en streaming con los eventos
     """
-    games = steam_service.get_owned_games(steam_id)
+    if format not in EVENT_STREAM_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f'Formato no soportado. Usa uno de: {", ".join(EVENT_STREAM_FORMATS)}'
+        )
+    
+    def event(name: str, data) -> bytes:
+        return EventStreamService.format_event(name, data, format)
+    
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + Config.STEAM_FETCH_DEADLINE
+        games_task = asyncio.ensure_future(steam_service.get_owned_games(steam_id))
+        player_task = asyncio.ensure_future(steam_service.get_player_summary(steam_id))
+        
+        try:
+            # El perfil suele llegar antes que la biblioteca: enviarlo en cuanto esté
+            try:
+                player = await asyncio.wait_for(player_task, timeout=max(0, deadline - loop.time()))
+                yield event('player', player)
+                games = await asyncio.wait_for(games_task, timeout=max(0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                print(f"Tiempo agotado obteniendo datos de Steam para {steam_id}")
+                yield event('failed', {'detail': 'Tiempo agotado obteniendo datos de Steam'})
+                return
+            
+            if not games:
+                yield event('failed', {
+                    'detail': 'No se pudieron obtener los juegos. '
+                              'Verifica que el perfil sea público y el Steam ID sea correcto.'
+                })
+                return
+            
+            # Las filas de Metacritic se buscan en el mismo viaje al pool de hilos
+            dataset = game_priority_service.dataset
+            library, rows = await run_in_threadpool(library_state.refresh_with_rows, steam_id, games, dataset)
+            for chunk in EventStreamService.chunks(library.games):
+                yield event('games', [game.to_dict() for game in chunk])
+            
+            stats = library.stats
+            if player:
+                db_service.record_profile_search(steam_id, player, stats['total_games'])
+            yield event('stats', {**stats, 'is_favorite': db_service.is_favorite(steam_id)})
+            
+            # Prioridad por bloques, cediendo el bucle de eventos entre ellos
+            for start in range(0, len(library.games), EVENT_CHUNK_SIZE):
+                chunk = library.games[start:start + EVENT_CHUNK_SIZE]
+                enriched = [
+                    game for game in game_priority_service.enrich_games_with_priority(
+                        chunk,
+                        rows=rows[start:start + EVENT_CHUNK_SIZE],
+                        dataset=dataset
+                    )
+                    if game['has_metacritic_data']
+                ]
+                if enriched:
+                    yield event('priority', EventStreamService.pick(enriched, PRIORITY_EVENT_FIELDS))
+                await asyncio.sleep(0)
+            
+            yield event('done', {'total_games': stats['total_games']})
+        except Exception as e:
+            # La respuesta ya empezó: avisar con un evento en lugar de cortar
+            # la conexión (EventSource volvería a conectarse)
+            print(f"Error en el streaming de la biblioteca de {steam_id}: {e}")
+            yield event('failed', {'detail': f'Error obteniendo la biblioteca: {str(e)}'})
+        finally:
+            for task in (games_task, player_task):
+                if not task.done():
+                    task.cancel()
+    
+    return StreamingResponse(
+        events(),
+        media_type=EVENT_STREAM_FORMATS[format],
+        headers=EVENT_STREAM_HEADERS
+    )
+
+
+@router.get("/games/{steam_id}/changes")
+async def get_library_changes(steam_id: str, request: Request):
+    """
+    Obtiene los cambios de la biblioteca de un usuario respecto a la versión
+    anterior guardada (juegos nuevos y eliminados, minutos jugados y nuevas
+    fechas de última partida)
+    
+    Args:
+        steam_id: Steam ID del usuario
+        
+    Returns:
+        JSON con el ETag de la versión actual, cuándo se detectó y sus
+        cambios (changes es null si es la primera versión guardada)
+    """
+    games = await steam_service.get_owned_games(steam_id)
     
     if not games:
         raise HTTPException(status_code=400, detail='No se pudieron obtener los juegos')
     
-    # Procesar datos
-    games_list = steam_service.process_games_data(games)
+    library = await run_in_threadpool(library_state.refresh, steam_id, games)
+    
+    # La respuesta solo depende de la versión guardada de la biblioteca
+    etag = make_etag(library.etag, library.updated_at)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    
+    return FastJSONResponse({
+        'etag': library.etag,
+        'updated_at': library.updated_at,
+        'changes': library.changes
+    }, headers={'ETag': etag})
+
+
+@router.get("/export/{steam_id}")
+async def export_csv(
+    steam_id: str,
+    request: Request,
+    format: str = Query('csv', description="Formato: csv, ndjson, parquet o xlsx"),
+    compress: bool = Query(False, description="Comprimir la respuesta con gzip si el cliente lo acepta")
+):
+    """
+    Exporta los juegos en el formato indicado
+    
+    - csv: 4 columnas básicas, generado por fragmentos
+    - ndjson: todos los campos más la prioridad, generado por fragmentos
+    - parquet / xlsx: todos los campos más la prioridad
     
-    # Crear DataFrame
-    games_data = []
-    for game in games_list:
-        games_data.append({
-            'AppID': game['appid'],
-            'Nombre': game['name'],
-            'Horas_Jugadas': game['playtime_hours'],
-            'Ultima_Vez_Jugado': game['last_played']
-        })
+    Args:
+        steam_id: Steam ID del usuario
+        format: Formato de exportación
+        compress: Si comprimir la respuesta con gzip (Content-Encoding)
+        
+    Returns:
+        Archivo con la biblioteca de juegos
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f'Formato no soportado. Usa uno de: {", ".join(EXPORT_FORMATS)}'
+        )
+    
+    games = await steam_service.get_owned_games(steam_id)
     
-    df = pd.DataFrame(games_data)
+    if not games:
+        raise HTTPException(status_code=400, detail='No se pudieron obtener los juegos')
     
-    # Crear archivo CSV en memoria
-    output = io.StringIO()
-    df.to_csv(output, index=False, encoding='utf-8-sig')
-    output.seek(0)
+    # Procesar datos
+    library = await run_in_threadpool(library_state.refresh, steam_id, games)
+    games_list = library.games
     
     # Nombre del archivo
-    filename = f'steam_games_{steam_id}_{datetime.now().strftime("%Y%m%d")}.csv'
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f'steam_games_{steam_id}_{datetime.now().strftime("%Y%m%d")}.{extension}'
+    headers = {'Content-Disposition': f'attachment; filename={filename}'}
+    
+    if format == 'csv':
+        body = ExportService.iter_csv(games_list)
+    else:
+        dataset = game_priority_service.dataset
+        rows = await run_in_threadpool(library.priority_rows, dataset)
+        records = game_priority_service.enrich_games_with_priority(games_list, rows=rows, dataset=dataset)
+        try:
+            if format == 'ndjson':
+                body = ExportService.iter_ndjson(records)
+            elif format == 'parquet':
+                body = iter([await run_in_threadpool(ExportService.to_parquet, records)])
+            else:
+                body = iter([await run_in_threadpool(ExportService.to_xlsx, records)])
+        except ImportError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+    
+    if compress and ExportService.accepts_gzip(request.headers.get('accept-encoding', '')):
+        body = ExportService.gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+        headers['Vary'] = 'Accept-Encoding'
     
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type='text/csv',
-        headers={'Content-Disposition': f'attachment; filename={filename}'}
+        body,
+        media_type=media_type,
+        headers=headers
     )
 
 
+@router.post("/libraries/aggregate", response_class=FastJSONResponse)
+async def aggregate_libraries(request: AggregateLibrariesRequest):
+    """
+    Combina las bibliotecas de varios usuarios (familias, grupos...)
+    
+    Args:
+        request: Lista de Steam IDs
+        
+    Returns:
+        JSON con los juegos combinados (propietarios y horas totales),
+        estadísticas por perfil, unión/intersección y perfiles que fallaron
+    """
+    validate_aggregate_request(request)
+    return FastJSONResponse(await build_aggregate(request.steam_ids))
+
+
+def validate_aggregate_request(request: AggregateLibrariesRequest):
+    """Comprueba el número de Steam IDs de una petición de agregación"""
+    if not request.steam_ids:
+        raise HTTPException(status_code=400, detail='Debes indicar al menos un Steam ID')
+    if len(request.steam_ids) > Config.MAX_AGGREGATE_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f'Se admiten como máximo {Config.MAX_AGGREGATE_PROFILES} Steam IDs por petición'
+        )
+
+
+async def build_aggregate(steam_ids: List[str], progress: Optional[JobProgress] = None) -> Dict:
+    """
+    Descarga y combina las bibliotecas de varios usuarios
+    
+    Args:
+        steam_ids: Steam IDs de los usuarios
+        progress: Avance del trabajo si se ejecuta en segundo plano
+    
+    Returns:
+        Bibliotecas combinadas y perfiles que fallaron
+    """
+    if progress:
+        progress.update(0, len(set(steam_ids)), 'Descargando bibliotecas')
+    
+    raw_libraries = await steam_service.get_owned_games_many(
+        steam_ids,
+        concurrency=Config.AGGREGATE_CONCURRENCY,
+        on_progress=progress.update if progress else None
+    )
+    
+    libraries = {
+        steam_id: steam_service.process_games_data(games)
+        for steam_id, games in raw_libraries.items() if games
+    }
+    failed = [steam_id for steam_id, games in raw_libraries.items() if not games]
+    
+    if not libraries:
+        raise HTTPException(
+            status_code=400,
+            detail='No se pudo obtener ninguna biblioteca. '
+                   'Verifica que los perfiles sean públicos y los Steam IDs sean correctos.'
+        )
+    
+    if progress:
+        progress.update(len(raw_libraries), len(raw_libraries), 'Combinando bibliotecas')
+    
+    return {
+        **steam_service.aggregate_libraries(libraries),
+        'failed': failed
+    }
+
+
 @router.get("/game/{appid}")
-async def get_game_details(appid: int):
+async def get_game_details(appid: int, request: Request):
     """
     Obtiene detalles adicionales de un juego específico
     
+    Responde 304 con la versión en caché sin consultar el disco ni SteamSpy.
+    
     Args:
         appid: App ID del juego
         
     Returns:
         JSON con detalles del juego desde SteamSpy
     """
-    details = steam_service.get_game_details_steamspy(appid)
+    etag = steam_service.game_details_etag(appid)
+    if etag and etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    
+    details = await steam_service.get_game_details_steamspy(appid)
     
     if not details:
         raise HTTPException(status_code=404, detail='No se pudieron obtener los detalles del juego')
     
-    return details
+    etag = steam_service.game_details_etag(appid) or make_etag(details)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    return FastJSONResponse(details, headers={'ETag': etag})
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Obtiene las estadísticas de la caché de respuestas de Steam"""
+    return response_cache.get_stats()
+
+
+# Endpoints de administración
+
+@router.get("/admin/metacritic")
+async def get_metacritic_status():
+    """
+    Obtiene el estado de los datos de Metacritic cargados
+    
+    Returns:
+        JSON con versión, número de juegos, duración de la carga y si el
+        CSV ha cambiado desde entonces
+    """
+    return game_priority_service.get_status()
+
+
+@router.post("/admin/metacritic/reload")
+async def reload_metacritic(force: bool = Query(True, description="Recargar aunque el CSV no haya cambiado")):
+    """
+    Recarga los datos de Metacritic desde el CSV sin reiniciar el servidor
+    
+    Args:
+        force: Si recargar aunque el archivo no haya cambiado
+    
+    Returns:
+        JSON con si se cargó una versión nueva y el estado resultante
+    """
+    reloaded = await run_in_threadpool(game_priority_service.reload, force)
+    return {
+        'reloaded': reloaded,
+        **game_priority_service.get_status()
+    }
+
+
+@router.get("/admin/workers")
+async def get_worker_pool_stats():
+    """Obtiene el estado del pool de procesos que analiza los CSV"""
+    return cpu_pool.get_stats()
 
 
 # Endpoints para favoritos y historial
 
+def database_etag(request: Request) -> str:
+    """
+    ETag de una respuesta que solo depende de la base de datos y de la URL
+    Se calcula con la versión de los datos, sin consultarlos
+    """
+    return make_etag(db_service.get_data_version(), request.url.path, request.url.query)
+
+
 @router.get("/profiles/recent")
-async def get_recent_profiles():
+async def get_recent_profiles(request: Request):
     """Obtiene los perfiles buscados recientemente"""
-    return db_service.get_recent_profiles(limit=10)
+    etag = database_etag(request)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    return FastJSONResponse(db_service.get_recent_profiles(limit=10), headers={'ETag': etag})
+
+
+@router.post("/profiles/batch")
+async def get_profiles_batch(request: BatchProfilesRequest):
+    """
+    Obtiene los perfiles de varios usuarios de Steam en bloque
+    
+    Args:
+        request: Lista de Steam IDs
+        
+    Returns:
+        JSON con los perfiles indexados por steam_id y los IDs no encontrados
+    """
+    if len(request.steam_ids) > Config.MAX_BATCH_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f'Se admiten como máximo {Config.MAX_BATCH_PROFILES} Steam IDs por petición'
+        )
+    
+    players = await steam_service.get_player_summaries(request.steam_ids)
+    not_found = [steam_id for steam_id in dict.fromkeys(request.steam_ids) if steam_id not in players]
+    
+    return {
+        'players': players,
+        'not_found': not_found
+    }
+
+
+@router.get("/profiles/history")
+async def get_profile_history(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100, description="Tamaño de la página"),
+    cursor: str = Query(None, description="Cursor devuelto por la página anterior")
+):
+    """Recorre el historial completo de perfiles buscados con paginación por cursor"""
+    etag = database_etag(request)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    try:
+        return FastJSONResponse(db_service.get_profile_history(limit=limit, cursor=cursor), headers={'ETag': etag})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/favorites")
-async def get_favorites():
-    """Obtiene todos los perfiles favoritos"""
-    return db_service.get_favorites()
+async def get_favorites(
+    request: Request,
+    limit: int = Query(None, ge=1, description="Número máximo de favoritos (todos por defecto)")
+):
+    """Obtiene los perfiles favoritos (más recientes primero)"""
+    etag = database_etag(request)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    return FastJSONResponse(db_service.get_favorites(limit=limit), headers={'ETag': etag})
 
 
 @router.post("/favorites")
@@ -171,24 +628,37 @@ async def remove_favorite(steam_id: str):
 
 
 @router.get("/favorites/{steam_id}/check")
-async def check_favorite(steam_id: str):
+async def check_favorite(steam_id: str, request: Request):
     """Verifica si un perfil está en favoritos"""
+    etag = database_etag(request)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
     is_favorite = db_service.is_favorite(steam_id)
-    return {"is_favorite": is_favorite}
+    return FastJSONResponse({"is_favorite": is_favorite}, headers={'ETag': etag})
 
 
-@router.get("/wishlist/{steam_id}")
-async def get_wishlist(steam_id: str):
+@router.get("/wishlist/{steam_id}", response_model=WishlistResponse, response_class=FastJSONResponse)
+async def get_wishlist(steam_id: str, request: Request):
     """
     Obtiene la lista de deseados (wishlist) de un usuario de Steam
     
+    Responde 304 con la versión en caché sin descargarla ni calcular las
+    estadísticas.
+    
     Args:
         steam_id: Steam ID del usuario
         
     Returns:
         JSON con la wishlist del usuario y estadísticas
     """
-    wishlist = steam_service.get_wishlist(steam_id)
+    etag = steam_service.wishlist_etag(steam_id)
+    if etag and etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
+    
+    try:
+        wishlist = await steam_service.get_wishlist(steam_id)
+    except SteamUpstreamError as e:
+        raise HTTPException(status_code=502, detail=f'Error obteniendo la wishlist de Steam: {e}. Inténtalo de nuevo.')
     
     if not wishlist:
         raise HTTPException(
@@ -200,43 +670,25 @@ async def get_wishlist(steam_id: str):
                    'Para hacer pública tu wishlist: Perfil → Editar Perfil → Configuración de Privacidad → "Game details" → Público'
         )
     
-    # Calcular estadísticas
-    total_items = len(wishlist)
-    free_games = len([g for g in wishlist if g.get('is_free_game')])
-    with_positive_reviews = len([g for g in wishlist if g.get('reviews_percent', 0) >= 70])
-    
-    # Categorías de reviews
-    overwhelmingly_positive = len([g for g in wishlist if g.get('reviews_percent', 0) >= 95])
-    very_positive = len([g for g in wishlist if 80 <= g.get('reviews_percent', 0) < 95])
-    positive = len([g for g in wishlist if 70 <= g.get('reviews_percent', 0) < 80])
-    mixed = len([g for g in wishlist if 40 <= g.get('reviews_percent', 0) < 70])
-    negative = len([g for g in wishlist if g.get('reviews_percent', 0) < 40])
-    
-    stats = {
-        'total_items': total_items,
-        'free_games': free_games,
-        'paid_games': total_items - free_games,
-        'with_positive_reviews': with_positive_reviews,
-        'review_categories': {
-            'overwhelmingly_positive': overwhelmingly_positive,
-            'very_positive': very_positive,
-            'positive': positive,
-            'mixed': mixed,
-            'negative': negative
-        }
-    }
+    etag = steam_service.wishlist_etag(steam_id) or make_etag(wishlist)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
     
-    return {
+    stats = WishlistAnalyticsService.calculate_statistics(wishlist)
+    
+    return FastJSONResponse({
         'wishlist': wishlist,
         'stats': stats
-    }
+    }, headers={'ETag': etag})
 
 
-@router.get("/games/{steam_id}/priority")
+@router.get("/games/{steam_id}/priority", response_model=PriorityGamesResponse, response_class=FastJSONResponse)
 async def get_games_with_priority(
     steam_id: str,
+    request: Request,
     min_priority: float = Query(0, description="Prioridad mínima para filtrar juegos"),
-    sort_by_priority: bool = Query(True, description="Ordenar por prioridad")
+    sort_by_priority: bool = Query(True, description="Ordenar por prioridad"),
+    limit: Optional[int] = Query(None, ge=1, description="Número máximo de juegos a devolver")
 ):
     """
     Obtiene los juegos de un usuario con cálculo de prioridad
@@ -246,6 +698,7 @@ async def get_games_with_priority(
         steam_id: Steam ID del usuario
         min_priority: Prioridad mínima para filtrar (0 por defecto)
         sort_by_priority: Si ordenar por prioridad o no
+        limit: Número máximo de juegos (los de mayor prioridad si se ordena)
         
     Returns:
         JSON con juegos enriquecidos con datos de prioridad:
@@ -254,9 +707,8 @@ async def get_games_with_priority(
         - priority: Prioridad calculada (mayor = más prioritario)
         - has_metacritic_data: Si se encontraron datos
     """
-    # Obtener juegos de Steam
-    games = steam_service.get_owned_games(steam_id)
-    player = steam_service.get_player_summary(steam_id)
+    # Obtener juegos y perfil de Steam en paralelo
+    games, player = await steam_service.get_library_and_player(steam_id)
     
     if not games:
         raise HTTPException(
@@ -265,115 +717,140 @@ async def get_games_with_priority(
                    'Verifica que el perfil sea público y el Steam ID sea correcto.'
         )
     
-    # Procesar juegos básicos
-    games_list = steam_service.process_games_data(games)
+    # Procesar solo los juegos que cambiaron desde la última versión y
+    # buscar sus filas de Metacritic (solo las de los juegos nuevos)
+    dataset = game_priority_service.dataset
+    library, rows = await run_in_threadpool(library_state.refresh_with_rows, steam_id, games, dataset)
+    games_list = library.games
+    
+    # Guardar en historial
+    if player:
+        db_service.record_profile_search(steam_id, player, library.stats['total_games'])
+    
+    # Verificar si es favorito
+    is_favorite = db_service.is_favorite(steam_id)
+    
+    etag = make_etag(library.etag, dataset.content_hash, player, is_favorite, min_priority, sort_by_priority, limit)
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return not_modified(etag)
     
     # Enriquecer con prioridad
     if sort_by_priority:
         prioritized_games = game_priority_service.get_prioritized_games(
             games_list, 
-            min_priority=min_priority
+            min_priority=min_priority,
+            limit=limit,
+            rows=rows,
+            dataset=dataset
         )
     else:
-        prioritized_games = game_priority_service.enrich_games_with_priority(games_list)
+        prioritized_games = game_priority_service.enrich_games_with_priority(games_list, rows=rows, dataset=dataset)
         if min_priority > 0:
             prioritized_games = [g for g in prioritized_games if g['priority'] >= min_priority]
+        if limit is not None:
+            prioritized_games = prioritized_games[:limit]
     
     # Calcular estadísticas
-    stats = steam_service.calculate_statistics(games_list)
+    stats = dict(library.stats)
     stats['with_metacritic_data'] = sum(1 for g in prioritized_games if g['has_metacritic_data'])
     stats['avg_priority'] = round(
         sum(g['priority'] for g in prioritized_games) / len(prioritized_games), 2
     ) if prioritized_games else 0
     
-    # Guardar en historial
-    if player:
-        db_service.save_profile_search(steam_id, player)
-        db_service.update_profile_stats(steam_id, stats['total_games'])
-    
-    # Verificar si es favorito
-    is_favorite = db_service.is_favorite(steam_id)
-    
-    return {
+    return FastJSONResponse({
         'player': player,
         'games': prioritized_games,
         'stats': stats,
         'is_favorite': is_favorite
-    }
+    }, headers={'ETag': etag})
 
 
-@router.post("/custom/analyze")
-async def analyze_custom_csv(file: UploadFile = File(...)):
+async def spool_csv(file: UploadFile) -> str:
     """
-    Analiza un CSV personalizado con el formato:
-    Juegos Pendientes, Cuenta, Puntuación de Usuarios, Duración, Prioridad
+    Copia a disco un CSV subido para pasarlo por ruta al pool de procesos
+    
+    Args:
+        file: Archivo CSV subido
     
     Returns:
-        Análisis del CSV con estadísticas y recomendaciones
+        Ruta de la copia (la borra run_spooled_csv_task)
     """
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail='El archivo debe ser un CSV')
     
     try:
-        # Leer contenido del archivo
-        contents = await file.read()
-        decoded = contents.decode('utf-8')
-        
-        # Parsear CSV
-        csv_reader = csv.DictReader(io.StringIO(decoded))
-        games_data = []
-        
-        for row in csv_reader:
-            # Parsear puntuación
-            score_str = row.get('Puntuación de Usuarios', '').strip()
-            score = float(score_str) if score_str else None
-            
-            # Parsear duración
-            duration_str = row.get('Duración', '').strip()
-            duration = float(duration_str) if duration_str else None
-            
-            # Calcular prioridad
-            priority = game_priority_service.calculate_priority(score, duration)
-            
-            games_data.append({
-                'name': row.get('Juegos Pendientes', '').strip(),
-                'accounts': row.get('Cuenta', '').strip(),
-                'score': score,
-                'duration': duration,
-                'priority': priority
-            })
-        
-        # Filtrar juegos con datos válidos
-        valid_games = [g for g in games_data if g['score'] is not None]
-        priority_games = [g for g in games_data if g['priority'] > 0]
-        
-        # Estadísticas
-        stats = {
-            'total_games': len(games_data),
-            'with_score': len(valid_games),
-            'with_priority': len(priority_games),
-            'avg_score': round(sum(g['score'] for g in valid_games) / len(valid_games), 2) if valid_games else 0,
-            'avg_duration': round(sum(g['duration'] for g in valid_games if g['duration']) / len([g for g in valid_games if g['duration']]), 2) if valid_games else 0,
-            'avg_priority': round(sum(g['priority'] for g in priority_games) / len(priority_games), 2) if priority_games else 0,
-        }
-        
-        # Ordenar por prioridad
-        sorted_games = sorted(games_data, key=lambda x: x['priority'], reverse=True)
-        
-        # Top recomendaciones
-        top_recommendations = sorted_games[:20]
+        return await run_in_threadpool(CustomCsvService.spool_upload, file.file, Config.MAX_UPLOAD_BYTES)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def run_spooled_csv_task(path: str, task, *args, wait_if_busy: bool = False):
+    """
+    Ejecuta en el pool de procesos una tarea sobre un CSV copiado a disco
+    La copia se borra cuando la tarea termina (o si no se llega a ejecutar)
+    
+    Args:
+        path: Ruta devuelta por spool_csv
+        task: Función de CustomCsvService que recibe la ruta del archivo
+        *args: Resto de argumentos de la tarea
+        wait_if_busy: Si esperar a que haya hueco en el pool en lugar de responder 503
+    
+    Returns:
+        Resultado de la tarea
+    """
+    while True:
+        try:
+            return await cpu_pool.run(task, path, *args, cleanup=partial(CustomCsvService.remove_spooled, path))
+        except PoolSaturatedError:
+            if not wait_if_busy:
+                CustomCsvService.remove_spooled(path)
+                raise HTTPException(
+                    status_code=503,
+                    detail='El servidor está procesando demasiados archivos. Inténtalo de nuevo en unos segundos.',
+                    headers={'Retry-After': '5'}
+                )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail='El procesamiento del archivo tardó demasiado')
         
-        return {
-            'stats': stats,
-            'all_games': sorted_games,
-            'recommendations': top_recommendations
-        }
+        try:
+            await asyncio.sleep(Config.JOB_POOL_RETRY_DELAY)
+        except BaseException:
+            CustomCsvService.remove_spooled(path)
+            raise
+
+
+@router.post("/custom/analyze", response_class=FastJSONResponse)
+async def analyze_custom_csv(
+    file: UploadFile = File(...),
+    page: Optional[int] = Query(None, ge=1, description="Página de all_games (sin página se devuelven todos)"),
+    page_size: int = Query(100, ge=1, le=1000, description="Juegos por página de all_games")
+):
+    """
+    Analiza un CSV personalizado con el formato:
+    Juegos Pendientes, Cuenta, Puntuación de Usuarios, Duración, Prioridad
+    
+    El archivo se procesa por bloques en el pool de procesos.
+    
+    Args:
+        file: Archivo CSV
+        page: Página de all_games (opcional)
+        page_size: Juegos por página
+    
+    Returns:
+        Análisis del CSV con estadísticas y recomendaciones
+    """
+    path = await spool_csv(file)
+    
+    try:
+        return FastJSONResponse(await run_spooled_csv_task(path, CustomCsvService.analyze_file, page, page_size))
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f'Error procesando CSV: {str(e)}')
 
 
-@router.post("/custom/match-steam")
+@router.post("/custom/match-steam", response_class=FastJSONResponse)
 async def match_csv_with_steam(steam_id: str, file: UploadFile = File(...)):
     """
     Cruza datos del CSV con la biblioteca de Steam del usuario
@@ -382,90 +859,114 @@ async def match_csv_with_steam(steam_id: str, file: UploadFile = File(...)):
     Returns:
         Juegos del CSV que están en la biblioteca con horas jugadas
     """
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail='El archivo debe ser un CSV')
+    path = await spool_csv(file)
+    return FastJSONResponse(await match_spooled_csv(steam_id, path))
+
+
+async def match_spooled_csv(steam_id: str, path: str, progress: Optional[JobProgress] = None) -> Dict:
+    """
+    Cruza un CSV copiado a disco con la biblioteca de Steam del usuario
     
+    Args:
+        steam_id: Steam ID del usuario
+        path: Ruta devuelta por spool_csv (se borra al terminar)
+        progress: Avance del trabajo si se ejecuta en segundo plano
+    
+    Returns:
+        Juegos del CSV que están en la biblioteca con horas jugadas
+    """
     try:
         # Obtener juegos de Steam
-        steam_games = steam_service.get_owned_games(steam_id)
+        if progress:
+            progress.update(0, 2, 'Obteniendo la biblioteca de Steam')
+        try:
+            steam_games = await steam_service.get_owned_games(steam_id)
+        except BaseException:
+            CustomCsvService.remove_spooled(path)
+            raise
         if not steam_games:
+            CustomCsvService.remove_spooled(path)
             raise HTTPException(status_code=400, detail='No se pudieron obtener los juegos de Steam')
         
-        # Crear diccionario de juegos de Steam por nombre
-        steam_dict = {}
-        for game in steam_games:
-            name = game.get('name', '').lower().strip()
-            steam_dict[name] = {
-                'appid': game.get('appid'),
-                'playtime_minutes': game.get('playtime_forever', 0),
-                'playtime_hours': round(game.get('playtime_forever', 0) / 60, 1)
-            }
-        
-        # Leer CSV
-        contents = await file.read()
-        decoded = contents.decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(decoded))
-        
-        matched_games = []
-        unmatched_games = []
-        
-        for row in csv_reader:
-            game_name = row.get('Juegos Pendientes', '').strip()
-            game_name_lower = game_name.lower()
-            
-            # Parsear datos del CSV
-            score_str = row.get('Puntuación de Usuarios', '').strip()
-            score = float(score_str) if score_str else None
-            
-            duration_str = row.get('Duración', '').strip()
-            duration = float(duration_str) if duration_str else None
-            
-            priority = game_priority_service.calculate_priority(score, duration)
-            
-            game_data = {
-                'name': game_name,
-                'accounts': row.get('Cuenta', '').strip(),
-                'score': score,
-                'duration': duration,
-                'priority': priority
-            }
-            
-            # Buscar coincidencia en Steam
-            if game_name_lower in steam_dict:
-                steam_data = steam_dict[game_name_lower]
-                matched_games.append({
-                    **game_data,
-                    'in_library': True,
-                    'appid': steam_data['appid'],
-                    'playtime_hours': steam_data['playtime_hours'],
-                    'played': steam_data['playtime_hours'] > 0
-                })
-            else:
-                unmatched_games.append({
-                    **game_data,
-                    'in_library': False
-                })
-        
-        # Ordenar matched por prioridad
-        matched_sorted = sorted(matched_games, key=lambda x: x['priority'], reverse=True)
-        
-        # Estadísticas
-        stats = {
-            'total_csv_games': len(matched_games) + len(unmatched_games),
-            'in_library': len(matched_games),
-            'not_in_library': len(unmatched_games),
-            'played': len([g for g in matched_games if g['played']]),
-            'unplayed': len([g for g in matched_games if not g['played']]),
-            'avg_priority_owned': round(sum(g['priority'] for g in matched_games if g['priority'] > 0) / len([g for g in matched_games if g['priority'] > 0]), 2) if matched_games else 0
-        }
-        
-        return {
-            'stats': stats,
-            'matched_games': matched_sorted,
-            'unmatched_games': unmatched_games
-        }
+        # Parsear el CSV y cruzarlo con la biblioteca en el pool de procesos
+        if progress:
+            progress.update(1, 2, 'Cruzando el CSV con la biblioteca')
+        result = await run_spooled_csv_task(
+            path,
+            CustomCsvService.match_file,
+            steam_games,
+            wait_if_busy=progress is not None
+        )
+        if progress:
+            progress.update(2, 2, 'Completado')
+        return result
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f'Error procesando datos: {str(e)}')
+
+
+# Trabajos en segundo plano
+
+def job_accepted(job: Dict) -> Dict:
+    """Respuesta al encolar un trabajo"""
+    return {
+        'job_id': job['id'],
+        'status': job['status'],
+        'status_url': f"/api/jobs/{job['id']}"
+    }
+
+
+@router.post("/jobs/match-steam", status_code=202)
+async def submit_match_steam_job(steam_id: str, file: UploadFile = File(...)):
+    """
+    Encola el cruce de un CSV con la biblioteca de Steam del usuario
+    El resultado se consulta en GET /api/jobs/{job_id}
+    
+    Returns:
+        JSON con el ID del trabajo
+    """
+    path = await spool_csv(file)
+    job = await job_manager.submit(
+        'match-steam',
+        lambda progress: match_spooled_csv(steam_id, path, progress),
+        cleanup=partial(CustomCsvService.remove_spooled, path)
+    )
+    return job_accepted(job)
+
+
+@router.post("/jobs/aggregate", status_code=202)
+async def submit_aggregate_job(request: AggregateLibrariesRequest):
+    """
+    Encola la combinación de las bibliotecas de varios usuarios
+    El resultado se consulta en GET /api/jobs/{job_id}
+    
+    Args:
+        request: Lista de Steam IDs
+    
+    Returns:
+        JSON con el ID del trabajo
+    """
+    validate_aggregate_request(request)
+    steam_ids = list(request.steam_ids)
+    job = await job_manager.submit('aggregate', lambda progress: build_aggregate(steam_ids, progress))
+    return job_accepted(job)
+
+
+@router.get("/jobs/{job_id}", response_class=FastJSONResponse)
+async def get_job(job_id: str):
+    """
+    Obtiene el estado de un trabajo en segundo plano
+    
+    Args:
+        job_id: ID del trabajo
+    
+    Returns:
+        JSON con el estado, el avance (porcentaje y tiempo estimado) y,
+        cuando termina, el resultado o el error
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Trabajo no encontrado o caducado')
+    return FastJSONResponse(job)
@@ -0,0 +1,242 @@
+"""
+Caché en memoria para respuestas de la API de Steam
+TTL por endpoint, expulsión LRU por tamaño y deduplicación de peticiones concurrentes
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from src.config.config import Config
+
+# Bytes fijos que se suman por entrada y por contenedor
+ENTRY_OVERHEAD = 64
+# Elementos de una lista que se miden para estimar su tamaño
+SIZE_SAMPLE_ITEMS = 16
+
+
+def _shallow_size(value: Any) -> int:
+    """Tamaño aproximado de un valor mirando solo su primer nivel"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        size = ENTRY_OVERHEAD
+        for key, item in value.items():
+            size += len(key) if isinstance(key, str) else 8
+            if isinstance(item, str):
+                size += len(item)
+            elif isinstance(item, (list, tuple, dict)):
+                size += ENTRY_OVERHEAD * (len(item) + 1)
+            else:
+                size += 8
+        return size
+    if isinstance(value, (list, tuple)):
+        return ENTRY_OVERHEAD * (len(value) + 1)
+    return 8
+
+
+class ResponseCache:
+    """Caché LRU acotada en bytes con TTL por entrada"""
+    
+    def __init__(self, max_bytes: int):
+        """
+        Inicializa la caché
+        
+        Args:
+            max_bytes: Tamaño máximo aproximado (en bytes) de los valores almacenados
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float, int]]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._etags: Dict[Tuple, str] = {}
+        self._total_bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+    
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """
+        Estima el tamaño de un valor sin serializarlo
+        
+        En las listas solo se miden (de forma superficial) unos pocos
+        elementos repartidos y se extrapola al total, así que el coste no
+        depende del tamaño de la respuesta.
+        
+        Args:
+            value: Valor a medir
+        
+        Returns:
+            Tamaño aproximado en bytes
+        """
+        if isinstance(value, (list, tuple)):
+            if not value:
+                return ENTRY_OVERHEAD
+            step = max(1, len(value) // SIZE_SAMPLE_ITEMS)
+            sample = value[::step][:SIZE_SAMPLE_ITEMS]
+            return ENTRY_OVERHEAD + len(value) * sum(_shallow_size(item) for item in sample) // len(sample)
+        return _shallow_size(value)
+    
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """
+        Obtiene un valor vigente de la caché
+        
+        Args:
+            namespace: Endpoint al que pertenece la entrada
+            key: Parámetros de la petición
+        
+        Returns:
+            Valor almacenado o None si no existe o expiró
+        """
+        cache_key = (namespace, key)
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            self._stats['misses'] += 1
+            return None
+        
+        value, expires_at, size = entry
+        if expires_at <= time.monotonic():
+            self._remove(cache_key)
+            self._stats['misses'] += 1
+            return None
+        
+        self._entries.move_to_end(cache_key)
+        self._stats['hits'] += 1
+        return value
+    
+    def set(self, namespace: str, key: Hashable, value: Any, ttl: float):
+        """
+        Almacena un valor en la caché, expulsando las entradas menos usadas si hace falta
+        
+        Args:
+            namespace: Endpoint al que pertenece la entrada
+            key: Parámetros de la petición
+            value: Valor a almacenar
+            ttl: Tiempo de vida en segundos
+        """
+        cache_key = (namespace, key)
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return
+        
+        self._remove(cache_key)
+        self._entries[cache_key] = (value, time.monotonic() + ttl, size)
+        self._total_bytes += size
+        
+        while self._total_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._stats['evictions'] += 1
+    
+    def get_etag(self, namespace: str, key: Hashable) -> Optional[str]:
+        """
+        ETag del valor vigente de una entrada, sin descargarlo
+        
+        Es un hash del contenido (igual en todos los procesos) y se calcula
+        una sola vez por entrada.
+        
+        Args:
+            namespace: Endpoint al que pertenece la entrada
+            key: Parámetros de la petición
+        
+        Returns:
+            ETag entre comillas o None si la entrada no existe o expiró
+        """
+        cache_key = (namespace, key)
+        entry = self._entries.get(cache_key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        etag = self._etags.get(cache_key)
+        if etag is None:
+            # Importación diferida: src.responses importa el paquete de servicios
+            from src.responses import make_etag
+            etag = self._etags[cache_key] = make_etag(entry[0])
+        return etag
+    
+    def _remove(self, cache_key: Tuple):
+        """Elimina una entrada y descuenta su tamaño"""
+        self._etags.pop(cache_key, None)
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._total_bytes -= entry[2]
+    
+    async def get_or_fetch(
+        self,
+        namespace: str,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float
+    ) -> Any:
+        """
+        Obtiene un valor de la caché o lo descarga una sola vez
+        
+        Las peticiones concurrentes para la misma clave esperan a la misma
+        descarga en curso. Los resultados vacíos (errores) no se almacenan.
+        
+        Args:
+            namespace: Endpoint al que pertenece la entrada
+            key: Parámetros de la petición
+            fetch: Función asíncrona que descarga el valor
+            ttl: Tiempo de vida en segundos
+        
+        Returns:
+            Valor cacheado o recién descargado
+        """
+        cache_key = (namespace, key)
+        inflight = self._inflight.get(cache_key)
+        if inflight is not None:
+            self._stats['coalesced'] += 1
+            return await asyncio.shield(inflight)
+        
+        value = self.get(namespace, key)
+        if value is not None:
+            return value
+        
+        task = asyncio.ensure_future(fetch())
+        self._inflight[cache_key] = task
+        
+        def on_done(done_task: asyncio.Future):
+            self._inflight.pop(cache_key, None)
+            if done_task.cancelled() or done_task.exception() is not None:
+                return
+            result = done_task.result()
+            if result:
+                self.set(namespace, key, result, ttl)
+        
+        task.add_done_callback(on_done)
+        return await asyncio.shield(task)
+    
+    def invalidate(self, namespace: str, key: Hashable):
+        """
+        Elimina una entrada de la caché
+        
+        Args:
+            namespace: Endpoint al que pertenece la entrada
+            key: Parámetros de la petición
+        """
+        self._remove((namespace, key))
+    
+    def clear(self):
+        """Vacía la caché"""
+        self._entries.clear()
+        self._etags.clear()
+        self._total_bytes = 0
+    
+    def get_stats(self) -> Dict:
+        """
+        Obtiene las estadísticas de uso de la caché
+        
+        Returns:
+            Diccionario con aciertos, fallos, entradas y tamaño ocupado
+        """
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0,
+            'entries': len(self._entries),
+            'inflight': len(self._inflight),
+            'size_bytes': self._total_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+
+# Instancia global de la caché de respuestas de Steam
+response_cache = ResponseCache(Config.CACHE_MAX_BYTES)
@@ -0,0 +1,345 @@
+"""
+Servicio de análisis de CSV personalizados
+Procesa el archivo por bloques de filas sin cargarlo entero en memoria
+"""
+import csv
+import heapq
+import io
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+import numpy as np
+from src.config.config import Config
+from src.services.game_priority_service import GamePriorityService
+from src.services.title_index import TitleIndex
+
+# Filas que se procesan juntas (se parsean y puntúan en bloque)
+CSV_CHUNK_ROWS = 5000
+# Número de juegos recomendados
+RECOMMENDATIONS_LIMIT = 20
+# Tamaño de los bloques al copiar un archivo subido
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """El archivo subido supera el tamaño máximo permitido"""
+
+
+class TopGames:
+    """
+    Conserva los N juegos de mayor prioridad de un flujo con un heap acotado
+    
+    Ante empates gana el juego que apareció antes, igual que al ordenar
+    la lista completa de forma estable.
+    """
+    
+    def __init__(self, limit: int):
+        """
+        Args:
+            limit: Número máximo de juegos a conservar
+        """
+        self.limit = limit
+        self._heap: List[tuple] = []
+    
+    def push(self, position: int, game: Dict):
+        """
+        Añade un juego si está entre los N mejores vistos hasta ahora
+        
+        Args:
+            position: Posición del juego en el archivo
+            game: Juego con campo 'priority'
+        """
+        entry = (game['priority'], -position, game)
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+    
+    def sorted(self) -> List[Dict]:
+        """Juegos conservados de mayor a menor prioridad"""
+        return [entry[2] for entry in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+class CustomCsvService:
+    """Servicio para analizar CSV con el formato de la lista de juegos pendientes"""
+    
+    @staticmethod
+    def iter_game_chunks(stream: BinaryIO, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[List[Dict]]:
+        """
+        Lee el CSV por bloques de filas y calcula la prioridad de cada bloque
+        
+        Args:
+            stream: Archivo binario con el CSV (UTF-8, con o sin BOM)
+            chunk_rows: Filas por bloque
+            
+        Yields:
+            Listas de juegos con name, accounts, score, duration y priority
+        """
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        try:
+            reader = csv.DictReader(text)
+            chunk: List[Dict] = []
+            for row in reader:
+                # Parsear puntuación
+                score_str = (row.get('Puntuación de Usuarios') or '').strip()
+                score = float(score_str) if score_str else None
+                
+                # Parsear duración
+                duration_str = (row.get('Duración') or '').strip()
+                duration = float(duration_str) if duration_str else None
+                
+                chunk.append({
+                    'name': (row.get('Juegos Pendientes') or '').strip(),
+                    'accounts': (row.get('Cuenta') or '').strip(),
+                    'score': score,
+                    'duration': duration
+                })
+                if len(chunk) >= chunk_rows:
+                    yield CustomCsvService._with_priorities(chunk)
+                    chunk = []
+            
+            if chunk:
+                yield CustomCsvService._with_priorities(chunk)
+        finally:
+            # No cerrar el archivo original al liberar el envoltorio de texto
+            text.detach()
+    
+    @staticmethod
+    def _with_priorities(chunk: List[Dict]) -> List[Dict]:
+        """Calcula en bloque la prioridad de los juegos de un bloque"""
+        priorities = GamePriorityService.calculate_priorities(
+            np.array([np.nan if game['score'] is None else game['score'] for game in chunk], dtype=np.float64),
+            np.array([np.nan if game['duration'] is None else game['duration'] for game in chunk], dtype=np.float64)
+        )
+        for game, priority in zip(chunk, priorities.tolist()):
+            game['priority'] = priority
+        return chunk
+    
+    @staticmethod
+    def analyze(
+        stream: BinaryIO,
+        page: Optional[int] = None,
+        page_size: int = 100,
+        recommendations: int = RECOMMENDATIONS_LIMIT
+    ) -> Dict[str, Any]:
+        """
+        Analiza un CSV con estadísticas acumuladas en una sola pasada
+        
+        Solo se guardan en memoria los juegos que se devuelven: las
+        recomendaciones y, si se pide una página, los juegos hasta el final
+        de esa página. Sin página se devuelven todos los juegos ordenados.
+        
+        Args:
+            stream: Archivo binario con el CSV
+            page: Página de all_games (desde 1) o None para devolverlos todos
+            page_size: Juegos por página
+            recommendations: Número de juegos recomendados
+            
+        Returns:
+            Diccionario con stats, all_games, recommendations y, si se
+            pidió una página, pagination
+        """
+        total_games = 0
+        with_score = 0
+        score_sum = 0.0
+        with_duration = 0
+        duration_sum = 0.0
+        with_priority = 0
+        priority_sum = 0.0
+        
+        top = TopGames(recommendations)
+        page_top = TopGames(page * page_size) if page is not None else None
+        all_games: List[Dict] = []
+        
+        for chunk in CustomCsvService.iter_game_chunks(stream):
+            for game in chunk:
+                position = total_games
+                total_games += 1
+                
+                if game['score'] is not None:
+                    with_score += 1
+                    score_sum += game['score']
+                    if game['duration']:
+                        with_duration += 1
+                        duration_sum += game['duration']
+                if game['priority'] > 0:
+                    with_priority += 1
+                    priority_sum += game['priority']
+                
+                top.push(position, game)
+                if page_top is not None:
+                    page_top.push(position, game)
+                else:
+                    all_games.append(game)
+        
+        stats = {
+            'total_games': total_games,
+            'with_score': with_score,
+            'with_priority': with_priority,
+            'avg_score': round(score_sum / with_score, 2) if with_score else 0,
+            'avg_duration': round(duration_sum / with_duration, 2) if with_duration else 0,
+            'avg_priority': round(priority_sum / with_priority, 2) if with_priority else 0,
+        }
+        
+        if page_top is None:
+            # Ordenación estable: ante empates se mantiene el orden del archivo
+            all_games.sort(key=lambda game: game['priority'], reverse=True)
+        else:
+            all_games = page_top.sorted()[(page - 1) * page_size:]
+        
+        result = {
+            'stats': stats,
+            'all_games': all_games,
+            'recommendations': top.sorted()
+        }
+        if page is not None:
+            result['pagination'] = {
+                'page': page,
+                'page_size': page_size,
+                'total': total_games,
+                'total_pages': (total_games + page_size - 1) // page_size
+            }
+        
+        return result
+    
+    @staticmethod
+    def match_with_steam(stream: BinaryIO, steam_games: List[Dict]) -> Dict[str, Any]:
+        """
+        Cruza los juegos del CSV con la biblioteca de Steam del usuario
+        
+        Args:
+            stream: Archivo binario con el CSV
+            steam_games: Juegos devueltos por GetOwnedGames
+            
+        Returns:
+            Diccionario con stats, matched_games (por prioridad) y unmatched_games
+        """
+        # Crear índice de juegos de Steam por nombre (exacto y aproximado)
+        steam_dict = {}
+        for game in steam_games:
+            name = game.get('name', '').lower().strip()
+            steam_dict[name] = {
+                'appid': game.get('appid'),
+                'playtime_minutes': game.get('playtime_forever', 0),
+                'playtime_hours': round(game.get('playtime_forever', 0) / 60, 1)
+            }
+        steam_index = TitleIndex.build(steam_dict.items(), threshold=Config.TITLE_MATCH_THRESHOLD)
+        
+        matched_games = []
+        unmatched_games = []
+        
+        for chunk in CustomCsvService.iter_game_chunks(stream):
+            for game_data in chunk:
+                game_name = game_data['name']
+                
+                # Buscar coincidencia en Steam
+                steam_data = steam_dict.get(game_name.lower()) or steam_index.lookup(game_name)
+                if steam_data:
+                    matched_games.append({
+                        **game_data,
+                        'in_library': True,
+                        'appid': steam_data['appid'],
+                        'playtime_hours': steam_data['playtime_hours'],
+                        'played': steam_data['playtime_hours'] > 0
+                    })
+                else:
+                    unmatched_games.append({
+                        **game_data,
+                        'in_library': False
+                    })
+        
+        # Ordenar matched por prioridad
+        matched_sorted = sorted(matched_games, key=lambda x: x['priority'], reverse=True)
+        
+        # Estadísticas
+        played = sum(1 for game in matched_games if game['played'])
+        owned_priorities = [game['priority'] for game in matched_games if game['priority'] > 0]
+        stats = {
+            'total_csv_games': len(matched_games) + len(unmatched_games),
+            'in_library': len(matched_games),
+            'not_in_library': len(unmatched_games),
+            'played': played,
+            'unplayed': len(matched_games) - played,
+            'avg_priority_owned': round(sum(owned_priorities) / len(owned_priorities), 2) if owned_priorities else 0
+        }
+        
+        return {
+            'stats': stats,
+            'matched_games': matched_sorted,
+            'unmatched_games': unmatched_games
+        }
+    
+    @staticmethod
+    def spool_upload(source: BinaryIO, max_bytes: int = Config.MAX_UPLOAD_BYTES) -> str:
+        """
+        Copia un archivo subido a un archivo temporal en disco por bloques
+        Así otro proceso puede leerlo por su ruta
+        
+        Args:
+            source: Archivo subido
+            max_bytes: Tamaño máximo permitido
+            
+        Returns:
+            Ruta del archivo temporal (hay que borrarlo con remove_spooled)
+            
+        Raises:
+            UploadTooLargeError: Si el archivo supera max_bytes
+        """
+        descriptor, path = tempfile.mkstemp(prefix='steam-viewer-', suffix='.csv')
+        try:
+            written = 0
+            with os.fdopen(descriptor, 'wb') as target:
+                while True:
+                    chunk = source.read(SPOOL_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if written > max_bytes:
+                        raise UploadTooLargeError(
+                            f'El archivo supera el tamaño máximo de {max_bytes // (1024 * 1024)} MB'
+                        )
+                    target.write(chunk)
+        except BaseException:
+            CustomCsvService.remove_spooled(path)
+            raise
+        return path
+    
+    @staticmethod
+    def remove_spooled(path: str):
+        """Borra un archivo temporal creado por spool_upload"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    
+    @staticmethod
+    def analyze_file(path: str, page: Optional[int] = None, page_size: int = 100) -> Dict[str, Any]:
+        """
+        Analiza un CSV guardado en disco (punto de entrada del pool de procesos)
+        
+        Args:
+            path: Ruta del CSV
+            page: Página de all_games o None para devolverlos todos
+            page_size: Juegos por página
+            
+        Returns:
+            Resultado de analyze
+        """
+        with open(path, 'rb') as stream:
+            return CustomCsvService.analyze(stream, page, page_size)
+    
+    @staticmethod
+    def match_file(path: str, steam_games: List[Dict]) -> Dict[str, Any]:
+        """
+        Cruza un CSV guardado en disco con la biblioteca de Steam
+        (punto de entrada del pool de procesos)
+        
+        Args:
+            path: Ruta del CSV
+            steam_games: Juegos devueltos por GetOwnedGames
+            
+        Returns:
+            Resultado de match_with_steam
+        """
+        with open(path, 'rb') as stream:
+            return CustomCsvService.match_with_steam(stream, steam_games)
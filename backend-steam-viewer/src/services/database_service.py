@@ -1,83 +1,225 @@
 """
-Servicio de base de datos NoSQL usando TinyDB
-Almacena perfiles buscados y favoritos
+Servicio de base de datos para perfiles buscados y favoritos
+El backend de almacenamiento (SQLite o TinyDB) se elige con Config.DB_BACKEND
 """
-from tinydb import TinyDB, Query
+import atexit
+import base64
+import json
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
-import os
+from typing import List, Dict, Optional, Tuple
+from src.config.config import Config
+from src.services.profile_storage import ProfileStorage, create_storage
 
-# Ruta de la base de datos
-DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'profiles.json')
+# Inicializar base de datos
+storage = create_storage(Config.DB_BACKEND)
 
-# Asegurar que existe el directorio
-os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
-# Inicializar base de datos
-db = TinyDB(DB_PATH)
-profiles_table = db.table('profiles')
-favorites_table = db.table('favorites')
+class ProfileHistoryWriter:
+    """
+    Escritura diferida (write-behind) del historial de perfiles
+    
+    Las búsquedas se acumulan en memoria agrupadas por steam_id (la última
+    gana) y un hilo en segundo plano las guarda en un único lote cada
+    Config.DB_FLUSH_INTERVAL segundos o al alcanzar Config.DB_FLUSH_BATCH_SIZE.
+    """
+    
+    def __init__(self, storage: ProfileStorage, interval: float, batch_size: int):
+        """
+        Inicializa el escritor y arranca el hilo de volcado
+        
+        Args:
+            storage: Backend donde se guardan los perfiles
+            interval: Segundos entre volcados
+            batch_size: Número de perfiles pendientes que fuerza un volcado
+        """
+        self.storage = storage
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='profile-history-writer', daemon=True)
+        self._thread.start()
+    
+    def enqueue(self, profile: Dict):
+        """
+        Añade (o sustituye) la búsqueda pendiente de un perfil
+        
+        Args:
+            profile: Perfil completo a guardar
+        """
+        with self._lock:
+            self._pending[profile['steam_id']] = profile
+            pending_count = len(self._pending)
+        if pending_count >= self.batch_size:
+            self._wakeup.set()
+    
+    def get_pending(self) -> List[Dict]:
+        """
+        Obtiene una copia de los perfiles pendientes de guardar
+        
+        Returns:
+            Lista de perfiles aún no volcados a disco
+        """
+        with self._lock:
+            return list(self._pending.values())
+    
+    def flush(self):
+        """Guarda en un solo lote todos los perfiles pendientes"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending.values())
+                self._pending = {}
+            if not batch:
+                return
+            try:
+                self.storage.save_profiles(batch)
+            except Exception as e:
+                print(f"Error guardando historial de perfiles: {e}")
+                # Reencolar lo que no se haya sustituido por una búsqueda más reciente
+                with self._lock:
+                    for profile in batch:
+                        self._pending.setdefault(profile['steam_id'], profile)
+    
+    def _run(self):
+        """Bucle del hilo de volcado"""
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+    
+    def stop(self):
+        """Detiene el hilo y vuelca lo pendiente"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=self.interval + 5)
+        self.flush()
+
+
+def _recency_key(record: Dict, date_field: str) -> Tuple[str, str]:
+    """Clave de ordenación por recencia (fecha, steam_id), igual que en los backends"""
+    return (record.get(date_field) or '', record['steam_id'])
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """
+    Codifica una clave de recencia como cursor opaco para la API
+    
+    Args:
+        key: Tupla (fecha, steam_id)
+        
+    Returns:
+        Cursor en base64 url-safe
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decodifica un cursor generado por encode_cursor
+    
+    Args:
+        cursor: Cursor opaco
+        
+    Returns:
+        Tupla (fecha, steam_id)
+        
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        date_value, steam_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(date_value), str(steam_id)
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+
+history_writer = ProfileHistoryWriter(storage, Config.DB_FLUSH_INTERVAL, Config.DB_FLUSH_BATCH_SIZE)
+# Garantizar el volcado aunque la aplicación termine sin pasar por el lifespan
+atexit.register(history_writer.stop)
 
 
 class DatabaseService:
     """Servicio para gestionar perfiles y favoritos"""
     
     @staticmethod
-    def save_profile_search(steam_id: str, player_data: Dict) -> Dict:
+    def record_profile_search(steam_id: str, player_data: Dict, total_games: int):
         """
-        Guarda un perfil buscado en el historial
+        Registra una búsqueda de perfil sin bloquear en la escritura a disco
+        Las búsquedas repetidas del mismo perfil se agrupan en una sola escritura
         
         Args:
             steam_id: Steam ID del usuario
             player_data: Datos del jugador
-            
-        Returns:
-            Perfil guardado
+            total_games: Total de juegos
         """
-        Profile = Query()
-        
-        profile = {
+        history_writer.enqueue({
             'steam_id': steam_id,
             'name': player_data.get('personaname', 'Unknown'),
             'avatar': player_data.get('avatar', ''),
             'searched_at': datetime.now().isoformat(),
-            'total_games': 0  # Se actualizará con stats
-        }
-        
-        # Verificar si ya existe
-        existing = profiles_table.get(Profile.steam_id == steam_id)
-        
-        if existing:
-            # Actualizar fecha de búsqueda
-            profiles_table.update(
-                {'searched_at': profile['searched_at']},
-                Profile.steam_id == steam_id
-            )
-            return {**existing, 'searched_at': profile['searched_at']}
-        else:
-            # Insertar nuevo
-            profiles_table.insert(profile)
-            return profile
+            'total_games': total_games
+        })
     
     @staticmethod
-    def get_recent_profiles(limit: int = 10) -> List[Dict]:
+    def get_recent_profiles(limit: int = 10, cursor: Optional[Tuple[str, str]] = None) -> List[Dict]:
         """
         Obtiene los perfiles buscados recientemente
+        Lee solo los `limit` primeros del índice de recencia e incluye
+        las búsquedas pendientes de guardar
         
         Args:
             limit: Número máximo de perfiles a retornar
+            cursor: Clave (searched_at, steam_id) del último perfil ya mostrado
             
         Returns:
             Lista de perfiles ordenados por fecha
         """
-        all_profiles = profiles_table.all()
-        # Ordenar por fecha de búsqueda (más reciente primero)
-        sorted_profiles = sorted(
-            all_profiles,
-            key=lambda x: x.get('searched_at', ''),
-            reverse=True
-        )
-        return sorted_profiles[:limit]
+        pending = history_writer.get_pending()
+        pending_ids = {profile['steam_id'] for profile in pending}
+        
+        # Pedir de más por si alguno de los guardados tiene una búsqueda pendiente
+        stored = storage.get_recent_profiles(limit + len(pending_ids), cursor)
+        profiles = [profile for profile in stored if profile['steam_id'] not in pending_ids]
+        
+        if cursor:
+            pending = [profile for profile in pending if _recency_key(profile, 'searched_at') < tuple(cursor)]
+        stored_pending = storage.get_profiles([profile['steam_id'] for profile in pending]) if pending else {}
+        for profile in pending:
+            existing = stored_pending.get(profile['steam_id'])
+            if existing:
+                profile = {
+                    **existing,
+                    'searched_at': profile['searched_at'],
+                    'total_games': profile['total_games']
+                }
+            profiles.append(profile)
+        
+        profiles.sort(key=lambda x: _recency_key(x, 'searched_at'), reverse=True)
+        return profiles[:limit]
+    
+    @staticmethod
+    def get_profile_history(limit: int = 20, cursor: Optional[str] = None) -> Dict:
+        """
+        Obtiene una página del historial completo de perfiles buscados
+        
+        Args:
+            limit: Tamaño de la página
+            cursor: Cursor opaco devuelto por la página anterior
+            
+        Returns:
+            Diccionario con los perfiles y el cursor de la página siguiente (o None)
+        """
+        profiles = DatabaseService.get_recent_profiles(limit, decode_cursor(cursor) if cursor else None)
+        next_cursor = None
+        if len(profiles) == limit:
+            next_cursor = encode_cursor(_recency_key(profiles[-1], 'searched_at'))
+        return {'profiles': profiles, 'next_cursor': next_cursor}
     
     @staticmethod
     def add_favorite(steam_id: str, player_data: Dict) -> Dict:
@@ -91,10 +233,8 @@ class DatabaseService:
         Returns:
             Favorito guardado
         """
-        Favorite = Query()
-        
         # Verificar si ya existe
-        existing = favorites_table.get(Favorite.steam_id == steam_id)
+        existing = storage.get_favorite(steam_id)
         if existing:
             return existing
         
@@ -105,7 +245,7 @@ class DatabaseService:
             'added_at': datetime.now().isoformat()
         }
         
-        favorites_table.insert(favorite)
+        storage.insert_favorite(favorite)
         return favorite
     
     @staticmethod
@@ -119,26 +259,20 @@ class DatabaseService:
         Returns:
             True si se eliminó, False si no existía
         """
-        Favorite = Query()
-        removed = favorites_table.remove(Favorite.steam_id == steam_id)
-        return len(removed) > 0
+        return storage.remove_favorite(steam_id)
     
     @staticmethod
-    def get_favorites() -> List[Dict]:
+    def get_favorites(limit: Optional[int] = None) -> List[Dict]:
         """
-        Obtiene todos los favoritos
+        Obtiene los favoritos
         
+        Args:
+            limit: Número máximo de favoritos a retornar (None = todos)
+            
         Returns:
             Lista de perfiles favoritos ordenados por fecha
         """
-        all_favorites = favorites_table.all()
-        # Ordenar por fecha de agregado (más reciente primero)
-        sorted_favorites = sorted(
-            all_favorites,
-            key=lambda x: x.get('added_at', ''),
-            reverse=True
-        )
-        return sorted_favorites
+        return storage.get_favorites(limit)
     
     @staticmethod
     def is_favorite(steam_id: str) -> bool:
@@ -151,20 +285,24 @@ class DatabaseService:
         Returns:
             True si está en favoritos, False si no
         """
-        Favorite = Query()
-        return favorites_table.contains(Favorite.steam_id == steam_id)
+        return storage.is_favorite(steam_id)
     
     @staticmethod
-    def update_profile_stats(steam_id: str, total_games: int):
+    def get_data_version() -> Tuple[int, List[Tuple[str, str]]]:
         """
-        Actualiza las estadísticas de un perfil
+        Versión de los datos de perfiles y favoritos, sin consultarlos
+        Solo depende del estado guardado (igual en todos los workers y tras
+        reiniciar) y de las búsquedas aún pendientes de guardar
         
-        Args:
-            steam_id: Steam ID del usuario
-            total_games: Total de juegos
+        Returns:
+            Tupla (versión del almacenamiento, búsquedas pendientes como
+            pares (steam_id, searched_at))
         """
-        Profile = Query()
-        profiles_table.update(
-            {'total_games': total_games},
-            Profile.steam_id == steam_id
-        )
+        pending = sorted((profile['steam_id'], profile['searched_at']) for profile in history_writer.get_pending())
+        return storage.change_token(), pending
+    
+    @staticmethod
+    def shutdown():
+        """Vuelca el historial pendiente y cierra la base de datos"""
+        history_writer.stop()
+        storage.close()
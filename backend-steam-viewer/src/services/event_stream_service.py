@@ -0,0 +1,64 @@
+"""
+Servicio de eventos en streaming
+Da formato a los eventos que se envían al cliente a medida que hay datos
+(Server-Sent Events o JSON por líneas)
+"""
+from typing import Any, Iterable, Iterator, List
+from src.responses import dump_json
+
+# Formatos disponibles: formato -> tipo MIME
+EVENT_STREAM_FORMATS = {
+    'sse': 'text/event-stream',
+    'ndjson': 'application/x-ndjson'
+}
+
+# Cabeceras para que ni el navegador ni los proxies acumulen la respuesta
+EVENT_STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'
+}
+
+# Juegos por evento
+EVENT_CHUNK_SIZE = 500
+
+
+class EventStreamService:
+    """Servicio para codificar eventos de streaming"""
+    
+    @staticmethod
+    def format_event(event: str, data: Any, format: str = 'sse') -> bytes:
+        """
+        Codifica un evento
+        
+        Args:
+            event: Nombre del evento
+            data: Datos del evento (deben poder serializarse a JSON)
+            format: 'sse' o 'ndjson'
+            
+        Returns:
+            Evento listo para enviar
+        """
+        if format == 'sse':
+            return b'event: ' + event.encode('utf-8') + b'\ndata: ' + dump_json(data) + b'\n\n'
+        return dump_json({'event': event, 'data': data}) + b'\n'
+    
+    @staticmethod
+    def chunks(items: List, size: int = EVENT_CHUNK_SIZE) -> Iterator[List]:
+        """
+        Divide una lista en bloques consecutivos
+        
+        Args:
+            items: Lista a dividir
+            size: Elementos por bloque
+            
+        Yields:
+            Bloques de como mucho size elementos
+        """
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+    
+    @staticmethod
+    def pick(records: Iterable[dict], fields: Iterable[str]) -> List[dict]:
+        """Conserva solo los campos indicados de cada registro"""
+        fields = tuple(fields)
+        return [{field: record.get(field) for field in fields} for record in records]
@@ -0,0 +1,199 @@
+"""
+Servicio de exportación de bibliotecas de Steam
+Genera los archivos de forma incremental para enviarlos como streaming
+"""
+import csv
+import io
+import zlib
+from typing import Dict, Iterable, Iterator, List
+from src.responses import dump_json
+
+# Columnas del CSV exportado (columna -> campo del juego procesado)
+CSV_COLUMNS = {
+    'AppID': 'appid',
+    'Nombre': 'name',
+    'Horas_Jugadas': 'playtime_hours',
+    'Ultima_Vez_Jugado': 'last_played'
+}
+
+# Campos de las exportaciones completas (juego procesado + prioridad) y su tipo
+EXPORT_FIELDS = {
+    'appid': 'int64',
+    'name': 'string',
+    'playtime_hours': 'float64',
+    'playtime_2weeks': 'float64',
+    'last_played': 'string',
+    'img_icon_url': 'string',
+    'img_logo_url': 'string',
+    'metacritic_score': 'float64',
+    'duration_hours': 'float64',
+    'priority': 'float64',
+    'has_metacritic_data': 'bool',
+    'accounts': 'string'
+}
+
+# Formatos disponibles: formato -> (tipo MIME, extensión)
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx')
+}
+
+# Filas acumuladas antes de enviar un fragmento al cliente
+ROWS_PER_CHUNK = 500
+
+
+class ExportService:
+    """Servicio para exportar juegos en distintos formatos"""
+    
+    @staticmethod
+    def iter_csv(games_list: Iterable[Dict]) -> Iterator[bytes]:
+        """
+        Genera el CSV de la biblioteca por fragmentos
+        
+        Args:
+            games_list: Juegos procesados por SteamService.process_games_data
+        
+        Yields:
+            Fragmentos del CSV codificados en UTF-8 (con BOM para Excel)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        
+        buffer.write('\ufeff')
+        writer.writerow(CSV_COLUMNS.keys())
+        
+        fields = list(CSV_COLUMNS.values())
+        pending_rows = 0
+        for game in games_list:
+            writer.writerow([game[field] for field in fields])
+            pending_rows += 1
+            if pending_rows >= ROWS_PER_CHUNK:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+                pending_rows = 0
+        
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+    
+    @staticmethod
+    def iter_ndjson(records: Iterable[Dict]) -> Iterator[bytes]:
+        """
+        Genera un JSON por línea (NDJSON) por fragmentos
+        
+        Args:
+            records: Juegos enriquecidos con prioridad
+            
+        Yields:
+            Fragmentos NDJSON codificados en UTF-8
+        """
+        lines: List[bytes] = []
+        for record in records:
+            lines.append(dump_json({field: record.get(field) for field in EXPORT_FIELDS}))
+            if len(lines) >= ROWS_PER_CHUNK:
+                yield b'\n'.join(lines) + b'\n'
+                lines = []
+        
+        if lines:
+            yield b'\n'.join(lines) + b'\n'
+    
+    @staticmethod
+    def to_parquet(records: List[Dict]) -> bytes:
+        """
+        Genera un archivo Parquet columnar comprimido con zstd
+        
+        Args:
+            records: Juegos enriquecidos con prioridad
+            
+        Returns:
+            Contenido del archivo Parquet
+            
+        Raises:
+            ImportError: Si pyarrow no está instalado
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("La exportación a Parquet requiere instalar pyarrow")
+        
+        table = pa.table({
+            field: pa.array([record.get(field) for record in records], type=pa.type_for_alias(type_name))
+            for field, type_name in EXPORT_FIELDS.items()
+        })
+        output = pa.BufferOutputStream()
+        pq.write_table(table, output, compression='zstd')
+        return output.getvalue().to_pybytes()
+    
+    @staticmethod
+    def to_xlsx(records: Iterable[Dict]) -> bytes:
+        """
+        Genera una hoja de cálculo XLSX (modo de solo escritura de openpyxl)
+        
+        Args:
+            records: Juegos enriquecidos con prioridad
+            
+        Returns:
+            Contenido del archivo XLSX
+            
+        Raises:
+            ImportError: Si openpyxl no está instalado
+        """
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ImportError("La exportación a XLSX requiere instalar openpyxl")
+        
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Juegos')
+        sheet.append(list(EXPORT_FIELDS))
+        for record in records:
+            sheet.append([record.get(field) for field in EXPORT_FIELDS])
+        
+        output = io.BytesIO()
+        workbook.save(output)
+        return output.getvalue()
+    
+    @staticmethod
+    def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Comprime con gzip un flujo de fragmentos sin acumularlo en memoria
+        
+        Args:
+            chunks: Fragmentos sin comprimir
+        
+        Yields:
+            Fragmentos comprimidos
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    
+    @staticmethod
+    def accepts_gzip(accept_encoding: str) -> bool:
+        """
+        Indica si el cliente acepta respuestas comprimidas con gzip
+        
+        Args:
+            accept_encoding: Valor de la cabecera Accept-Encoding
+        
+        Returns:
+            True si gzip está permitido
+        """
+        for part in accept_encoding.split(','):
+            encoding, _, params = part.partition(';')
+            if encoding.strip().lower() not in ('gzip', '*'):
+                continue
+            quality = params.strip().lower()
+            if quality.startswith('q='):
+                try:
+                    return float(quality[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+        return False
@@ -2,10 +2,150 @@
 Servicio para calcular prioridad de juegos
 Basado en puntuación de Metacritic y tiempo de juego
 """
+import asyncio
+import hashlib
+import io
 import math
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import Any, List, Dict, Optional, Sequence, Tuple
 import csv
 import os
+import numpy as np
+from src.config.config import Config
+from src.services.metacritic_snapshot import MetacriticSnapshot, SnapshotTitleIndex, snapshot_path
+
+# Puntuación mínima para que un juego tenga prioridad
+MIN_PRIORITY_SCORE = 70
+# Tamaño máximo de la memoria de coincidencias nombre -> fila
+MATCH_CACHE_SIZE = 100_000
+
+
+class MetacriticDataset:
+    """
+    Versión cargada del dataset de Metacritic
+    
+    Los datos y el índice de títulos viven en una instantánea binaria (ver
+    metacritic_snapshot) que se comparte entre procesos con mmap. Una vez
+    creado no se modifica (salvo la memoria de coincidencias): las recargas
+    crean una instancia nueva y la sustituyen entera, así que quien la esté
+    usando nunca ve un dataset a medio cargar.
+    """
+    
+    def __init__(
+        self,
+        snapshot: MetacriticSnapshot,
+        version: int = 0,
+        load_duration: float = 0.0,
+        compiled: bool = False
+    ):
+        """
+        Prepara el dataset sobre una instantánea
+        
+        Args:
+            snapshot: Instantánea con los juegos
+            version: Número de versión de la carga
+            load_duration: Segundos que tardó la carga
+            compiled: Si hubo que compilar la instantánea desde el CSV
+        """
+        self.snapshot = snapshot
+        self.version = version
+        # Firma (mtime en ns, tamaño) del CSV cargado
+        self.mtime = snapshot.signature
+        # SHA-256 del CSV: identifica el contenido en todos los procesos y
+        # reinicios (la versión es solo un contador de este proceso)
+        self.content_hash = snapshot.csv_hash.hex()
+        self.compiled = compiled
+        self.loaded_at = time.time()
+        self.load_duration = load_duration
+        self.scores = snapshot.scores
+        self.durations = snapshot.durations
+        self.priorities = GamePriorityService.calculate_priorities(self.scores, self.durations)
+        # Índice de títulos normalizados para coincidencias aproximadas
+        self.title_index = snapshot.title_index(Config.TITLE_MATCH_THRESHOLD)
+        self._match_cache: Dict[str, int] = {}
+    
+    @classmethod
+    def empty(cls, version: int = 0, mtime: Optional[Tuple[int, int]] = None) -> 'MetacriticDataset':
+        """Dataset sin juegos (cuando no hay CSV válido)"""
+        dataset = cls(MetacriticSnapshot.from_records([]), version=version)
+        dataset.mtime = mtime
+        return dataset
+    
+    def __len__(self) -> int:
+        return len(self.snapshot)
+    
+    def record(self, row: int) -> Dict:
+        """Datos de un juego (name, score, duration, accounts)"""
+        return self.snapshot.record(row)
+    
+    def find_row(self, game_name: str) -> int:
+        """
+        Busca la fila del dataset que corresponde a un nombre de juego
+        Los resultados aproximados (también los fallidos) se memorizan por nombre
+        
+        Args:
+            game_name: Nombre del juego
+            
+        Returns:
+            Número de fila o -1 si no hay coincidencia
+        """
+        key = game_name.lower()
+        row = self.snapshot.find(key)
+        if row >= 0:
+            return row
+        
+        row = self._match_cache.get(key)
+        if row is None:
+            match = self.title_index.lookup(game_name)
+            row = -1 if match is None else match
+            if len(self._match_cache) >= MATCH_CACHE_SIZE:
+                self._match_cache.clear()
+            self._match_cache[key] = row
+        return row
+    
+    def find_rows(self, games: Sequence[Dict]) -> np.ndarray:
+        """
+        Obtiene las filas del dataset de una lista de juegos
+        
+        Args:
+            games: Juegos con campo 'name'
+            
+        Returns:
+            Array de filas (-1 si el juego no está en el dataset)
+        """
+        return np.fromiter(
+            (self.find_row(game.get('name', '')) for game in games),
+            dtype=np.int64,
+            count=len(games)
+        )
+    
+    def priorities_for_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Obtiene la prioridad de cada fila (0 para los juegos sin datos)"""
+        if len(self.priorities) == 0:
+            return np.zeros(len(rows), dtype=np.float64)
+        return np.where(rows >= 0, self.priorities[np.maximum(rows, 0)], 0.0)
+    
+    def enrich_game(self, game: Dict, row: int, priority: float) -> Dict:
+        """Copia un juego añadiendo los campos de prioridad de su fila"""
+        if row < 0:
+            return {
+                **game,
+                'metacritic_score': None,
+                'duration_hours': None,
+                'priority': 0.0,
+                'has_metacritic_data': False,
+                'accounts': None
+            }
+        game_data = self.snapshot.record(row)
+        return {
+            **game,
+            'metacritic_score': game_data['score'],
+            'duration_hours': game_data['duration'],
+            'priority': priority,
+            'has_metacritic_data': True,
+            'accounts': game_data['accounts']
+        }
 
 
 class GamePriorityService:
@@ -13,55 +153,258 @@ class GamePriorityService:
     
     # Ruta al archivo CSV con datos de Metacritic
     CSV_PATH = os.path.join(
-        os.path.dirname(__file__), 
-        '..', '..', '..', 
-        'frontend-steam-viewer', 
-        'data', 
+        os.path.dirname(__file__),
+        '..', '..', '..',
+        'frontend-steam-viewer',
+        'data',
         'Rush games - Juegos.csv'
     )
     
     def __init__(self):
-        """Inicializa el servicio y carga datos de Metacritic"""
-        self.metacritic_data = self._load_metacritic_data()
+        """
+        Inicializa el servicio sin leer todavía el CSV
+        La aplicación carga los datos de Metacritic al arrancar (lifespan);
+        fuera de ella se cargan la primera vez que se usan
+        """
+        self._dataset: Optional[MetacriticDataset] = None
+        self._load_lock = threading.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        # Firma del último CSV que no se pudo leer (no se reintenta hasta que cambie)
+        self._failed_signature: Optional[Tuple[int, int]] = None
+    
+    @property
+    def dataset(self) -> MetacriticDataset:
+        """
+        Versión actual del dataset
+        Si aún no se ha cargado (p. ej. desde la línea de comandos) se carga
+        aquí de forma síncrona; la aplicación lo carga antes con load()
+        """
+        if self._dataset is None:
+            self.reload()
+        return self._dataset
     
-    def _load_metacritic_data(self) -> Dict[str, Dict]:
+    @property
+    def title_index(self) -> SnapshotTitleIndex:
+        """Índice de títulos de la versión actual"""
+        return self.dataset.title_index
+    
+    def _csv_signature(self) -> Optional[Tuple[int, int]]:
         """
-        Carga datos de Metacritic desde el archivo CSV
+        Obtiene la firma del CSV para detectar cambios
         
         Returns:
-            Diccionario con nombre del juego como clave y sus datos
+            Tupla (mtime en ns, tamaño) o None si el archivo no existe
         """
-        data = {}
+        try:
+            stat = os.stat(self.CSV_PATH)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _build_dataset(self, version: int) -> Optional[MetacriticDataset]:
+        """
+        Carga una versión nueva del dataset desde su instantánea
         
+        Args:
+            version: Número de versión que tendrá la carga
+            
+        Returns:
+            Dataset construido o None si el CSV no se pudo leer
+        """
+        started = time.perf_counter()
+        loaded = self._load_snapshot()
+        if loaded is None:
+            return None
+        snapshot, compiled = loaded
+        return MetacriticDataset(
+            snapshot,
+            version=version,
+            load_duration=time.perf_counter() - started,
+            compiled=compiled
+        )
+    
+    def _load_snapshot(self) -> Optional[Tuple[MetacriticSnapshot, bool]]:
+        """
+        Abre la instantánea del CSV actual, compilándola si no existe
+        
+        La instantánea se identifica por la firma (mtime en ns, tamaño) del
+        CSV, así que todos los procesos que lean el mismo archivo comparten la
+        misma copia. El CSV solo se lee entero (y se calcula su SHA-256) cuando
+        hay que compilarla.
+        
+        Returns:
+            Tupla (instantánea, si hubo que compilarla) o None si el archivo
+            no existe o no se pudo leer
+        """
         if not os.path.exists(self.CSV_PATH):
             print(f"Advertencia: No se encontró el archivo CSV en {self.CSV_PATH}")
-            return data
+            return None
         
         try:
-            with open(self.CSV_PATH, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    game_name = row.get('Juegos Pendientes', '').strip()
-                    if game_name:
-                        # Parsear puntuación (puede estar vacía)
-                        score_str = row.get('Puntuación de Usuarios', '').strip()
-                        score = float(score_str) if score_str else None
-                        
-                        # Parsear duración (puede estar vacía)
-                        duration_str = row.get('Duración', '').strip()
-                        duration = float(duration_str) if duration_str else None
-                        
-                        data[game_name.lower()] = {
-                            'name': game_name,
-                            'score': score,
-                            'duration': duration,
-                            'accounts': row.get('Cuenta', '').strip()
-                        }
+            with open(self.CSV_PATH, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                signature = (stat.st_mtime_ns, stat.st_size)
+                path = snapshot_path(signature)
+                
+                snapshot = MetacriticSnapshot.open(path, signature)
+                if snapshot is not None:
+                    return snapshot, False
+                
+                content = file.read()
+            csv_hash = hashlib.sha256(content).digest()
+            data = self._parse_metacritic_csv(content.decode('utf-8'))
+            return MetacriticSnapshot.write(path, data.values(), csv_hash, signature), True
         except Exception as e:
             print(f"Error cargando datos de Metacritic: {e}")
+            return None
+    
+    @staticmethod
+    def _parse_metacritic_csv(text: str) -> Dict[str, Dict]:
+        """
+        Lee los datos de Metacritic del contenido del CSV
+        
+        Args:
+            text: Contenido del CSV
+            
+        Returns:
+            Diccionario con nombre del juego como clave y sus datos
+        """
+        data = {}
+        
+        reader = csv.DictReader(io.StringIO(text, newline=''))
+        for row in reader:
+            game_name = row.get('Juegos Pendientes', '').strip()
+            if game_name:
+                # Parsear puntuación (puede estar vacía)
+                score_str = row.get('Puntuación de Usuarios', '').strip()
+                score = float(score_str) if score_str else None
+                
+                # Parsear duración (puede estar vacía)
+                duration_str = row.get('Duración', '').strip()
+                duration = float(duration_str) if duration_str else None
+                
+                data[game_name.lower()] = {
+                    'name': game_name,
+                    'score': score,
+                    'duration': duration,
+                    'accounts': row.get('Cuenta', '').strip()
+                }
         
         return data
     
+    def reload(self, force: bool = False) -> bool:
+        """
+        Recarga el CSV si ha cambiado desde la última carga
+        
+        La versión nueva se construye aparte y sustituye a la anterior de una
+        sola vez; si la lectura falla se conserva la versión anterior.
+        
+        Args:
+            force: Si recargar aunque el archivo no haya cambiado
+            
+        Returns:
+            True si se cargó una versión nueva
+        """
+        with self._load_lock:
+            current = self._dataset
+            if not force and current is not None and current.mtime == self._csv_signature():
+                return False
+            
+            version = current.version + 1 if current is not None else 1
+            dataset = self._build_dataset(version)
+            if dataset is None:
+                self._failed_signature = self._csv_signature()
+                # Sin CSV válido se usa un dataset vacío hasta que el archivo cambie
+                if current is None:
+                    self._dataset = MetacriticDataset.empty(version=version, mtime=self._csv_signature())
+                return False
+            
+            self._dataset = dataset
+        
+        print(
+            f"Datos de Metacritic cargados: versión {dataset.version}, "
+            f"{len(dataset)} juegos en {dataset.load_duration * 1000:.0f} ms"
+        )
+        return True
+    
+    async def load(self):
+        """Carga el dataset en un hilo aparte sin bloquear el bucle de eventos"""
+        await asyncio.to_thread(self.reload)
+    
+    async def _watch(self, interval: float):
+        """
+        Comprueba periódicamente si el CSV cambió y lo recarga en segundo plano
+        
+        Args:
+            interval: Segundos entre comprobaciones
+        """
+        while True:
+            await asyncio.sleep(interval)
+            current = self._dataset
+            signature = self._csv_signature()
+            # Hasta la primera carga no hay nada que recargar
+            if current is None or signature in (current.mtime, self._failed_signature):
+                continue
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                print(f"Error recargando datos de Metacritic: {e}")
+    
+    def start_watching(self, interval: float = Config.METACRITIC_RELOAD_INTERVAL):
+        """
+        Inicia la vigilancia del CSV (debe llamarse con el bucle de eventos activo)
+        
+        Args:
+            interval: Segundos entre comprobaciones (0 desactiva la vigilancia)
+        """
+        if interval > 0 and self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch(interval))
+    
+    async def stop_watching(self):
+        """Detiene la vigilancia del CSV"""
+        task, self._watch_task = self._watch_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado del dataset cargado
+        
+        Returns:
+            Diccionario con versión, número de juegos, duración de la carga,
+            fecha de carga y si el CSV ha cambiado desde entonces
+        """
+        dataset = self._dataset
+        if dataset is None:
+            return {
+                'loaded': False,
+                'version': 0,
+                'rows': 0,
+                'csv_path': os.path.abspath(self.CSV_PATH),
+                'csv_exists': self._csv_signature() is not None
+            }
+        
+        signature = self._csv_signature()
+        return {
+            'loaded': True,
+            'version': dataset.version,
+            'rows': len(dataset),
+            'load_duration_ms': round(dataset.load_duration * 1000, 2),
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(dataset.loaded_at)),
+            'csv_path': os.path.abspath(self.CSV_PATH),
+            'csv_exists': signature is not None,
+            'stale': signature is not None and signature != dataset.mtime,
+            'snapshot': {
+                'csv_sha256': dataset.snapshot.csv_hash.hex(),
+                'compiled': dataset.compiled
+            },
+            'title_index': dataset.title_index.stats()
+        }
+    
     def calculate_priority(self, score: Optional[float], duration: Optional[float]) -> float:
         """
         Calcula la prioridad de un juego usando la fórmula:
@@ -89,9 +432,34 @@ class GamePriorityService:
         except Exception:
             return 0.0
     
+    @staticmethod
+    def calculate_priorities(scores: np.ndarray, durations: np.ndarray) -> np.ndarray:
+        """
+        Versión vectorizada de calculate_priority para arrays completos
+        
+        Args:
+            scores: Puntuaciones (NaN si no hay dato)
+            durations: Duraciones en horas (NaN si no hay dato)
+            
+        Returns:
+            Array de prioridades redondeadas a 2 decimales
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        durations = np.asarray(durations, dtype=np.float64)
+        # Sin duración (o no positiva) se usa 1 hora, como en calculate_priority
+        durations = np.where(np.isnan(durations) | (durations <= 0), 1.0, durations)
+        valid = ~np.isnan(scores) & (scores >= MIN_PRIORITY_SCORE)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            priorities = np.where(valid, scores / np.log(durations + 1), 0.0)
+        priorities = np.where(np.isfinite(priorities), priorities, 0.0)
+        return np.round(priorities, 2)
+    
     def get_game_data(self, game_name: str) -> Optional[Dict]:
         """
         Obtiene los datos de un juego desde el CSV
+        Si no hay coincidencia exacta se busca por título normalizado
+        (sin marcas registradas, puntuación ni sufijos de edición) y,
+        en último caso, por similitud de trigramas
         
         Args:
             game_name: Nombre del juego
@@ -99,14 +467,23 @@ class GamePriorityService:
         Returns:
             Diccionario con datos del juego o None si no existe
         """
-        return self.metacritic_data.get(game_name.lower())
+        dataset = self.dataset
+        row = dataset.find_row(game_name)
+        return dataset.record(row) if row >= 0 else None
     
-    def enrich_games_with_priority(self, games: List[Dict]) -> List[Dict]:
+    def enrich_games_with_priority(
+        self,
+        games: List[Dict],
+        rows: Optional[np.ndarray] = None,
+        dataset: Optional[MetacriticDataset] = None
+    ) -> List[Dict]:
         """
         Enriquece una lista de juegos de Steam con datos de prioridad
         
         Args:
             games: Lista de juegos de Steam API
+            rows: Filas del dataset de cada juego ya calculadas (opcional)
+            dataset: Dataset con el que se calcularon rows (por defecto el actual)
             
         Returns:
             Lista de juegos con campos adicionales:
@@ -115,61 +492,81 @@ class GamePriorityService:
             - priority: Prioridad calculada
             - has_metacritic_data: Si se encontraron datos
         """
-        enriched_games = []
-        
-        for game in games:
-            game_name = game.get('name', '')
-            enriched_game = game.copy()
-            
-            # Buscar datos de Metacritic
-            game_data = self.get_game_data(game_name)
-            
-            if game_data:
-                score = game_data.get('score')
-                duration = game_data.get('duration')
-                priority = self.calculate_priority(score, duration)
-                
-                enriched_game.update({
-                    'metacritic_score': score,
-                    'duration_hours': duration,
-                    'priority': priority,
-                    'has_metacritic_data': True,
-                    'accounts': game_data.get('accounts')
-                })
-            else:
-                enriched_game.update({
-                    'metacritic_score': None,
-                    'duration_hours': None,
-                    'priority': 0.0,
-                    'has_metacritic_data': False,
-                    'accounts': None
-                })
-            
-            enriched_games.append(enriched_game)
-        
-        return enriched_games
+        dataset = dataset or self.dataset
+        if rows is None:
+            rows = dataset.find_rows(games)
+        priorities = dataset.priorities_for_rows(rows).tolist()
+        return [
+            dataset.enrich_game(game, row, priority)
+            for game, row, priority in zip(games, rows.tolist(), priorities)
+        ]
     
-    def get_prioritized_games(self, games: List[Dict], min_priority: float = 0) -> List[Dict]:
+    def get_prioritized_games(
+        self,
+        games: List[Dict],
+        min_priority: float = 0,
+        limit: Optional[int] = None,
+        rows: Optional[np.ndarray] = None,
+        dataset: Optional[MetacriticDataset] = None
+    ) -> List[Dict]:
         """
         Obtiene juegos ordenados por prioridad
         
+        El filtrado y la ordenación se hacen sobre arrays; solo se construyen
+        los diccionarios de los juegos que se devuelven. Ante empates se
+        mantiene el orden original de la lista.
+        
         Args:
             games: Lista de juegos de Steam
             min_priority: Prioridad mínima para filtrar
+            limit: Número máximo de juegos a devolver (None = todos)
+            rows: Filas del dataset de cada juego ya calculadas (opcional)
+            dataset: Dataset con el que se calcularon rows (por defecto el actual)
             
         Returns:
             Lista de juegos ordenados por prioridad (mayor a menor)
         """
-        enriched = self.enrich_games_with_priority(games)
+        dataset = dataset or self.dataset
+        if rows is None:
+            rows = dataset.find_rows(games)
+        priorities = dataset.priorities_for_rows(rows)
+        selected = np.flatnonzero(priorities >= min_priority)
+        selected = selected[self.top_k_order(priorities[selected], limit)]
         
-        # Filtrar por prioridad mínima
-        filtered = [g for g in enriched if g['priority'] >= min_priority]
+        return [
+            dataset.enrich_game(games[position], int(rows[position]), float(priorities[position]))
+            for position in selected.tolist()
+        ]
+    
+    @staticmethod
+    def top_k_order(values: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+        """
+        Obtiene las posiciones de los k mayores valores en orden descendente
         
-        # Ordenar por prioridad descendente
-        sorted_games = sorted(filtered, key=lambda x: x['priority'], reverse=True)
+        Usa argpartition para no ordenar todo el array cuando k es pequeño.
+        Es estable: ante empates gana la posición menor.
+        
+        Args:
+            values: Valores a ordenar
+            k: Número de posiciones a devolver (None = todas)
+            
+        Returns:
+            Array de posiciones
+        """
+        count = len(values)
+        if k is None or k >= count:
+            return np.argsort(-values, kind='stable')
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
         
-        return sorted_games
+        # Umbral: el k-ésimo mayor valor
+        threshold = values[np.argpartition(-values, k - 1)[k - 1]]
+        above = np.flatnonzero(values > threshold)
+        ties = np.flatnonzero(values == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+        candidates.sort()
+        return candidates[np.argsort(-values[candidates], kind='stable')]
 
 
-# Instancia global del servicio
+# Instancia global del servicio (la aplicación carga los datos al arrancar)
 game_priority_service = GamePriorityService()
@@ -0,0 +1,157 @@
+"""
+Registro compacto de un juego de la biblioteca de Steam
+Guarda los datos en bruto de GetOwnedGames y calcula las URLs de imagen y la
+fecha de última partida solo cuando se piden (al serializar la respuesta)
+"""
+import time
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator
+
+# URL base de las imágenes de los juegos
+IMAGE_BASE_URL = 'https://media.steampowered.com/steamcommunity/public/images/apps'
+
+# Campos del juego procesado, en el orden en que se serializan
+GAME_FIELDS = (
+    'appid',
+    'name',
+    'playtime_hours',
+    'playtime_2weeks',
+    'last_played',
+    'img_icon_url',
+    'img_logo_url'
+)
+_GAME_FIELD_SET = frozenset(GAME_FIELDS)
+
+
+class GameRecord(Mapping):
+    """
+    Juego procesado de solo lectura
+    
+    Se comporta como el diccionario que devolvía process_games_data
+    (record['name'], record.get(...), dict(record), {**record}), pero ocupa
+    menos memoria y no formatea URLs ni fechas de los juegos que no se envían.
+    Las horas jugadas se calculan al crearlo porque se usan para ordenar
+    y en las estadísticas.
+    """
+    
+    __slots__ = (
+        'appid',
+        'name',
+        'playtime_hours',
+        'playtime_forever',
+        'playtime_2weeks_minutes',
+        'rtime_last_played',
+        'img_icon_hash',
+        'img_logo_hash',
+        '_last_played'
+    )
+    
+    def __init__(
+        self,
+        appid: int,
+        name: str,
+        playtime_forever: int = 0,
+        playtime_2weeks_minutes: int = 0,
+        rtime_last_played: int = 0,
+        img_icon_hash: str = '',
+        img_logo_hash: str = ''
+    ):
+        """
+        Args:
+            appid: ID del juego
+            name: Nombre del juego
+            playtime_forever: Minutos jugados en total
+            playtime_2weeks_minutes: Minutos jugados en las últimas dos semanas
+            rtime_last_played: Marca de tiempo de la última partida (0 = nunca)
+            img_icon_hash: Hash de la imagen del icono
+            img_logo_hash: Hash de la imagen del logo
+        """
+        self.appid = appid
+        self.name = name
+        self.playtime_hours = round(playtime_forever / 60, 1)
+        self.playtime_forever = playtime_forever
+        self.playtime_2weeks_minutes = playtime_2weeks_minutes
+        self.rtime_last_played = rtime_last_played
+        self.img_icon_hash = img_icon_hash
+        self.img_logo_hash = img_logo_hash
+        self._last_played = None
+    
+    @classmethod
+    def from_api(cls, game: Dict) -> 'GameRecord':
+        """
+        Crea el registro a partir de un juego de GetOwnedGames
+        
+        Args:
+            game: Juego raw de la API
+            
+        Returns:
+            Registro del juego
+        """
+        appid = game['appid']
+        return cls(
+            appid,
+            game.get('name', f"AppID {appid}"),
+            game.get('playtime_forever', 0),
+            game.get('playtime_2weeks', 0),
+            game.get('rtime_last_played', 0),
+            game.get('img_icon_url', ''),
+            game.get('img_logo_url', '')
+        )
+    
+    @property
+    def playtime_2weeks(self) -> float:
+        """Horas jugadas en las últimas dos semanas (con un decimal)"""
+        return round(self.playtime_2weeks_minutes / 60, 1)
+    
+    @property
+    def last_played(self) -> str:
+        """Fecha de la última partida ('Nunca' si no se ha jugado)"""
+        if self._last_played is None:
+            if self.rtime_last_played > 0:
+                self._last_played = time.strftime('%Y-%m-%d %H:%M', time.localtime(self.rtime_last_played))
+            else:
+                self._last_played = 'Nunca'
+        return self._last_played
+    
+    @property
+    def img_icon_url(self) -> str:
+        """URL del icono del juego ('' si no tiene)"""
+        return f'{IMAGE_BASE_URL}/{self.appid}/{self.img_icon_hash}.jpg' if self.img_icon_hash else ''
+    
+    @property
+    def img_logo_url(self) -> str:
+        """URL del logo del juego ('' si no tiene)"""
+        return f'{IMAGE_BASE_URL}/{self.appid}/{self.img_logo_hash}.jpg' if self.img_logo_hash else ''
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in _GAME_FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(GAME_FIELDS)
+    
+    def __len__(self) -> int:
+        return len(GAME_FIELDS)
+    
+    def __repr__(self) -> str:
+        return f'GameRecord(appid={self.appid!r}, name={self.name!r})'
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario con todos los campos (formato de la respuesta JSON)"""
+        appid = self.appid
+        icon_hash = self.img_icon_hash
+        logo_hash = self.img_logo_hash
+        minutes_2weeks = self.playtime_2weeks_minutes
+        last_played = self._last_played
+        if last_played is None:
+            last_played = self.last_played
+        return {
+            'appid': appid,
+            'name': self.name,
+            'playtime_hours': self.playtime_hours,
+            'playtime_2weeks': round(minutes_2weeks / 60, 1) if minutes_2weeks else 0.0,
+            'last_played': last_played,
+            'img_icon_url': f'{IMAGE_BASE_URL}/{appid}/{icon_hash}.jpg' if icon_hash else '',
+            'img_logo_url': f'{IMAGE_BASE_URL}/{appid}/{logo_hash}.jpg' if logo_hash else ''
+        }
@@ -0,0 +1,117 @@
+"""
+Cliente HTTP asíncrono compartido para las llamadas a Steam y SteamSpy
+Mantiene un pool de conexiones persistente (keep-alive, HTTP/2 si está disponible)
+"""
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.config.config import Config
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class SteamHttpClient:
+    """Cliente HTTP con pool de conexiones compartido y límite de conexiones por host"""
+    
+    def __init__(self):
+        """Inicializa el cliente (el pool se crea en la primera petición)"""
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Obtiene el cliente compartido, creándolo si es necesario
+        
+        Returns:
+            Cliente httpx con el pool de conexiones configurado
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=Config.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+                ),
+                timeout=Config.REQUEST_TIMEOUT,
+                follow_redirects=True
+            )
+        return self._client
+    
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """
+        Obtiene el semáforo que limita las conexiones simultáneas a un host
+        
+        Args:
+            url: URL de la petición
+        
+        Returns:
+            Semáforo asociado al host de la URL
+        """
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(Config.HTTP_MAX_CONNECTIONS_PER_HOST)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+    
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ) -> httpx.Response:
+        """
+        Realiza una petición GET usando el pool compartido
+        
+        Args:
+            url: URL a consultar
+            params: Parámetros de la query string
+            headers: Cabeceras adicionales
+            timeout: Timeout en segundos (por defecto Config.REQUEST_TIMEOUT)
+        
+        Returns:
+            Respuesta HTTP
+        """
+        async with self._get_host_semaphore(url):
+            return await self._get_client().get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=timeout if timeout is not None else Config.REQUEST_TIMEOUT
+            )
+    
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Realiza una petición GET y decodifica la respuesta como JSON
+        
+        Returns:
+            Contenido JSON de la respuesta
+        """
+        response = await self.get(url, params=params, headers=headers, timeout=timeout)
+        return response.json()
+    
+    async def close(self):
+        """Cierra el pool de conexiones"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._host_semaphores.clear()
+
+
+# Instancia global del cliente
+steam_http_client = SteamHttpClient()
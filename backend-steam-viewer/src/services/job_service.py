@@ -0,0 +1,321 @@
+"""
+Servicio de trabajos en segundo plano
+Ejecuta análisis largos fuera de la petición y guarda su progreso y resultado
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from src.config.config import Config
+
+# Estados de un trabajo
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+# Prefijo de las claves de trabajos en Redis
+REDIS_KEY_PREFIX = 'steam-viewer:job:'
+# Segundos entre limpiezas de trabajos caducados en memoria
+MEMORY_PURGE_INTERVAL = 60
+
+
+class JobStore(ABC):
+    """Interfaz común (asíncrona) de los almacenes de trabajos"""
+    
+    @abstractmethod
+    async def put(self, job: Dict, ttl: float):
+        """
+        Guarda (o reemplaza) un trabajo
+        
+        Args:
+            job: Trabajo completo (debe poder serializarse a JSON)
+            ttl: Segundos que se conserva desde esta escritura
+        """
+    
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """Obtiene un trabajo o None si no existe o ha caducado"""
+    
+    async def close(self):
+        """Libera los recursos del almacén"""
+
+
+class MemoryJobStore(JobStore):
+    """Almacén en memoria del proceso (un solo worker de uvicorn)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, tuple] = {}
+        self._last_purge = time.monotonic()
+    
+    def _purge(self, now: float):
+        """Elimina los trabajos caducados (como mucho una vez por intervalo)"""
+        if now - self._last_purge < MEMORY_PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        expired = [job_id for job_id, (_, expires_at) in self._jobs.items() if expires_at <= now]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    async def put(self, job: Dict, ttl: float):
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            self._jobs[job['id']] = (job, now + ttl)
+    
+    async def get(self, job_id: str) -> Optional[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return None
+            job, expires_at = entry
+            if expires_at <= now:
+                del self._jobs[job_id]
+                return None
+            return job
+
+
+class RedisJobStore(JobStore):
+    """
+    Almacén en Redis, compartido por varios workers de uvicorn
+    
+    El trabajo se ejecuta en el worker que lo recibió, pero cualquiera
+    puede consultar su estado.
+    """
+    
+    def __init__(self, url: str):
+        """
+        Args:
+            url: URL de conexión (redis://host:puerto/db)
+            
+        Raises:
+            ImportError: Si el paquete redis no está instalado
+        """
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise ImportError("El almacén de trabajos en Redis requiere instalar redis")
+        
+        # Cliente asíncrono: las escrituras no bloquean el bucle de eventos
+        self._client = redis.Redis.from_url(url)
+    
+    async def put(self, job: Dict, ttl: float):
+        await self._client.set(f'{REDIS_KEY_PREFIX}{job["id"]}', json.dumps(job), ex=max(1, int(ttl)))
+    
+    async def get(self, job_id: str) -> Optional[Dict]:
+        raw = await self._client.get(f'{REDIS_KEY_PREFIX}{job_id}')
+        return json.loads(raw) if raw is not None else None
+    
+    async def close(self):
+        await self._client.aclose()
+
+
+def create_job_store(backend: str) -> JobStore:
+    """
+    Crea el almacén de trabajos configurado
+    
+    Args:
+        backend: 'memory' o 'redis'
+        
+    Returns:
+        Instancia del almacén
+    """
+    if backend == 'memory':
+        return MemoryJobStore()
+    if backend == 'redis':
+        return RedisJobStore(Config.REDIS_URL)
+    raise ValueError(f"Almacén de trabajos desconocido: {backend}")
+
+
+class JobProgress:
+    """Permite a un trabajo informar de su avance"""
+    
+    def __init__(self, manager: 'JobManager', job: Dict):
+        self._manager = manager
+        self._job = job
+    
+    def update(self, done: int, total: int, stage: Optional[str] = None):
+        """
+        Actualiza el avance del trabajo
+        
+        Args:
+            done: Pasos completados
+            total: Pasos totales
+            stage: Descripción de la fase actual
+        """
+        progress = self._job['progress']
+        progress['done'] = done
+        progress['total'] = total
+        if stage is not None:
+            progress['stage'] = stage
+        self._manager.save_soon(self._job)
+
+
+class JobManager:
+    """
+    Cola de trabajos que se ejecutan en segundo plano en el bucle de eventos
+    
+    Como mucho se ejecutan `concurrency` trabajos a la vez; el resto espera
+    en estado 'queued'. El resultado se conserva durante `ttl` segundos.
+    
+    Los avances se guardan en segundo plano: mientras hay una escritura
+    pendiente de un trabajo, los avances siguientes se agrupan en ella.
+    """
+    
+    def __init__(self, store: JobStore, concurrency: int, ttl: float):
+        """
+        Args:
+            store: Almacén de trabajos
+            concurrency: Trabajos simultáneos
+            ttl: Segundos que se conservan los trabajos
+        """
+        self.store = store
+        self.ttl = ttl
+        self._concurrency = max(1, concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._writes: Set[asyncio.Task] = set()
+        self._dirty: Set[str] = set()
+    
+    async def save(self, job: Dict):
+        """Guarda el estado actual de un trabajo"""
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        # Escrituras en orden: la última siempre lleva el estado más reciente
+        async with self._write_lock:
+            self._dirty.discard(job['id'])
+            await self.store.put(job, self.ttl)
+    
+    def save_soon(self, job: Dict):
+        """Programa el guardado de un trabajo sin esperar a que termine"""
+        if job['id'] in self._dirty:
+            return
+        self._dirty.add(job['id'])
+        task = asyncio.create_task(self.save(job))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+    
+    async def submit(
+        self,
+        kind: str,
+        run: Callable[[JobProgress], Awaitable[Any]],
+        cleanup: Optional[Callable[[], None]] = None
+    ) -> Dict:
+        """
+        Encola un trabajo
+        
+        Args:
+            kind: Tipo de trabajo (para mostrarlo en el estado)
+            run: Función asíncrona que recibe un JobProgress y devuelve
+                el resultado (debe poder serializarse a JSON)
+            cleanup: Libera los recursos de run si el trabajo se cancela
+                antes de empezar (por ejemplo, al detener el servidor)
+        
+        Returns:
+            Trabajo creado
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        
+        job = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'status': JOB_QUEUED,
+            'progress': {'done': 0, 'total': 0, 'stage': None},
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None
+        }
+        await self.save(job)
+        
+        task = asyncio.create_task(self._execute(job, run, cleanup))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+    
+    async def _execute(
+        self,
+        job: Dict,
+        run: Callable[[JobProgress], Awaitable[Any]],
+        cleanup: Optional[Callable[[], None]]
+    ):
+        """Ejecuta un trabajo y guarda su resultado o su error"""
+        started = False
+        try:
+            async with self._semaphore:
+                started = True
+                job['status'] = JOB_RUNNING
+                job['started_at'] = time.time()
+                await self.save(job)
+                
+                job['result'] = await run(JobProgress(self, job))
+                job['status'] = JOB_COMPLETED
+        except asyncio.CancelledError:
+            job['status'] = JOB_FAILED
+            job['error'] = 'El trabajo se canceló al detener el servidor'
+            raise
+        except Exception as e:
+            job['status'] = JOB_FAILED
+            # Los HTTPException de las rutas traen el mensaje en detail
+            job['error'] = getattr(e, 'detail', None) or str(e) or type(e).__name__
+        finally:
+            # Si no llegó a empezar (cancelado en la cola), run no liberará sus recursos
+            if not started and cleanup is not None:
+                cleanup()
+            job['finished_at'] = time.time()
+            await self.save(job)
+    
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Obtiene el estado de un trabajo con su porcentaje y tiempo estimado
+        
+        Args:
+            job_id: ID del trabajo
+            
+        Returns:
+            Trabajo con progress.percent y eta_seconds, o None si no existe
+        """
+        job = await self.store.get(job_id)
+        if job is None:
+            return None
+        
+        job = dict(job, progress=dict(job['progress']))
+        progress = job['progress']
+        done, total = progress['done'], progress['total']
+        progress['percent'] = round(100 * done / total, 1) if total else None
+        if job['status'] == JOB_COMPLETED:
+            progress['percent'] = 100.0
+        
+        # Estimación lineal a partir del ritmo observado
+        job['eta_seconds'] = None
+        if job['status'] == JOB_RUNNING and total and 0 < done < total:
+            elapsed = time.time() - job['started_at']
+            job['eta_seconds'] = round(elapsed * (total - done) / done, 1)
+        elif job['status'] == JOB_COMPLETED:
+            job['eta_seconds'] = 0
+        return job
+    
+    async def shutdown(self):
+        """Cancela los trabajos en curso y cierra el almacén"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*self._writes, return_exceptions=True)
+        await self.store.close()
+
+
+# Instancia global del gestor de trabajos
+job_manager = JobManager(
+    create_job_store(Config.JOB_STORE),
+    concurrency=Config.JOB_CONCURRENCY,
+    ttl=Config.JOB_RESULT_TTL
+)
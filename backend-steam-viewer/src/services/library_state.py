@@ -0,0 +1,394 @@
+"""
+Estado incremental de las bibliotecas de Steam
+Guarda la última versión procesada de cada biblioteca, calcula qué ha cambiado
+en cada actualización y solo vuelve a procesar los juegos modificados
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from src.config.config import Config
+from src.services.game_priority_service import MetacriticDataset
+from src.responses import dump_json
+from src.services.game_record import GameRecord
+from src.services.steam_service import SteamService
+
+# Ruta de la base de datos de instantáneas
+LIBRARY_DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'libraries.db')
+
+# Huella de un juego: (minutos totales, minutos en 2 semanas, última partida, nombre, icono, logo)
+Fingerprint = Tuple[int, int, int, str, str, str]
+
+
+def game_fingerprint(game: Dict) -> Fingerprint:
+    """Datos de un juego de GetOwnedGames que afectan a la respuesta"""
+    return (
+        game.get('playtime_forever', 0),
+        game.get('playtime_2weeks', 0),
+        game.get('rtime_last_played', 0),
+        game.get('name', ''),
+        game.get('img_icon_url', ''),
+        game.get('img_logo_url', '')
+    )
+
+
+def library_etag(fingerprints: Dict[int, Fingerprint]) -> str:
+    """
+    Calcula la huella de una biblioteca completa (independiente del orden)
+    
+    Args:
+        fingerprints: Huella de cada juego por appid
+        
+    Returns:
+        Hash hexadecimal
+    """
+    return hashlib.sha1(dump_json(sorted(fingerprints.items()))).hexdigest()
+
+
+def diff_libraries(previous: Dict[int, Fingerprint], current: Dict[int, Fingerprint]) -> Dict:
+    """
+    Compara dos versiones de una biblioteca
+    
+    Args:
+        previous: Huellas de la versión anterior
+        current: Huellas de la versión nueva
+        
+    Returns:
+        Diccionario con added y removed (appids), playtime (appid y
+        minutos jugados desde la versión anterior) y last_played (appids
+        con nueva fecha de última partida)
+    """
+    added = [appid for appid in current if appid not in previous]
+    removed = [appid for appid in previous if appid not in current]
+    playtime = []
+    last_played = []
+    for appid, fingerprint in current.items():
+        old = previous.get(appid)
+        if old is None or old == fingerprint:
+            continue
+        if fingerprint[0] != old[0]:
+            playtime.append({'appid': appid, 'minutes': fingerprint[0] - old[0]})
+        if fingerprint[2] != old[2]:
+            last_played.append(appid)
+    return {
+        'added': added,
+        'removed': removed,
+        'playtime': playtime,
+        'last_played': last_played
+    }
+
+
+class LibrarySnapshotStore:
+    """Almacén en SQLite de la última versión de cada biblioteca y de su último cambio"""
+    
+    def __init__(self, path: str = LIBRARY_DB_PATH):
+        """
+        Abre (o crea) la base de datos de instantáneas
+        
+        Args:
+            path: Ruta del archivo SQLite
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS library_snapshots ('
+            '  steam_id TEXT PRIMARY KEY,'
+            '  etag TEXT NOT NULL,'
+            '  games TEXT NOT NULL,'
+            '  changes TEXT,'
+            '  updated_at REAL NOT NULL'
+            ')'
+        )
+        self._conn.commit()
+    
+    def get(self, steam_id: str) -> Optional[Dict]:
+        """
+        Obtiene la última instantánea de una biblioteca
+        
+        Args:
+            steam_id: Steam ID del usuario
+            
+        Returns:
+            Diccionario con etag, fingerprints, changes y updated_at, o None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, games, changes, updated_at FROM library_snapshots WHERE steam_id = ?',
+                (steam_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'etag': row[0],
+            'fingerprints': {int(appid): tuple(values) for appid, values in json.loads(row[1]).items()},
+            'changes': json.loads(row[2]) if row[2] else None,
+            'updated_at': row[3]
+        }
+    
+    def put(self, steam_id: str, etag: str, fingerprints: Dict[int, Fingerprint], changes: Optional[Dict]):
+        """
+        Guarda (o reemplaza) la instantánea de una biblioteca
+        
+        Args:
+            steam_id: Steam ID del usuario
+            etag: Huella de la biblioteca
+            fingerprints: Huella de cada juego por appid
+            changes: Diferencias con la versión anterior (None si es la primera)
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO library_snapshots (steam_id, etag, games, changes, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (
+                    steam_id,
+                    etag,
+                    dump_json(fingerprints).decode('utf-8'),
+                    json.dumps(changes) if changes is not None else None,
+                    time.time()
+                )
+            )
+            self._conn.commit()
+    
+    def close(self):
+        """Cierra la conexión con la base de datos"""
+        with self._lock:
+            self._conn.close()
+
+
+class LibraryState:
+    """Versión procesada de la biblioteca de un usuario"""
+    
+    def __init__(
+        self,
+        steam_id: str,
+        etag: str,
+        fingerprints: Dict[int, Fingerprint],
+        records: Dict[int, GameRecord],
+        games: List[GameRecord],
+        changes: Optional[Dict],
+        updated_at: float
+    ):
+        """
+        Args:
+            steam_id: Steam ID del usuario
+            etag: Huella de la biblioteca
+            fingerprints: Huella de cada juego por appid
+            records: Juego procesado por appid
+            games: Juegos procesados ordenados por horas jugadas
+            changes: Diferencias con la versión anterior (None si es la primera)
+            updated_at: Momento (timestamp) en que se detectó esta versión
+        """
+        self.steam_id = steam_id
+        self.etag = etag
+        self.fingerprints = fingerprints
+        self.records = records
+        self.games = games
+        self.changes = changes
+        self.updated_at = updated_at
+        self.stats = SteamService.calculate_statistics(games)
+        # Filas de Metacritic por appid (válidas para el dataset con ese contenido)
+        self.dataset_hash: Optional[str] = None
+        self.rows_by_appid: Dict[int, int] = {}
+        self._rows: Optional[np.ndarray] = None
+        # Varias peticiones pueden pedir las filas a la vez desde el pool de hilos
+        self._rows_lock = threading.Lock()
+        self._games_json: Optional[bytes] = None
+    
+    @property
+    def games_json(self) -> bytes:
+        """
+        Juegos codificados en JSON (se codifican una sola vez por versión)
+        
+        Los diccionarios se construyen en una pasada antes de serializar;
+        así orjson no llama a su función default por cada GameRecord.
+        """
+        if self._games_json is None:
+            self._games_json = dump_json([game.to_dict() for game in self.games])
+        return self._games_json
+    
+    def priority_rows(self, dataset: MetacriticDataset) -> np.ndarray:
+        """
+        Obtiene las filas de Metacritic de los juegos (alineadas con games)
+        Solo se buscan los juegos nuevos o modificados desde la versión anterior.
+        La primera llamada (y la primera tras recargar el dataset) hace búsquedas
+        aproximadas, así que debe ejecutarse en el pool de hilos.
+        
+        Args:
+            dataset: Dataset de Metacritic actual
+            
+        Returns:
+            Array de filas (-1 si el juego no está en el dataset)
+        """
+        with self._rows_lock:
+            if self.dataset_hash != dataset.content_hash:
+                self.dataset_hash = dataset.content_hash
+                self.rows_by_appid = {}
+                self._rows = None
+            
+            if self._rows is None:
+                rows_by_appid = self.rows_by_appid
+                for game in self.games:
+                    if game.appid not in rows_by_appid:
+                        rows_by_appid[game.appid] = dataset.find_row(game.name)
+                self._rows = np.fromiter(
+                    (rows_by_appid[game.appid] for game in self.games),
+                    dtype=np.int64,
+                    count=len(self.games)
+                )
+            return self._rows
+    
+    def known_rows(self) -> Tuple[Optional[str], Dict[int, int]]:
+        """
+        Obtiene una copia de las filas de Metacritic ya calculadas
+        
+        Returns:
+            Tupla (hash del dataset con el que se calcularon, filas por appid)
+        """
+        with self._rows_lock:
+            return self.dataset_hash, dict(self.rows_by_appid)
+
+
+class LibraryStateService:
+    """
+    Mantiene la última versión procesada de cada biblioteca
+    
+    En memoria se conservan las bibliotecas usadas recientemente (LRU); en
+    SQLite solo las huellas, para calcular las diferencias tras reiniciar.
+    refresh escribe en SQLite, por lo que las rutas lo ejecutan en el pool
+    de hilos (run_in_threadpool).
+    """
+    
+    def __init__(self, store: LibrarySnapshotStore, max_profiles: int):
+        """
+        Args:
+            store: Almacén persistente de instantáneas
+            max_profiles: Bibliotecas que se conservan procesadas en memoria
+        """
+        self.store = store
+        self.max_profiles = max_profiles
+        self._states: "OrderedDict[str, LibraryState]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, steam_id: str) -> Optional[LibraryState]:
+        """Obtiene la versión en memoria de una biblioteca (o None)"""
+        with self._lock:
+            state = self._states.get(steam_id)
+            if state is not None:
+                self._states.move_to_end(steam_id)
+        return state
+    
+    def refresh(self, steam_id: str, raw_games: Iterable[Dict]) -> LibraryState:
+        """
+        Actualiza la biblioteca de un usuario con la respuesta de GetOwnedGames
+        
+        Si nada ha cambiado se devuelve la versión anterior tal cual; si no,
+        solo se vuelven a procesar los juegos nuevos o modificados y se
+        guardan las diferencias.
+        
+        Args:
+            steam_id: Steam ID del usuario
+            raw_games: Juegos raw de la API
+            
+        Returns:
+            Versión actual de la biblioteca
+        """
+        raw_games = list(raw_games)
+        fingerprints = {game['appid']: game_fingerprint(game) for game in raw_games}
+        
+        state = self.get(steam_id)
+        if state is not None and state.fingerprints == fingerprints:
+            return state
+        
+        etag = library_etag(fingerprints)
+        stored = None
+        if state is not None:
+            previous_fingerprints, previous_etag = state.fingerprints, state.etag
+        else:
+            stored = self.store.get(steam_id)
+            previous_fingerprints = stored['fingerprints'] if stored else None
+            previous_etag = stored['etag'] if stored else None
+        
+        if etag == previous_etag:
+            # Sin cambios desde la última instantánea guardada (p. ej. tras reiniciar)
+            changes = stored['changes'] if stored else state.changes
+            updated_at = stored['updated_at'] if stored else state.updated_at
+        else:
+            changes = None
+            if previous_fingerprints is not None:
+                changes = {
+                    **diff_libraries(previous_fingerprints, fingerprints),
+                    'previous_etag': previous_etag,
+                    'detected_at': time.time()
+                }
+            updated_at = time.time()
+            self.store.put(steam_id, etag, fingerprints, changes)
+        
+        # Reutilizar los juegos procesados que no han cambiado
+        previous_records = state.records if state is not None else {}
+        unchanged = state.fingerprints if state is not None else {}
+        records = {}
+        games = []
+        for game in raw_games:
+            appid = game['appid']
+            record = previous_records.get(appid) if unchanged.get(appid) == fingerprints[appid] else None
+            if record is None:
+                record = GameRecord.from_api(game)
+            records[appid] = record
+            games.append(record)
+        games.sort(key=lambda x: x.playtime_hours, reverse=True)
+        
+        new_state = LibraryState(steam_id, etag, fingerprints, records, games, changes, updated_at)
+        if state is not None:
+            # Conservar las filas de Metacritic de los juegos con el mismo nombre
+            dataset_hash, rows_by_appid = state.known_rows()
+            new_state.dataset_hash = dataset_hash
+            new_state.rows_by_appid = {
+                appid: row for appid, row in rows_by_appid.items()
+                if appid in fingerprints and fingerprints[appid][3] == state.fingerprints[appid][3]
+            }
+        
+        with self._lock:
+            self._states[steam_id] = new_state
+            self._states.move_to_end(steam_id)
+            while len(self._states) > self.max_profiles:
+                self._states.popitem(last=False)
+        return new_state
+    
+    def refresh_with_rows(
+        self,
+        steam_id: str,
+        raw_games: Iterable[Dict],
+        dataset: MetacriticDataset
+    ) -> Tuple[LibraryState, np.ndarray]:
+        """
+        Actualiza la biblioteca (ver refresh) y obtiene sus filas de Metacritic
+        
+        Las rutas lo ejecutan en el pool de hilos para que las búsquedas de
+        títulos no bloqueen el bucle de eventos.
+        
+        Args:
+            steam_id: Steam ID del usuario
+            raw_games: Juegos raw de la API
+            dataset: Dataset de Metacritic actual
+            
+        Returns:
+            Tupla (versión actual de la biblioteca, filas alineadas con sus juegos)
+        """
+        state = self.refresh(steam_id, raw_games)
+        return state, state.priority_rows(dataset)
+    
+    def close(self):
+        """Cierra el almacén persistente"""
+        self.store.close()
+
+
+# Instancia global del estado de las bibliotecas
+library_state = LibraryStateService(LibrarySnapshotStore(), max_profiles=Config.LIBRARY_STATE_MAX_PROFILES)
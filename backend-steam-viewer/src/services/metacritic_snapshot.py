@@ -0,0 +1,655 @@
+"""
+Instantánea binaria del dataset de Metacritic
+Compila el CSV en un archivo que se abre con mmap, de modo que varios
+procesos comparten una sola copia en memoria en lugar de un diccionario cada uno
+"""
+import glob
+import mmap
+import os
+import struct
+import zlib
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from src.services.title_index import (
+    minimum_overlap,
+    normalize_title,
+    sequel_numbers,
+    size_bounds,
+    title_trigrams
+)
+
+# Directorio de las instantáneas (junto al resto de datos del backend)
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+# Prefijo y extensión de los archivos de instantánea
+SNAPSHOT_PREFIX = 'metacritic-'
+SNAPSHOT_SUFFIX = '.snap'
+
+# Cabecera: firma del formato, SHA-256 del CSV, firma del CSV (mtime en ns y
+# tamaño), número de filas, tamaño de la tabla hash y longitud de los bloques
+# de claves, nombres, cuentas e índice de títulos. Todas las secciones
+# numéricas quedan alineadas (las vistas de memoria solo admiten esas)
+MAGIC = b'MCSNAP02'
+HEADER = struct.Struct('<8s32sqQQQQQQQ')
+# Cabecera del índice de títulos: títulos, trigramas, entradas de las listas,
+# tamaño de las dos tablas hash y longitud de los bloques de títulos y trigramas
+INDEX_HEADER = struct.Struct('<QQQQQQQ')
+# Hueco vacío de la tabla hash
+EMPTY_SLOT = -1
+
+
+def snapshot_path(signature: Tuple[int, int], directory: str = SNAPSHOT_DIR) -> str:
+    """
+    Obtiene la ruta de la instantánea que corresponde a un CSV
+    
+    Args:
+        signature: Firma (mtime en ns, tamaño) del CSV
+        directory: Directorio de las instantáneas
+        
+    Returns:
+        Ruta del archivo de instantánea
+    """
+    mtime_ns, size = signature
+    return os.path.join(directory, f'{SNAPSHOT_PREFIX}{mtime_ns}-{size}{SNAPSHOT_SUFFIX}')
+
+
+def name_hash(key: str) -> int:
+    """Hash estable (igual en todos los procesos) de un nombre en minúsculas"""
+    return zlib.crc32(key.encode('utf-8'))
+
+
+def _string_table(values: Iterable[str]):
+    """
+    Codifica una lista de textos como bloque UTF-8 más desplazamientos
+    
+    Returns:
+        Tupla (desplazamientos uint64 de n + 1 elementos, bloque de bytes)
+    """
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, b''.join(encoded)
+
+
+def _table_size(count: int) -> int:
+    """
+    Tamaño de la tabla hash: potencia de 2 con ocupación máxima del 50%
+    (al menos 2, para que la tabla ocupe un múltiplo de 8 bytes)
+    """
+    size = 2
+    while size < count * 2:
+        size *= 2
+    return size
+
+
+def _hash_table(keys: Sequence[str]) -> np.ndarray:
+    """
+    Construye la tabla hash (direccionamiento abierto) de una lista de textos
+    
+    Args:
+        keys: Textos sin repetidos; la tabla guarda su posición en la lista
+        
+    Returns:
+        Array int32 con la posición de cada hueco o EMPTY_SLOT
+    """
+    table_size = _table_size(len(keys))
+    mask = table_size - 1
+    table = np.full(table_size, EMPTY_SLOT, dtype='<i4')
+    for position, key in enumerate(keys):
+        slot = name_hash(key) & mask
+        while table[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        table[slot] = position
+    return table
+
+
+class _Reader:
+    """Recorre las secciones consecutivas de un buffer"""
+    
+    def __init__(self, buffer, offset: int):
+        self.buffer = buffer
+        self.offset = offset
+    
+    def array(self, dtype: str, count: int) -> np.ndarray:
+        """Vista de NumPy (sin copia) de la siguiente sección"""
+        array = np.frombuffer(self.buffer, dtype=dtype, count=count, offset=self.offset)
+        self.offset += array.nbytes
+        return array
+    
+    def skip(self, length: int) -> int:
+        """Salta un bloque de bytes y devuelve dónde empieza"""
+        start = self.offset
+        self.offset += length
+        return start
+
+
+class _StringTable:
+    """
+    Tabla de textos dentro de un buffer con búsqueda exacta por tabla hash
+    """
+    
+    def __init__(self, buffer, offsets: np.ndarray, table: np.ndarray, start: int):
+        """
+        Crea la vista sobre una tabla ya validada
+        
+        Args:
+            buffer: Buffer de la instantánea
+            offsets: Desplazamientos de cada texto (n + 1 elementos)
+            table: Tabla hash con la posición de cada texto
+            start: Posición del bloque de textos en el buffer
+        """
+        self._buffer = buffer
+        # Vistas para leer elementos sueltos sin crear escalares de NumPy
+        self._offsets = offsets.data
+        self._table = table.data
+        self._mask = len(table) - 1
+        self._start = start
+    
+    def bytes(self, position: int) -> bytes:
+        """Bytes del texto de una posición"""
+        start = self._start
+        return self._buffer[start + self._offsets[position]:start + self._offsets[position + 1]]
+    
+    def string(self, position: int) -> str:
+        """Texto de una posición"""
+        return self.bytes(position).decode('utf-8')
+    
+    def find(self, key: str) -> int:
+        """
+        Busca la posición de un texto exacto
+        
+        Args:
+            key: Texto a buscar
+            
+        Returns:
+            Posición o -1 si no existe
+        """
+        encoded = key.encode('utf-8')
+        buffer = self._buffer
+        table = self._table
+        offsets = self._offsets
+        start = self._start
+        mask = self._mask
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            position = table[slot]
+            if position == EMPTY_SLOT:
+                return -1
+            if buffer[start + offsets[position]:start + offsets[position + 1]] == encoded:
+                return position
+            slot = (slot + 1) & mask
+
+
+class SnapshotTitleIndex:
+    """
+    Índice de títulos guardado dentro de la instantánea
+    
+    Equivale a TitleIndex con la fila de cada juego como valor, pero los
+    títulos normalizados, el tamaño de cada uno y las listas de trigramas
+    viven en el buffer compartido: abrirlo no construye nada en Python.
+    """
+    
+    def __init__(self, buffer, offset: int, threshold: float = 0.8):
+        """
+        Crea la vista sobre el bloque del índice (usar MetacriticSnapshot.title_index)
+        
+        Args:
+            buffer: Buffer de la instantánea
+            offset: Posición del bloque del índice
+            threshold: Similitud mínima (0-1) para aceptar una coincidencia aproximada
+        """
+        self.threshold = threshold
+        count, trigram_count, posting_count, titles_size, trigrams_size, titles_length, _ = (
+            INDEX_HEADER.unpack_from(buffer, offset)
+        )
+        reader = _Reader(buffer, offset + INDEX_HEADER.size)
+        self._rows = reader.array('<i8', count)
+        title_offsets = reader.array('<u8', count + 1)
+        trigram_offsets = reader.array('<u8', trigram_count + 1)
+        self._posting_offsets = reader.array('<u8', trigram_count + 1)
+        self._sizes = reader.array('<i4', count)
+        self._postings = reader.array('<i4', posting_count)
+        title_table = reader.array('<i4', titles_size)
+        trigram_table = reader.array('<i4', trigrams_size)
+        titles_start = reader.skip(titles_length)
+        self._titles = _StringTable(buffer, title_offsets, title_table, titles_start)
+        self._trigrams = _StringTable(buffer, trigram_offsets, trigram_table, reader.offset)
+        self._trigram_count = trigram_count
+    
+    @staticmethod
+    def expected_size(buffer, offset: int) -> int:
+        """Tamaño en bytes del bloque del índice según su cabecera"""
+        count, trigram_count, posting_count, titles_size, trigrams_size, titles_length, trigrams_length = (
+            INDEX_HEADER.unpack_from(buffer, offset)
+        )
+        return (
+            INDEX_HEADER.size + count * 20 + 8 + (trigram_count + 1) * 16 + posting_count * 4
+            + (titles_size + trigrams_size) * 4 + titles_length + trigrams_length
+        )
+    
+    @staticmethod
+    def compile(names: Iterable[str]) -> bytes:
+        """
+        Compila el índice de títulos de los juegos de una instantánea
+        
+        Args:
+            names: Nombre de cada fila, en orden
+            
+        Returns:
+            Contenido del bloque del índice
+        """
+        # Título normalizado -> fila (la primera fila gana en caso de duplicado)
+        entries: Dict[str, int] = {}
+        for row, name in enumerate(names):
+            normalized = normalize_title(name)
+            if normalized and normalized not in entries:
+                entries[normalized] = row
+        titles = list(entries)
+        
+        sizes = np.zeros(len(titles), dtype='<i4')
+        postings: Dict[str, List[int]] = {}
+        for entry_id, normalized in enumerate(titles):
+            trigrams = title_trigrams(normalized)
+            sizes[entry_id] = len(trigrams)
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(entry_id)
+        trigrams = list(postings)
+        
+        rows = np.fromiter(entries.values(), dtype='<i8', count=len(titles))
+        title_offsets, title_bytes = _string_table(titles)
+        trigram_offsets, trigram_bytes = _string_table(trigrams)
+        posting_offsets = np.zeros(len(trigrams) + 1, dtype='<u8')
+        np.cumsum([len(postings[trigram]) for trigram in trigrams], out=posting_offsets[1:])
+        # Cada lista queda ordenada por entrada porque se llenó en ese orden
+        posting_ids = np.fromiter(
+            chain.from_iterable(postings[trigram] for trigram in trigrams),
+            dtype='<i4',
+            count=int(posting_offsets[-1])
+        )
+        title_table = _hash_table(titles)
+        trigram_table = _hash_table(trigrams)
+        
+        header = INDEX_HEADER.pack(
+            len(titles), len(trigrams), len(posting_ids), len(title_table), len(trigram_table),
+            len(title_bytes), len(trigram_bytes)
+        )
+        return b''.join([
+            header,
+            rows.tobytes(),
+            title_offsets.tobytes(),
+            trigram_offsets.tobytes(),
+            posting_offsets.tobytes(),
+            sizes.tobytes(),
+            posting_ids.tobytes(),
+            title_table.tobytes(),
+            trigram_table.tobytes(),
+            title_bytes,
+            trigram_bytes
+        ])
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def lookup(self, title: str) -> Optional[int]:
+        """
+        Busca un título: primero de forma exacta (normalizado) y después aproximada
+        
+        Args:
+            title: Título a buscar
+            
+        Returns:
+            Fila del juego o None si no hay coincidencia suficiente
+        """
+        normalized = normalize_title(title)
+        if not normalized:
+            return None
+        
+        entry_id = self._titles.find(normalized)
+        if entry_id < 0:
+            entry_id = self._fuzzy_match(normalized)
+            if entry_id is None:
+                return None
+        return int(self._rows[entry_id])
+    
+    def _posting_list(self, position: int) -> np.ndarray:
+        """Entradas (ordenadas) que contienen el trigrama de una posición"""
+        offsets = self._posting_offsets
+        return self._postings[int(offsets[position]):int(offsets[position + 1])]
+    
+    def _fuzzy_match(self, normalized: str) -> Optional[int]:
+        """
+        Busca la entrada más parecida por coeficiente de Dice sobre trigramas
+        
+        Mismo criterio que TitleIndex._fuzzy_match: filtro por prefijo con los
+        trigramas menos frecuentes y el solapamiento de los candidatos se
+        cuenta con búsquedas binarias en las listas del buffer.
+        
+        Args:
+            normalized: Título normalizado
+            
+        Returns:
+            Posición de la mejor entrada o None si ninguna supera el umbral
+        """
+        query = title_trigrams(normalized)
+        query_size = len(query)
+        threshold = self.threshold
+        
+        min_overlap = minimum_overlap(query_size, threshold)
+        if min_overlap > query_size:
+            return None
+        
+        # Los trigramas que no aparecen en el índice no aportan candidatos
+        known = []
+        for trigram in query:
+            position = self._trigrams.find(trigram)
+            if position >= 0:
+                known.append(self._posting_list(position))
+        known.sort(key=len)
+        prefix_length = len(known) - min_overlap + 1
+        if prefix_length <= 0:
+            return None
+        candidates = np.unique(np.concatenate(known[:prefix_length]))
+        
+        min_size, max_size = size_bounds(query_size, threshold)
+        sizes = self._sizes[candidates]
+        in_range = (sizes >= min_size) & (sizes <= max_size)
+        candidates = candidates[in_range]
+        sizes = sizes[in_range]
+        if len(candidates) == 0:
+            return None
+        
+        overlap = np.zeros(len(candidates), dtype=np.int64)
+        for entries in known:
+            found = np.minimum(np.searchsorted(entries, candidates), len(entries) - 1)
+            overlap += entries[found] == candidates
+        scores = 2 * overlap / (query_size + sizes)
+        
+        # Ante empates gana la entrada añadida primero (candidates está ordenado)
+        query_numbers = sequel_numbers(normalized)
+        order = np.argsort(-scores, kind='stable')
+        for position in order[scores[order] >= threshold].tolist():
+            entry_id = int(candidates[position])
+            if sequel_numbers(self._titles.string(entry_id)) == query_numbers:
+                return entry_id
+        return None
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Obtiene el tamaño del índice
+        
+        Returns:
+            Diccionario con el número de títulos y de trigramas distintos
+        """
+        return {'titles': len(self._rows), 'trigrams': self._trigram_count}
+
+
+class MetacriticSnapshot:
+    """
+    Vista de solo lectura sobre una instantánea compilada
+    
+    Las columnas de puntuación y duración son arrays de NumPy sobre el propio
+    buffer (sin copias) y los nombres se decodifican solo al pedirlos. La
+    búsqueda exacta usa una tabla hash con direccionamiento abierto y la
+    aproximada el índice de títulos guardado en el propio archivo.
+    """
+    
+    def __init__(
+        self,
+        buffer,
+        csv_hash: bytes,
+        signature: Tuple[int, int],
+        count: int,
+        table_size: int,
+        lengths: Tuple[int, int, int, int]
+    ):
+        """
+        Crea la vista sobre un buffer ya validado (usar open o from_records)
+        """
+        self.csv_hash = csv_hash
+        self.signature = signature
+        self._buffer = buffer
+        self._count = count
+        
+        reader = _Reader(buffer, HEADER.size)
+        self.scores = reader.array('<f8', count)
+        self.durations = reader.array('<f8', count)
+        key_offsets = reader.array('<u8', count + 1)
+        self._name_offsets = reader.array('<u8', count + 1)
+        self._account_offsets = reader.array('<u8', count + 1)
+        table = reader.array('<i4', table_size)
+        keys_length, names_length, accounts_length, index_length = lengths
+        self._index_start = reader.skip(index_length)
+        self._keys = _StringTable(buffer, key_offsets, table, reader.skip(keys_length))
+        self._names_start = reader.skip(names_length)
+        self._accounts_start = reader.skip(accounts_length)
+    
+    @staticmethod
+    def _expected_size(count: int, table_size: int, lengths: Tuple[int, int, int, int]) -> int:
+        """Tamaño en bytes de una instantánea con esas dimensiones"""
+        return HEADER.size + count * 40 + 24 + table_size * 4 + sum(lengths)
+    
+    @classmethod
+    def _from_buffer(
+        cls,
+        buffer,
+        signature: Optional[Tuple[int, int]] = None
+    ) -> Optional['MetacriticSnapshot']:
+        """
+        Valida la cabecera de un buffer y crea la vista
+        
+        Args:
+            buffer: Contenido de la instantánea (bytes o mmap)
+            signature: Firma esperada del CSV (None para no comprobarla)
+            
+        Returns:
+            Vista sobre el buffer o None si no es una instantánea válida
+        """
+        if len(buffer) < HEADER.size:
+            return None
+        magic, csv_hash, mtime_ns, size, count, table_size, *lengths = HEADER.unpack_from(buffer)
+        stored_signature = (mtime_ns, size)
+        if magic != MAGIC or (signature is not None and stored_signature != signature):
+            return None
+        if len(buffer) != cls._expected_size(count, table_size, tuple(lengths)):
+            return None
+        index_length = lengths[-1]
+        index_start = HEADER.size + count * 40 + 24 + table_size * 4
+        if (
+            index_length < INDEX_HEADER.size
+            or SnapshotTitleIndex.expected_size(buffer, index_start) != index_length
+        ):
+            return None
+        return cls(buffer, csv_hash, stored_signature, count, table_size, tuple(lengths))
+    
+    @classmethod
+    def open(cls, path: str, signature: Optional[Tuple[int, int]] = None) -> Optional['MetacriticSnapshot']:
+        """
+        Abre una instantánea con mmap (compartida entre procesos)
+        
+        Args:
+            path: Ruta del archivo
+            signature: Firma esperada del CSV (None para no comprobarla)
+            
+        Returns:
+            Instantánea o None si no existe, está incompleta o es de otro CSV
+        """
+        try:
+            with open(path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size < HEADER.size:
+                    return None
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+        snapshot = cls._from_buffer(buffer, signature)
+        if snapshot is None:
+            buffer.close()
+        return snapshot
+    
+    @staticmethod
+    def compile(records: Iterable[Dict], csv_hash: bytes, signature: Tuple[int, int]) -> bytes:
+        """
+        Compila los juegos en el formato binario de la instantánea
+        
+        Args:
+            records: Juegos con 'name', 'score', 'duration' y 'accounts'
+                (sin nombres repetidos en minúsculas)
+            csv_hash: SHA-256 del CSV de origen
+            signature: Firma (mtime en ns, tamaño) del CSV de origen
+            
+        Returns:
+            Contenido de la instantánea
+        """
+        records = list(records)
+        count = len(records)
+        scores = np.array(
+            [np.nan if record['score'] is None else record['score'] for record in records],
+            dtype='<f8'
+        )
+        durations = np.array(
+            [np.nan if record['duration'] is None else record['duration'] for record in records],
+            dtype='<f8'
+        )
+        lower_names = [record['name'].lower() for record in records]
+        key_offsets, keys = _string_table(lower_names)
+        name_offsets, names = _string_table(record['name'] for record in records)
+        account_offsets, accounts = _string_table(record['accounts'] or '' for record in records)
+        table = _hash_table(lower_names)
+        title_index = SnapshotTitleIndex.compile(record['name'] for record in records)
+        
+        mtime_ns, size = signature
+        header = HEADER.pack(
+            MAGIC, csv_hash, mtime_ns, size, count, len(table),
+            len(keys), len(names), len(accounts), len(title_index)
+        )
+        return b''.join([
+            header,
+            scores.tobytes(),
+            durations.tobytes(),
+            key_offsets.tobytes(),
+            name_offsets.tobytes(),
+            account_offsets.tobytes(),
+            table.tobytes(),
+            title_index,
+            keys,
+            names,
+            accounts
+        ])
+    
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Dict],
+        csv_hash: bytes = bytes(32),
+        signature: Tuple[int, int] = (0, 0)
+    ) -> 'MetacriticSnapshot':
+        """
+        Crea una instantánea en memoria (sin archivo)
+        
+        Args:
+            records: Juegos con 'name', 'score', 'duration' y 'accounts'
+            csv_hash: SHA-256 del CSV de origen
+            signature: Firma (mtime en ns, tamaño) del CSV de origen
+            
+        Returns:
+            Instantánea
+        """
+        return cls._from_buffer(cls.compile(records, csv_hash, signature))
+    
+    @classmethod
+    def write(
+        cls,
+        path: str,
+        records: Iterable[Dict],
+        csv_hash: bytes,
+        signature: Tuple[int, int]
+    ) -> 'MetacriticSnapshot':
+        """
+        Compila y guarda una instantánea y borra las de otros CSV
+        
+        Se escribe en un archivo temporal y se renombra, así que otros
+        procesos nunca abren un archivo a medio escribir.
+        
+        Args:
+            path: Ruta del archivo
+            records: Juegos con 'name', 'score', 'duration' y 'accounts'
+            csv_hash: SHA-256 del CSV de origen
+            signature: Firma (mtime en ns, tamaño) del CSV de origen
+            
+        Returns:
+            Instantánea abierta con mmap
+        """
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(cls.compile(records, csv_hash, signature))
+        os.replace(temp_path, path)
+        
+        # Las instantáneas antiguas ya no sirven (los procesos que aún las
+        # tengan abiertas conservan su mapeo)
+        for old_path in glob.glob(os.path.join(directory, f'{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}')):
+            if os.path.abspath(old_path) != os.path.abspath(path):
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+        
+        return cls.open(path, signature)
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def _string(self, offsets: np.ndarray, start: int, row: int) -> str:
+        """Decodifica el texto de una fila de una tabla de textos"""
+        return self._buffer[start + int(offsets[row]):start + int(offsets[row + 1])].decode('utf-8')
+    
+    def name(self, row: int) -> str:
+        """Nombre original del juego de una fila"""
+        return self._string(self._name_offsets, self._names_start, row)
+    
+    def account(self, row: int) -> str:
+        """Cuentas asociadas al juego de una fila"""
+        return self._string(self._account_offsets, self._accounts_start, row)
+    
+    def record(self, row: int) -> Dict:
+        """
+        Obtiene los datos de una fila con el formato del CSV original
+        
+        Args:
+            row: Número de fila
+            
+        Returns:
+            Diccionario con name, score, duration y accounts
+        """
+        score = float(self.scores[row])
+        duration = float(self.durations[row])
+        return {
+            'name': self.name(row),
+            'score': None if score != score else score,
+            'duration': None if duration != duration else duration,
+            'accounts': self.account(row)
+        }
+    
+    def find(self, key: str) -> int:
+        """
+        Busca la fila de un nombre exacto en minúsculas
+        
+        Args:
+            key: Nombre del juego en minúsculas
+            
+        Returns:
+            Número de fila o -1 si no existe
+        """
+        return self._keys.find(key)
+    
+    def title_index(self, threshold: float = 0.8) -> SnapshotTitleIndex:
+        """
+        Obtiene el índice de títulos de la instantánea (vista sin copias)
+        
+        Args:
+            threshold: Similitud mínima para coincidencias aproximadas
+            
+        Returns:
+            Índice de títulos cuyos valores son números de fila
+        """
+        return SnapshotTitleIndex(self._buffer, self._index_start, threshold)
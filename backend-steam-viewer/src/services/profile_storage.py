@@ -0,0 +1,443 @@
+"""
+Backends de almacenamiento para perfiles buscados y favoritos
+Incluye una implementación TinyDB (JSON) y otra SQLite (WAL) con índices
+"""
+import bisect
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from tinydb import TinyDB, Query
+
+# Rutas de las bases de datos
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+TINYDB_PATH = os.path.join(DATA_DIR, 'profiles.json')
+SQLITE_PATH = os.path.join(DATA_DIR, 'profiles.db')
+
+PROFILE_FIELDS = ('steam_id', 'name', 'avatar', 'searched_at', 'total_games')
+FAVORITE_FIELDS = ('steam_id', 'name', 'avatar', 'added_at')
+# Clave de la versión de los datos en la tabla de metadatos
+DATA_VERSION_KEY = 'data_version'
+
+
+class ProfileStorage(ABC):
+    """Interfaz común de los backends de almacenamiento"""
+    
+    @abstractmethod
+    def get_profiles(self, steam_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Obtiene varios perfiles del historial en una sola consulta
+        
+        Args:
+            steam_ids: Steam IDs a buscar
+        
+        Returns:
+            Diccionario steam_id -> perfil (solo los que existen)
+        """
+    
+    @abstractmethod
+    def save_profiles(self, profiles: List[Dict]):
+        """
+        Guarda un lote de perfiles en una sola escritura
+        Los perfiles existentes solo actualizan searched_at y total_games
+        
+        Args:
+            profiles: Perfiles completos a guardar
+        """
+    
+    @abstractmethod
+    def get_recent_profiles(self, limit: int, cursor: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        """
+        Obtiene los perfiles ordenados por fecha de búsqueda descendente
+        
+        Args:
+            limit: Número máximo de perfiles
+            cursor: Clave (searched_at, steam_id) del último perfil de la página anterior
+        """
+    
+    @abstractmethod
+    def get_favorite(self, steam_id: str) -> Optional[Dict]:
+        """Obtiene un favorito o None si no existe"""
+    
+    @abstractmethod
+    def insert_favorite(self, favorite: Dict):
+        """Inserta un favorito"""
+    
+    @abstractmethod
+    def remove_favorite(self, steam_id: str) -> bool:
+        """Elimina un favorito; devuelve True si existía"""
+    
+    @abstractmethod
+    def get_favorites(self, limit: Optional[int] = None, cursor: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        """
+        Obtiene los favoritos ordenados por fecha de agregado descendente
+        
+        Args:
+            limit: Número máximo de favoritos (None = todos)
+            cursor: Clave (added_at, steam_id) del último favorito de la página anterior
+        """
+    
+    def is_favorite(self, steam_id: str) -> bool:
+        """Verifica si un perfil está en favoritos"""
+        return self.get_favorite(steam_id) is not None
+    
+    def change_token(self) -> int:
+        """
+        Versión de los datos guardados: se guarda junto a ellos y cambia con
+        cada modificación, la haga este proceso u otro
+        (0 si el backend no lo permite saber)
+        """
+        return 0
+    
+    def close(self):
+        """Libera los recursos del backend"""
+
+
+class RecencyIndex:
+    """
+    Índice en memoria ordenado por fecha (campo de fecha + steam_id)
+    Se mantiene sincronizado en cada escritura para leer los k más recientes en O(k)
+    """
+    
+    def __init__(self, date_field: str, records: List[Dict]):
+        """
+        Construye el índice a partir de los registros existentes
+        
+        Args:
+            date_field: Campo de fecha por el que se ordena
+            records: Registros iniciales
+        """
+        self.date_field = date_field
+        self._records: Dict[str, Dict] = {}
+        self._keys: List[Tuple[str, str]] = []
+        for record in records:
+            self._records[record['steam_id']] = dict(record)
+        self._keys = sorted(self._key(record) for record in self._records.values())
+    
+    def _key(self, record: Dict) -> Tuple[str, str]:
+        """Clave de ordenación de un registro"""
+        return (record.get(self.date_field) or '', record['steam_id'])
+    
+    def get(self, steam_id: str) -> Optional[Dict]:
+        """Obtiene un registro por steam_id"""
+        return self._records.get(steam_id)
+    
+    def upsert(self, record: Dict):
+        """Inserta o reemplaza un registro"""
+        self.remove(record['steam_id'])
+        self._records[record['steam_id']] = dict(record)
+        bisect.insort(self._keys, self._key(record))
+    
+    def remove(self, steam_id: str) -> bool:
+        """Elimina un registro; devuelve True si existía"""
+        record = self._records.pop(steam_id, None)
+        if record is None:
+            return False
+        key = self._key(record)
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+        return True
+    
+    def top(self, limit: Optional[int], cursor: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        """
+        Obtiene los registros más recientes
+        
+        Args:
+            limit: Número máximo de registros (None = todos)
+            cursor: Clave (fecha, steam_id) a partir de la cual continuar (exclusiva)
+            
+        Returns:
+            Registros ordenados de más a menos reciente
+        """
+        end = bisect.bisect_left(self._keys, tuple(cursor)) if cursor else len(self._keys)
+        start = 0 if limit is None else max(0, end - limit)
+        return [dict(self._records[steam_id]) for _, steam_id in reversed(self._keys[start:end])]
+
+
+class TinyDBProfileStorage(ProfileStorage):
+    """
+    Backend sobre un archivo JSON de TinyDB
+    Mantiene índices de recencia en memoria para no releer ni ordenar el archivo
+    """
+    
+    def __init__(self, path: str = TINYDB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # TinyDB no es thread-safe y las escrituras diferidas llegan desde otro hilo
+        self._lock = threading.RLock()
+        self.db = TinyDB(path)
+        self.profiles_table = self.db.table('profiles')
+        self.favorites_table = self.db.table('favorites')
+        self.meta_table = self.db.table('meta')
+        self._profiles = RecencyIndex('searched_at', self.profiles_table.all())
+        self._favorites = RecencyIndex('added_at', self.favorites_table.all())
+        # Un solo proceso usa el archivo: basta con leer la versión al abrirlo
+        version = self.meta_table.get(Query().key == DATA_VERSION_KEY)
+        self._version = version['value'] if version else 0
+    
+    def _bump_version(self):
+        """Incrementa la versión guardada de los datos (llamar con el lock)"""
+        self._version += 1
+        self.meta_table.upsert({'key': DATA_VERSION_KEY, 'value': self._version}, Query().key == DATA_VERSION_KEY)
+    
+    def get_profiles(self, steam_ids: List[str]) -> Dict[str, Dict]:
+        with self._lock:
+            profiles = {steam_id: self._profiles.get(steam_id) for steam_id in steam_ids}
+        return {steam_id: dict(profile) for steam_id, profile in profiles.items() if profile}
+    
+    def save_profiles(self, profiles: List[Dict]):
+        Profile = Query()
+        with self._lock:
+            updates = []
+            new_profiles = []
+            for profile in profiles:
+                existing = self._profiles.get(profile['steam_id'])
+                if existing:
+                    changes = {'searched_at': profile['searched_at'], 'total_games': profile['total_games']}
+                    updates.append((changes, Profile.steam_id == profile['steam_id']))
+                    self._profiles.upsert({**existing, **changes})
+                else:
+                    new_profiles.append(profile)
+                    self._profiles.upsert(profile)
+            if updates:
+                self.profiles_table.update_multiple(updates)
+            if new_profiles:
+                self.profiles_table.insert_multiple(new_profiles)
+            self._bump_version()
+    
+    def get_recent_profiles(self, limit: int, cursor: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        with self._lock:
+            return self._profiles.top(limit, cursor)
+    
+    def get_favorite(self, steam_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._favorites.get(steam_id)
+    
+    def insert_favorite(self, favorite: Dict):
+        with self._lock:
+            self.favorites_table.insert(favorite)
+            self._favorites.upsert(favorite)
+            self._bump_version()
+    
+    def remove_favorite(self, steam_id: str) -> bool:
+        Favorite = Query()
+        with self._lock:
+            self.favorites_table.remove(Favorite.steam_id == steam_id)
+            removed = self._favorites.remove(steam_id)
+            if removed:
+                self._bump_version()
+            return removed
+    
+    def get_favorites(self, limit: Optional[int] = None, cursor: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        with self._lock:
+            return self._favorites.top(limit, cursor)
+    
+    def change_token(self) -> int:
+        with self._lock:
+            return self._version
+    
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+
+class SQLiteProfileStorage(ProfileStorage):
+    """
+    Backend SQLite en modo WAL
+    Índice único en steam_id e índices de recencia (fecha, steam_id)
+    """
+    
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS profiles ('
+        '  steam_id TEXT NOT NULL,'
+        '  name TEXT,'
+        '  avatar TEXT,'
+        '  searched_at TEXT,'
+        '  total_games INTEGER DEFAULT 0'
+        ')',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_profiles_steam_id ON profiles (steam_id)',
+        'CREATE INDEX IF NOT EXISTS idx_profiles_recency ON profiles (searched_at, steam_id)',
+        'CREATE TABLE IF NOT EXISTS favorites ('
+        '  steam_id TEXT NOT NULL,'
+        '  name TEXT,'
+        '  avatar TEXT,'
+        '  added_at TEXT'
+        ')',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_favorites_steam_id ON favorites (steam_id)',
+        'CREATE INDEX IF NOT EXISTS idx_favorites_recency ON favorites (added_at, steam_id)',
+        'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)',
+        f"INSERT OR IGNORE INTO meta (key, value) VALUES ('{DATA_VERSION_KEY}', 0)",
+    ) + tuple(
+        # Versión de los datos: la incrementa cualquier conexión que los modifique
+        f'CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version AFTER {event} ON {table} '
+        f"BEGIN UPDATE meta SET value = value + 1 WHERE key = '{DATA_VERSION_KEY}'; END"
+        for table in ('profiles', 'favorites')
+        for event in ('INSERT', 'UPDATE', 'DELETE')
+    )
+    # Parámetros por consulta IN (SQLite antiguo admite como máximo 999)
+    MAX_QUERY_PARAMS = 500
+    
+    def __init__(self, path: str = SQLITE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+    
+    def get_profiles(self, steam_ids: List[str]) -> Dict[str, Dict]:
+        profiles = {}
+        steam_ids = list(steam_ids)
+        with self._lock:
+            for start in range(0, len(steam_ids), self.MAX_QUERY_PARAMS):
+                chunk = steam_ids[start:start + self.MAX_QUERY_PARAMS]
+                rows = self._conn.execute(
+                    f'SELECT * FROM profiles WHERE steam_id IN ({", ".join("?" * len(chunk))})', chunk
+                ).fetchall()
+                profiles.update((row['steam_id'], dict(row)) for row in rows)
+        return profiles
+    
+    def save_profiles(self, profiles: List[Dict]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f'INSERT INTO profiles ({", ".join(PROFILE_FIELDS)}) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (steam_id) DO UPDATE SET '
+                'searched_at = excluded.searched_at, total_games = excluded.total_games',
+                [[profile.get(field) for field in PROFILE_FIELDS] for profile in profiles]
+            )
+    
+    def _select_recent(self, table: str, date_field: str, limit: Optional[int],
+                       cursor: Optional[Tuple[str, str]]) -> List[Dict]:
+        """Recorre el índice de recencia de una tabla desde el cursor indicado"""
+        query = f'SELECT * FROM {table}'
+        params: List = []
+        if cursor:
+            query += f' WHERE ({date_field}, steam_id) < (?, ?)'
+            params.extend(cursor)
+        query += f' ORDER BY {date_field} DESC, steam_id DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [dict(row) for row in rows]
+    
+    def get_recent_profiles(self, limit: int, cursor: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        return self._select_recent('profiles', 'searched_at', limit, cursor)
+    
+    def get_favorite(self, steam_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM favorites WHERE steam_id = ?', (steam_id,)
+            ).fetchone()
+        return dict(row) if row else None
+    
+    def insert_favorite(self, favorite: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f'INSERT OR IGNORE INTO favorites ({", ".join(FAVORITE_FIELDS)}) VALUES (?, ?, ?, ?)',
+                [favorite.get(field) for field in FAVORITE_FIELDS]
+            )
+    
+    def remove_favorite(self, steam_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute('DELETE FROM favorites WHERE steam_id = ?', (steam_id,))
+        return cursor.rowcount > 0
+    
+    def get_favorites(self, limit: Optional[int] = None, cursor: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        return self._select_recent('favorites', 'added_at', limit, cursor)
+    
+    def import_records(self, profiles: List[Dict], favorites: List[Dict]):
+        """
+        Inserta en bloque perfiles y favoritos en una sola transacción
+        
+        Args:
+            profiles: Perfiles del historial
+            favorites: Perfiles favoritos
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO profiles ({", ".join(PROFILE_FIELDS)}) VALUES (?, ?, ?, ?, ?)',
+                [[profile.get(field) for field in PROFILE_FIELDS] for profile in profiles]
+            )
+            self._conn.executemany(
+                f'INSERT OR REPLACE INTO favorites ({", ".join(FAVORITE_FIELDS)}) VALUES (?, ?, ?, ?)',
+                [[favorite.get(field) for field in FAVORITE_FIELDS] for favorite in favorites]
+            )
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        """Lee un valor de la tabla de metadatos"""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key: str, value: str):
+        """Guarda un valor en la tabla de metadatos"""
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+    
+    def change_token(self) -> int:
+        # Los triggers la incrementan en la misma transacción que cada escritura
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (DATA_VERSION_KEY,)).fetchone()
+        return int(row[0]) if row else 0
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def migrate_tinydb_to_sqlite(tinydb_path: str, sqlite_storage: SQLiteProfileStorage) -> Dict:
+    """
+    Copia el historial y los favoritos de TinyDB a SQLite
+    
+    Args:
+        tinydb_path: Ruta del archivo JSON de TinyDB
+        sqlite_storage: Backend SQLite de destino
+    
+    Returns:
+        Número de perfiles y favoritos migrados
+    """
+    source = TinyDB(tinydb_path)
+    try:
+        profiles = source.table('profiles').all()
+        favorites = source.table('favorites').all()
+    finally:
+        source.close()
+    
+    profiles = [profile for profile in profiles if profile.get('steam_id')]
+    favorites = [favorite for favorite in favorites if favorite.get('steam_id')]
+    sqlite_storage.import_records(profiles, favorites)
+    sqlite_storage.set_meta('tinydb_migrated', '1')
+    
+    return {'profiles': len(profiles), 'favorites': len(favorites)}
+
+
+def create_storage(backend: str) -> ProfileStorage:
+    """
+    Crea el backend de almacenamiento configurado
+    
+    Con SQLite, si existe un archivo de TinyDB que aún no se ha migrado,
+    sus datos se importan automáticamente una única vez.
+    
+    Args:
+        backend: 'sqlite' o 'tinydb'
+    
+    Returns:
+        Instancia del backend
+    """
+    if backend == 'tinydb':
+        return TinyDBProfileStorage()
+    if backend != 'sqlite':
+        raise ValueError(f"Backend de base de datos desconocido: {backend}")
+    
+    storage = SQLiteProfileStorage()
+    if os.path.exists(TINYDB_PATH) and not storage.get_meta('tinydb_migrated'):
+        result = migrate_tinydb_to_sqlite(TINYDB_PATH, storage)
+        print(f"Migrados desde TinyDB: {result['profiles']} perfiles, {result['favorites']} favoritos")
+    return storage
@@ -1,19 +1,32 @@
 """
 Servicio para interactuar con la API de Steam
 """
-import requests
-from datetime import datetime
-from typing import List, Dict, Optional
+import asyncio
+import time
+from typing import Any, Callable, List, Dict, Optional, Set, Tuple
 from src.config.config import Config
+from src.services.cache_service import response_cache
+from src.services.game_record import GameRecord
+from src.services.http_client import steam_http_client
+from src.services.steamspy_store import steamspy_store
+
+# Refrescos de SteamSpy en segundo plano (evita lanzar dos para el mismo appid)
+_steamspy_refreshing: Set[int] = set()
+_background_tasks: Set[asyncio.Task] = set()
+
+
+class SteamUpstreamError(Exception):
+    """Steam no respondió correctamente (error de red, HTTP o respuesta inválida)"""
 
 
 class SteamService:
     """Servicio para obtener datos de Steam API"""
     
     @staticmethod
-    def get_owned_games(steam_id: str) -> List[Dict]:
+    async def get_owned_games(steam_id: str) -> List[Dict]:
         """
         Obtiene todos los juegos de una cuenta de Steam usando la API oficial
+        Las respuestas se cachean durante Config.CACHE_TTL_OWNED_GAMES segundos
         
         Args:
             steam_id: Steam ID del usuario
@@ -21,6 +34,16 @@ class SteamService:
         Returns:
             Lista de juegos con su información
         """
+        return await response_cache.get_or_fetch(
+            'owned_games',
+            steam_id,
+            lambda: SteamService._fetch_owned_games(steam_id),
+            Config.CACHE_TTL_OWNED_GAMES
+        )
+    
+    @staticmethod
+    async def _fetch_owned_games(steam_id: str) -> List[Dict]:
+        """Descarga los juegos de una cuenta desde la API de Steam (sin caché)"""
         params = {
             'key': Config.STEAM_API_KEY,
             'steamid': steam_id,
@@ -30,12 +53,10 @@ class SteamService:
         }
         
         try:
-            response = requests.get(
+            data = await steam_http_client.get_json(
                 Config.STEAM_OWNED_GAMES_URL,
-                params=params,
-                timeout=Config.REQUEST_TIMEOUT
+                params=params
             )
-            data = response.json()
             
             if 'response' in data and 'games' in data['response']:
                 return data['response']['games']
@@ -45,9 +66,10 @@ class SteamService:
             return []
     
     @staticmethod
-    def get_player_summary(steam_id: str) -> Optional[Dict]:
+    async def get_player_summary(steam_id: str) -> Optional[Dict]:
         """
         Obtiene información del perfil del jugador
+        Las respuestas se cachean durante Config.CACHE_TTL_PLAYER_SUMMARY segundos
         
         Args:
             steam_id: Steam ID del usuario
@@ -55,95 +77,369 @@ class SteamService:
         Returns:
             Información del perfil o None si hay error
         """
+        return await response_cache.get_or_fetch(
+            'player_summary',
+            steam_id,
+            lambda: SteamService._fetch_player_summary(steam_id),
+            Config.CACHE_TTL_PLAYER_SUMMARY
+        )
+    
+    @staticmethod
+    async def _fetch_player_summary(steam_id: str) -> Optional[Dict]:
+        """Descarga el perfil del jugador desde la API de Steam (sin caché)"""
+        players = await SteamService._fetch_player_summaries_chunk([steam_id])
+        return players[0] if players else None
+    
+    @staticmethod
+    async def _fetch_player_summaries_chunk(steam_ids: List[str]) -> List[Dict]:
+        """
+        Descarga hasta Config.PLAYER_SUMMARIES_BATCH_SIZE perfiles en una sola petición
+        
+        Args:
+            steam_ids: Steam IDs a consultar
+            
+        Returns:
+            Lista de perfiles encontrados (vacía si hay error)
+        """
         params = {
             'key': Config.STEAM_API_KEY,
-            'steamids': steam_id,
+            'steamids': ','.join(steam_ids),
             'format': 'json'
         }
         
         try:
-            response = requests.get(
+            data = await steam_http_client.get_json(
                 Config.STEAM_PLAYER_SUMMARY_URL,
-                params=params,
-                timeout=Config.REQUEST_TIMEOUT
+                params=params
             )
-            data = response.json()
             
-            if 'response' in data and 'players' in data['response'] and data['response']['players']:
-                return data['response']['players'][0]
-            return None
+            if 'response' in data and 'players' in data['response']:
+                return data['response']['players']
+            return []
         except Exception as e:
-            print(f"Error obteniendo perfil: {e}")
-            return None
+            print(f"Error obteniendo perfiles: {e}")
+            return []
+    
+    @staticmethod
+    async def get_player_summaries(steam_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Obtiene los perfiles de varios jugadores
+        
+        Los perfiles cacheados no se vuelven a pedir; el resto se agrupa en
+        lotes de Config.PLAYER_SUMMARIES_BATCH_SIZE (máximo de GetPlayerSummaries)
+        que se descargan en paralelo.
+        
+        Args:
+            steam_ids: Steam IDs de los usuarios
+            
+        Returns:
+            Diccionario steam_id -> perfil (solo los perfiles encontrados)
+        """
+        players: Dict[str, Dict] = {}
+        missing: List[str] = []
+        for steam_id in dict.fromkeys(steam_ids):
+            cached = response_cache.get('player_summary', steam_id)
+            if cached is not None:
+                players[steam_id] = cached
+            else:
+                missing.append(steam_id)
+        
+        batch_size = Config.PLAYER_SUMMARIES_BATCH_SIZE
+        chunks = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        results = await asyncio.gather(
+            *(SteamService._fetch_player_summaries_chunk(chunk) for chunk in chunks)
+        )
+        
+        for chunk_players in results:
+            for player in chunk_players:
+                steam_id = player.get('steamid')
+                if steam_id:
+                    players[steam_id] = player
+                    response_cache.set('player_summary', steam_id, player, Config.CACHE_TTL_PLAYER_SUMMARY)
+        
+        return players
     
     @staticmethod
-    def get_game_details_steamspy(appid: int) -> Dict:
+    async def get_library_and_player(steam_id: str) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Obtiene los juegos y el perfil del jugador de forma concurrente
+        
+        Ambas peticiones comparten un mismo plazo (Config.STEAM_FETCH_DEADLINE).
+        Si no se pueden obtener los juegos se cancela la petición del perfil,
+        ya que el endpoint fallará de todos modos.
+        
+        Args:
+            steam_id: Steam ID del usuario
+            
+        Returns:
+            Tupla (juegos, perfil); ([], None) si se agota el plazo
+        """
+        games_task = asyncio.ensure_future(SteamService.get_owned_games(steam_id))
+        player_task = asyncio.ensure_future(SteamService.get_player_summary(steam_id))
+        
+        async def gather_results():
+            games = await games_task
+            if not games:
+                player_task.cancel()
+                return games, None
+            return games, await player_task
+        
+        try:
+            return await asyncio.wait_for(gather_results(), timeout=Config.STEAM_FETCH_DEADLINE)
+        except asyncio.TimeoutError:
+            print(f"Tiempo agotado obteniendo datos de Steam para {steam_id}")
+            return [], None
+        finally:
+            for task in (games_task, player_task):
+                if not task.done():
+                    task.cancel()
+    
+    @staticmethod
+    async def get_game_details_steamspy(appid: int) -> Dict:
         """
         Obtiene detalles adicionales del juego desde SteamSpy
         
+        Orden de consulta: caché en memoria (Config.CACHE_TTL_STEAMSPY),
+        almacén persistente en disco y, por último, la API de SteamSpy.
+        Si los datos en disco están obsoletos se devuelven igualmente y se
+        refrescan en segundo plano (stale-while-revalidate).
+        
         Args:
             appid: App ID del juego
             
         Returns:
             Detalles del juego o diccionario vacío si hay error
         """
+        return await response_cache.get_or_fetch(
+            'steamspy_appdetails',
+            appid,
+            lambda: SteamService._get_stored_game_details(appid),
+            Config.CACHE_TTL_STEAMSPY
+        )
+    
+    @staticmethod
+    def game_details_etag(appid: int) -> Optional[str]:
+        """ETag de los detalles de un juego en caché (None si no están en memoria)"""
+        return response_cache.get_etag('steamspy_appdetails', appid)
+    
+    @staticmethod
+    async def _get_stored_game_details(appid: int) -> Dict:
+        """Lee los detalles del almacén persistente, descargándolos si no existen"""
+        stored = await asyncio.to_thread(steamspy_store.get, appid)
+        if stored is None:
+            details = await SteamService._fetch_game_details_steamspy(appid)
+            if details:
+                await asyncio.to_thread(steamspy_store.put, appid, details)
+            return details
+        
+        details, fetched_at = stored
+        if time.time() - fetched_at > Config.STEAMSPY_STALE_AFTER and appid not in _steamspy_refreshing:
+            _steamspy_refreshing.add(appid)
+            task = asyncio.ensure_future(SteamService._refresh_game_details(appid))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return details
+    
+    @staticmethod
+    async def _refresh_game_details(appid: int):
+        """Vuelve a descargar los detalles de un juego y actualiza disco y memoria"""
+        try:
+            details = await SteamService._fetch_game_details_steamspy(appid)
+            if details:
+                await asyncio.to_thread(steamspy_store.put, appid, details)
+                response_cache.set('steamspy_appdetails', appid, details, Config.CACHE_TTL_STEAMSPY)
+        finally:
+            _steamspy_refreshing.discard(appid)
+    
+    @staticmethod
+    async def prefetch_steamspy_details(
+        appids: List[int],
+        concurrency: int = 4,
+        force: bool = False
+    ) -> Dict:
+        """
+        Descarga y guarda en disco los detalles de SteamSpy de varios juegos
+        Respeta el límite de Config.STEAMSPY_REQUESTS_PER_SECOND
+        
+        Args:
+            appids: App IDs a descargar
+            concurrency: Número máximo de peticiones simultáneas
+            force: Si descargar también los juegos que ya están al día
+            
+        Returns:
+            Diccionario con el número de juegos descargados, omitidos y fallidos
+        """
+        if force:
+            pending = list(appids)
+        else:
+            pending = await asyncio.to_thread(steamspy_store.get_pending, appids, Config.STEAMSPY_STALE_AFTER)
+        interval = 1 / Config.STEAMSPY_REQUESTS_PER_SECOND if Config.STEAMSPY_REQUESTS_PER_SECOND > 0 else 0
+        queue: asyncio.Queue = asyncio.Queue()
+        for appid in pending:
+            queue.put_nowait(appid)
+        
+        result = {'requested': len(appids), 'skipped': len(appids) - len(pending), 'fetched': 0, 'failed': 0}
+        schedule = {'next_slot': time.monotonic()}
+        
+        async def worker():
+            while not queue.empty():
+                appid = queue.get_nowait()
+                # Reservar el siguiente hueco libre según el límite de peticiones
+                now = time.monotonic()
+                slot = max(now, schedule['next_slot'])
+                schedule['next_slot'] = slot + interval
+                if slot > now:
+                    await asyncio.sleep(slot - now)
+                
+                details = await SteamService._fetch_game_details_steamspy(appid)
+                if details:
+                    await asyncio.to_thread(steamspy_store.put, appid, details)
+                    result['fetched'] += 1
+                else:
+                    result['failed'] += 1
+        
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        return result
+    
+    @staticmethod
+    async def _fetch_game_details_steamspy(appid: int) -> Dict:
+        """Descarga los detalles de un juego desde SteamSpy (sin caché)"""
         try:
             params = {
                 'request': 'appdetails',
                 'appid': appid
             }
-            response = requests.get(
+            return await steam_http_client.get_json(
                 Config.STEAMSPY_API_URL,
                 params=params,
-                timeout=5
+                timeout=Config.STEAMSPY_TIMEOUT
             )
-            return response.json()
         except Exception as e:
             print(f"Error obteniendo detalles de SteamSpy para {appid}: {e}")
             return {}
     
     @staticmethod
-    def process_games_data(games: List[Dict]) -> List[Dict]:
+    def process_games_data(games: List[Dict]) -> List[GameRecord]:
         """
         Procesa la lista de juegos raw de la API y devuelve datos formateados
         
+        Los juegos se devuelven como GameRecord (de solo lectura, con acceso
+        como diccionario): las horas, la fecha de última partida y las URLs
+        de imagen se calculan al leerlos.
+        
         Args:
             games: Lista de juegos raw de la API
             
         Returns:
-            Lista de juegos procesados con información adicional
+            Lista de juegos procesados ordenada por horas jugadas
+        """
+        games_list = [GameRecord.from_api(game) for game in games]
+        
+        # Ordenar por horas jugadas
+        games_list.sort(key=lambda x: x.playtime_hours, reverse=True)
+        
+        return games_list
+    
+    @staticmethod
+    async def get_owned_games_many(
+        steam_ids: List[str],
+        concurrency: int,
+        on_progress: Optional[Callable[[int, int], Any]] = None
+    ) -> Dict[str, List[Dict]]:
         """
-        games_list = []
+        Obtiene las bibliotecas de varios usuarios en paralelo
         
-        for game in games:
-            playtime_hours = game.get('playtime_forever', 0) / 60
-            playtime_2weeks = game.get('playtime_2weeks', 0) / 60 if 'playtime_2weeks' in game else 0
+        Args:
+            steam_ids: Steam IDs de los usuarios
+            concurrency: Número máximo de peticiones simultáneas
+            on_progress: Función opcional que recibe (bibliotecas obtenidas, total)
             
-            # Calcular última vez jugado
-            last_played = game.get('rtime_last_played', 0)
-            if last_played > 0:
-                last_played_str = datetime.fromtimestamp(last_played).strftime('%Y-%m-%d %H:%M')
-            else:
-                last_played_str = 'Nunca'
+        Returns:
+            Diccionario steam_id -> lista de juegos raw (vacía si hubo error)
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        unique_ids = list(dict.fromkeys(steam_ids))
+        completed = 0
+        
+        async def fetch(steam_id: str) -> List[Dict]:
+            nonlocal completed
+            async with semaphore:
+                games = await SteamService.get_owned_games(steam_id)
+            completed += 1
+            if on_progress is not None:
+                on_progress(completed, len(unique_ids))
+            return games
+        
+        results = await asyncio.gather(*(fetch(steam_id) for steam_id in unique_ids))
+        return dict(zip(unique_ids, results))
+    
+    @staticmethod
+    def aggregate_libraries(libraries: Dict[str, List[Dict]]) -> Dict:
+        """
+        Combina varias bibliotecas procesadas en una vista conjunta (una sola pasada)
+        
+        Args:
+            libraries: Diccionario steam_id -> juegos procesados por process_games_data
             
-            appid = game['appid']
-            img_icon_url = game.get('img_icon_url', '')
-            img_logo_url = game.get('img_logo_url', '')
+        Returns:
+            Diccionario con los juegos combinados (propietarios y horas totales),
+            estadísticas por perfil y tamaños de la unión y la intersección
+        """
+        games: Dict[int, Dict] = {}
+        profiles = {}
+        
+        for steam_id, games_list in libraries.items():
+            profile_hours = 0.0
+            for game in games_list:
+                appid = game['appid']
+                playtime = game['playtime_hours']
+                profile_hours += playtime
+                
+                entry = games.get(appid)
+                if entry is None:
+                    entry = games[appid] = {
+                        'appid': appid,
+                        'name': game['name'],
+                        'img_icon_url': game['img_icon_url'],
+                        'owners': [],
+                        'owner_count': 0,
+                        'total_playtime_hours': 0.0,
+                        'played_by': 0
+                    }
+                entry['owners'].append(steam_id)
+                entry['owner_count'] += 1
+                entry['total_playtime_hours'] += playtime
+                if playtime > 0:
+                    entry['played_by'] += 1
             
-            games_list.append({
-                'appid': appid,
-                'name': game.get('name', f"AppID {appid}"),
-                'playtime_hours': round(playtime_hours, 1),
-                'playtime_2weeks': round(playtime_2weeks, 1),
-                'last_played': last_played_str,
-                'img_icon_url': f"https://media.steampowered.com/steamcommunity/public/images/apps/{appid}/{img_icon_url}.jpg" if img_icon_url else '',
-                'img_logo_url': f"https://media.steampowered.com/steamcommunity/public/images/apps/{appid}/{img_logo_url}.jpg" if img_logo_url else ''
-            })
+            profiles[steam_id] = {
+                'total_games': len(games_list),
+                'total_hours': round(profile_hours, 1)
+            }
         
-        # Ordenar por horas jugadas
-        games_list.sort(key=lambda x: x['playtime_hours'], reverse=True)
+        library_count = len(libraries)
+        intersection = []
+        for entry in games.values():
+            entry['total_playtime_hours'] = round(entry['total_playtime_hours'], 1)
+            if entry['owner_count'] == library_count:
+                intersection.append(entry['appid'])
         
-        return games_list
+        combined = sorted(
+            games.values(),
+            key=lambda x: (x['owner_count'], x['total_playtime_hours']),
+            reverse=True
+        )
+        
+        return {
+            'profiles': profiles,
+            'games': combined,
+            'stats': {
+                'libraries': library_count,
+                'union_count': len(games),
+                'intersection_count': len(intersection),
+                'intersection': intersection
+            }
+        }
     
     @staticmethod
     def calculate_statistics(games_list: List[Dict]) -> Dict:
@@ -156,9 +452,10 @@ class SteamService:
         Returns:
             Diccionario con estadísticas
         """
-        total_games = len(games_list)
-        total_hours = sum(g['playtime_hours'] for g in games_list)
-        games_played = len([g for g in games_list if g['playtime_hours'] > 0])
+        hours = [g['playtime_hours'] for g in games_list]
+        total_games = len(hours)
+        total_hours = sum(hours)
+        games_played = len([h for h in hours if h > 0])
         
         return {
             'total_games': total_games,
@@ -169,111 +466,190 @@ class SteamService:
         }
     
     @staticmethod
-    def get_wishlist(steam_id: str) -> List[Dict]:
+    async def get_wishlist(steam_id: str) -> List[Dict]:
         """
         Obtiene la lista de deseados (wishlist) de un usuario de Steam
         Usa el endpoint público de Steam Store (no requiere API key)
+        La wishlist completa se cachea durante Config.CACHE_TTL_WISHLIST segundos
         
         Args:
             steam_id: Steam ID del usuario
             
         Returns:
-            Lista de juegos en la wishlist con su información
+            Lista de juegos en la wishlist con su información (vacía si la
+            wishlist es privada o no tiene juegos)
+            
+        Raises:
+            SteamUpstreamError: Si falla alguna página (no se cachea)
+        """
+        return await response_cache.get_or_fetch(
+            'wishlist',
+            steam_id,
+            lambda: SteamService._fetch_wishlist(steam_id),
+            Config.CACHE_TTL_WISHLIST
+        )
+    
+    @staticmethod
+    def wishlist_etag(steam_id: str) -> Optional[str]:
+        """ETag de la wishlist en caché (None si no está en memoria)"""
+        return response_cache.get_etag('wishlist', steam_id)
+    
+    @staticmethod
+    def _wishlist_headers(steam_id: str) -> Dict[str, str]:
+        """Cabeceras de navegador para el endpoint de wishlist de Steam Store"""
+        # Headers completos para simular un navegador real
+        # (sin cabeceras de conexión: el pool compartido gestiona keep-alive y HTTP/2)
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept': 'application/json, text/javascript, */*; q=0.01',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate',
+            'Referer': f'{Config.STEAM_STORE_BASE_URL}/wishlist/profiles/{steam_id}/',
+            'X-Requested-With': 'XMLHttpRequest',
+            'Sec-Fetch-Dest': 'empty',
+            'Sec-Fetch-Mode': 'cors',
+            'Sec-Fetch-Site': 'same-origin'
+        }
+        
+        # Cookies básicas de Steam para contenido mature
+        cookies = {
+            'wants_mature_content': '1',
+            'birthtime': '283996801',  # Jan 1, 1979
+            'lastagecheckage': '1-0-1979',
+            'sessionid': 'placeholder',  # Placeholder, Steam a veces funciona sin esto
+        }
+        headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in cookies.items())
+        return headers
+    
+    @staticmethod
+    async def _fetch_wishlist_page(steam_id: str, page: int, headers: Dict[str, str]) -> Optional[Dict]:
+        """
+        Descarga una página de la wishlist (Config.WISHLIST_PAGE_SIZE juegos)
+        
+        Args:
+            steam_id: Steam ID del usuario
+            page: Número de página (desde 0)
+            headers: Cabeceras de la petición
+            
+        Returns:
+            Diccionario appid -> datos del juego (vacío si la página no tiene
+            juegos o la wishlist es privada), o None si hay error
         """
         # Endpoint público de Steam para wishlist
-        url = f'https://store.steampowered.com/wishlist/profiles/{steam_id}/wishlistdata/'
+        url = f'{Config.STEAM_STORE_BASE_URL}/wishlist/profiles/{steam_id}/wishlistdata/'
         
         try:
-            # Headers completos para simular un navegador real
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'application/json, text/javascript, */*; q=0.01',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Referer': f'https://store.steampowered.com/wishlist/profiles/{steam_id}/',
-                'X-Requested-With': 'XMLHttpRequest',
-                'Sec-Fetch-Dest': 'empty',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Site': 'same-origin'
-            }
-            
-            # Cookies básicas de Steam para contenido mature
-            cookies = {
-                'wants_mature_content': '1',
-                'birthtime': '283996801',  # Jan 1, 1979
-                'lastagecheckage': '1-0-1979',
-                'sessionid': 'placeholder',  # Placeholder, Steam a veces funciona sin esto
-            }
-            
-            session = requests.Session()
-            session.headers.update(headers)
-            session.cookies.update(cookies)
-            
-            response = session.get(url, timeout=10)
-            
-            if response.status_code != 200:
-                print(f"Error HTTP {response.status_code} al obtener wishlist")
-                return []
-            
-            # Verificar si es HTML (wishlist privada o perfil inválido)
-            content_type = response.headers.get('Content-Type', '')
-            if 'html' in content_type.lower():
-                print(f"Wishlist privada o requiere autenticación (recibido HTML). Steam ID: {steam_id}")
-                return []
-            
-            # Intentar parsear JSON
-            try:
-                data = response.json()
-            except ValueError as e:
-                print(f"Error parseando JSON de wishlist: {e}")
-                # Verificar si la respuesta está vacía
-                if not response.text or response.text.strip() in ('[]', '{}', ''):
-                    print("Wishlist vacía")
-                    return []
-                return []
-            
-            # Verificar si el JSON está vacío
-            if not data or len(data) == 0:
-                print(f"Wishlist vacía para Steam ID: {steam_id}")
-                return []
-            
-            # Convertir el diccionario a lista
-            wishlist_games = []
-            for appid, game_data in data.items():
-                wishlist_game = {
-                    'appid': int(appid),
-                    'name': game_data.get('name', ''),
-                    'capsule': game_data.get('capsule', ''),
-                    'review_score': game_data.get('review_score', 0),
-                    'review_desc': game_data.get('review_desc', ''),
-                    'reviews_total': game_data.get('reviews_total', '0'),
-                    'reviews_percent': game_data.get('reviews_percent', 0),
-                    'release_date': game_data.get('release_date', 0),
-                    'release_string': game_data.get('release_string', ''),
-                    'platform_icons': game_data.get('platform_icons', ''),
-                    'subs': game_data.get('subs', []),
-                    'type': game_data.get('type', 'game'),
-                    'screenshots': game_data.get('screenshots', []),
-                    'review_css': game_data.get('review_css', ''),
-                    'priority': game_data.get('priority', 0),
-                    'added': game_data.get('added', 0),
-                    'background': game_data.get('background', ''),
-                    'rank': game_data.get('rank', 0),
-                    'tags': game_data.get('tags', []),
-                    'is_free_game': game_data.get('is_free_game', False),
-                    'win': game_data.get('win', 0),
-                    'mac': game_data.get('mac', 0),
-                    'linux': game_data.get('linux', 0)
-                }
-                wishlist_games.append(wishlist_game)
-            
-            # Ordenar por prioridad (menor número = mayor prioridad)
-            wishlist_games.sort(key=lambda x: x.get('priority', 999))
+            response = await steam_http_client.get(url, params={'p': page}, headers=headers, timeout=10)
+        except Exception as e:
+            print(f"Error obteniendo la página {page} de la wishlist: {e}")
+            return None
+        
+        if response.status_code != 200:
+            print(f"Error HTTP {response.status_code} al obtener wishlist (página {page})")
+            return None
+        
+        # Verificar si es HTML (wishlist privada o perfil inválido)
+        content_type = response.headers.get('Content-Type', '')
+        if 'html' in content_type.lower():
+            print(f"Wishlist privada o requiere autenticación (recibido HTML). Steam ID: {steam_id}")
+            return {}
+        
+        # Intentar parsear JSON
+        try:
+            data = response.json()
+        except ValueError as e:
+            # Respuesta vacía: no hay más juegos
+            if not response.text or response.text.strip() in ('[]', '{}', ''):
+                return {}
+            print(f"Error parseando JSON de wishlist (página {page}): {e}")
+            return None
+        
+        # Steam devuelve [] en las páginas sin juegos
+        if not data or not isinstance(data, dict):
+            return {}
+        return data
+    
+    @staticmethod
+    async def _fetch_wishlist(steam_id: str) -> List[Dict]:
+        """
+        Descarga la wishlist completa desde Steam Store (sin caché)
+        
+        Steam pagina la wishlist (?p=N). Tras la primera página, si está
+        completa, las siguientes se piden en bloques de
+        Config.WISHLIST_PAGE_CONCURRENCY páginas en paralelo hasta encontrar
+        una incompleta o vacía. Si falla alguna página se lanza
+        SteamUpstreamError para no mostrar (ni cachear) una wishlist truncada.
+        
+        Args:
+            steam_id: Steam ID del usuario
             
-            print(f"Wishlist obtenida exitosamente: {len(wishlist_games)} juegos")
-            return wishlist_games
+        Returns:
+            Lista de juegos en la wishlist ordenada por prioridad
             
-        except Exception as e:
-            print(f"Error obteniendo wishlist: {e}")
+        Raises:
+            SteamUpstreamError: Si falla alguna página
+        """
+        headers = SteamService._wishlist_headers(steam_id)
+        page_size = Config.WISHLIST_PAGE_SIZE
+        
+        first_page = await SteamService._fetch_wishlist_page(steam_id, 0, headers)
+        if first_page is None:
+            raise SteamUpstreamError('Steam no devolvió la primera página de la wishlist')
+        if not first_page:
+            print(f"Wishlist vacía para Steam ID: {steam_id}")
             return []
+        
+        data = dict(first_page)
+        next_page = 1
+        last_page_full = len(first_page) >= page_size
+        while last_page_full and next_page < Config.WISHLIST_MAX_PAGES:
+            pages = range(next_page, min(next_page + max(1, Config.WISHLIST_PAGE_CONCURRENCY), Config.WISHLIST_MAX_PAGES))
+            results = await asyncio.gather(
+                *(SteamService._fetch_wishlist_page(steam_id, page, headers) for page in pages)
+            )
+            failed = [page for page, result in zip(pages, results) if result is None]
+            if failed:
+                print(f"Wishlist incompleta para Steam ID: {steam_id}")
+                raise SteamUpstreamError(f'Steam no devolvió la página {failed[0]} de la wishlist')
+            for result in results:
+                data.update(result)
+                last_page_full = len(result) >= page_size
+                if not last_page_full:
+                    break
+            next_page = pages.stop
+        
+        # Convertir el diccionario a lista
+        wishlist_games = []
+        for appid, game_data in data.items():
+            wishlist_game = {
+                'appid': int(appid),
+                'name': game_data.get('name', ''),
+                'capsule': game_data.get('capsule', ''),
+                'review_score': game_data.get('review_score', 0),
+                'review_desc': game_data.get('review_desc', ''),
+                'reviews_total': game_data.get('reviews_total', '0'),
+                'reviews_percent': game_data.get('reviews_percent', 0),
+                'release_date': game_data.get('release_date', 0),
+                'release_string': game_data.get('release_string', ''),
+                'platform_icons': game_data.get('platform_icons', ''),
+                'subs': game_data.get('subs', []),
+                'type': game_data.get('type', 'game'),
+                'screenshots': game_data.get('screenshots', []),
+                'review_css': game_data.get('review_css', ''),
+                'priority': game_data.get('priority', 0),
+                'added': game_data.get('added', 0),
+                'background': game_data.get('background', ''),
+                'rank': game_data.get('rank', 0),
+                'tags': game_data.get('tags', []),
+                'is_free_game': game_data.get('is_free_game', False),
+                'win': game_data.get('win', 0),
+                'mac': game_data.get('mac', 0),
+                'linux': game_data.get('linux', 0)
+            }
+            wishlist_games.append(wishlist_game)
+        
+        # Ordenar por prioridad (menor número = mayor prioridad)
+        wishlist_games.sort(key=lambda x: x.get('priority', 999))
+        
+        print(f"Wishlist obtenida exitosamente: {len(wishlist_games)} juegos")
+        return wishlist_games
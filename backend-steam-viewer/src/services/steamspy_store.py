@@ -0,0 +1,119 @@
+"""
+Almacenamiento persistente de detalles de SteamSpy usando SQLite
+Guarda la respuesta de appdetails por appid junto con la fecha de descarga
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Ruta de la base de datos
+STEAMSPY_DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'steamspy.db')
+
+
+class SteamSpyStore:
+    """Almacén clave-valor (appid -> appdetails) con marcas de tiempo"""
+    
+    def __init__(self, path: str = STEAMSPY_DB_PATH):
+        """
+        Prepara el almacén (la base de datos se abre en el primer uso)
+        
+        Args:
+            path: Ruta del archivo SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        Obtiene la conexión, abriendo (o creando) la base de datos si es necesario
+        Debe llamarse con el lock tomado
+        
+        Returns:
+            Conexión SQLite
+        """
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS appdetails ('
+                '  appid INTEGER PRIMARY KEY,'
+                '  data TEXT NOT NULL,'
+                '  fetched_at REAL NOT NULL'
+                ')'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def get(self, appid: int) -> Optional[Tuple[Dict, float]]:
+        """
+        Obtiene los detalles almacenados de un juego
+        
+        Args:
+            appid: App ID del juego
+        
+        Returns:
+            Tupla (detalles, timestamp de descarga) o None si no existe
+        """
+        with self._lock:
+            row = self._get_connection().execute(
+                'SELECT data, fetched_at FROM appdetails WHERE appid = ?',
+                (appid,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+    
+    def put(self, appid: int, data: Dict):
+        """
+        Guarda (o reemplaza) los detalles de un juego
+        
+        Args:
+            appid: App ID del juego
+            data: Respuesta de appdetails de SteamSpy
+        """
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO appdetails (appid, data, fetched_at) VALUES (?, ?, ?)',
+                (appid, json.dumps(data), time.time())
+            )
+            conn.commit()
+    
+    def get_pending(self, appids: Iterable[int], max_age: float) -> List[int]:
+        """
+        Filtra los appids que no están almacenados o cuyos datos están obsoletos
+        
+        Args:
+            appids: App IDs a comprobar
+            max_age: Antigüedad máxima en segundos
+        
+        Returns:
+            Lista de appids que hay que descargar
+        """
+        threshold = time.time() - max_age
+        with self._lock:
+            fresh = {
+                row[0] for row in self._get_connection().execute(
+                    'SELECT appid FROM appdetails WHERE fetched_at >= ?',
+                    (threshold,)
+                )
+            }
+        return [appid for appid in appids if appid not in fresh]
+    
+    def close(self):
+        """Cierra la conexión con la base de datos (se vuelve a abrir si se usa después)"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Instancia global del almacén
+steamspy_store = SteamSpyStore()
@@ -0,0 +1,252 @@
+"""
+Índice de títulos de juegos para cruzar nombres entre fuentes distintas
+Normaliza los títulos y usa trigramas para la búsqueda aproximada
+"""
+import math
+import re
+import unicodedata
+from typing import Any, Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Símbolos de marca registrada que Steam añade a muchos títulos
+TRADEMARK_CHARS = re.compile(r'[®™©℠]')
+# Cualquier carácter que no sea letra o número
+NON_ALPHANUMERIC = re.compile(r'[^\w]+|_')
+# Sufijos de edición que no cambian el juego
+EDITION_SUFFIXES = re.compile(
+    r'\b('
+    r'(game of the year|goty|definitive|complete|deluxe|enhanced|ultimate|gold|premium|special|'
+    r'standard|anniversary|collector s|legendary|digital deluxe|extended|royal|director s cut|'
+    r'remastered) edition|'
+    r'game of the year|goty|director s cut|remastered|remaster'
+    r')\b'
+)
+# Cualquier otra "<palabra> edition" al final del título
+EDITION_TAIL = re.compile(r'(\s\w+)?\s+edition$')
+# Números de entrega (arábigos o romanos) que distinguen secuelas
+SEQUEL_NUMBER = re.compile(r'^(\d+|[ivx]+)$')
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normaliza un título para compararlo con otras fuentes
+    
+    Quita marcas registradas, acentos, puntuación y sufijos de edición,
+    y pasa a minúsculas con espacios simples.
+    
+    Args:
+        title: Título original
+    
+    Returns:
+        Título normalizado (puede quedar vacío)
+    """
+    text = TRADEMARK_CHARS.sub('', title)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = text.lower().replace("'", ' ').replace('’', ' ')
+    text = NON_ALPHANUMERIC.sub(' ', text)
+    text = EDITION_SUFFIXES.sub(' ', text)
+    text = ' '.join(text.split())
+    return EDITION_TAIL.sub('', text)
+
+
+def sequel_numbers(normalized: str) -> frozenset:
+    """
+    Obtiene los números de entrega de un título normalizado ("3", "iii"...)
+    
+    Args:
+        normalized: Título normalizado
+    
+    Returns:
+        Conjunto de números encontrados
+    """
+    return frozenset(token for token in normalized.split() if SEQUEL_NUMBER.match(token))
+
+
+def title_trigrams(normalized: str) -> Set[str]:
+    """
+    Obtiene los trigramas de un título normalizado (con relleno en los bordes)
+    
+    Args:
+        normalized: Título normalizado
+    
+    Returns:
+        Conjunto de trigramas
+    """
+    padded = f'  {normalized} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def minimum_overlap(query_size: int, threshold: float) -> int:
+    """
+    Obtiene los trigramas que debe compartir un candidato para superar el umbral
+    
+    Args:
+        query_size: Número de trigramas del título buscado
+        threshold: Similitud mínima (coeficiente de Dice)
+    
+    Returns:
+        Solapamiento mínimo (al menos 1)
+    """
+    return max(1, math.ceil(threshold * query_size / (2 - threshold) - 1e-9))
+
+
+def size_bounds(query_size: int, threshold: float) -> Tuple[float, float]:
+    """
+    Obtiene el rango de tamaños (en trigramas) que puede tener un candidato válido
+    
+    Args:
+        query_size: Número de trigramas del título buscado
+        threshold: Similitud mínima (coeficiente de Dice)
+    
+    Returns:
+        Tupla (tamaño mínimo, tamaño máximo)
+    """
+    return threshold * query_size / (2 - threshold), (2 - threshold) * query_size / threshold
+
+
+class TitleIndex(Generic[T]):
+    """
+    Índice de títulos con búsqueda exacta normalizada y aproximada por trigramas
+    
+    La búsqueda aproximada usa el coeficiente de Dice sobre trigramas y un
+    filtro por prefijo: solo se recorren las listas de los trigramas menos
+    frecuentes del título buscado, suficientes para garantizar que ningún
+    candidato que supere el umbral quede fuera. Los números de entrega deben
+    coincidir exactamente para no confundir secuelas.
+    """
+    
+    def __init__(self, threshold: float = 0.8):
+        """
+        Inicializa un índice vacío
+        
+        Args:
+            threshold: Similitud mínima (0-1) para aceptar una coincidencia aproximada
+        """
+        self.threshold = threshold
+        self._exact: Dict[str, T] = {}
+        self._values: List[T] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._trigrams: List[frozenset] = []
+        self._numbers: List[frozenset] = []
+    
+    def add(self, title: str, value: T):
+        """
+        Añade un título al índice (el primero añadido gana en caso de duplicado)
+        
+        Args:
+            title: Título original
+            value: Valor asociado al título
+        """
+        normalized = normalize_title(title)
+        if not normalized or normalized in self._exact:
+            return
+        
+        self._exact[normalized] = value
+        trigrams = frozenset(title_trigrams(normalized))
+        entry_id = len(self._values)
+        self._values.append(value)
+        self._trigrams.append(trigrams)
+        self._numbers.append(sequel_numbers(normalized))
+        for trigram in trigrams:
+            self._postings.setdefault(trigram, []).append(entry_id)
+    
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, T]], threshold: float = 0.8) -> 'TitleIndex[T]':
+        """
+        Construye un índice a partir de pares (título, valor)
+        
+        Args:
+            items: Pares (título, valor)
+            threshold: Similitud mínima para coincidencias aproximadas
+        
+        Returns:
+            Índice construido
+        """
+        index = cls(threshold)
+        for title, value in items:
+            index.add(title, value)
+        return index
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def lookup(self, title: str) -> Optional[T]:
+        """
+        Busca un título: primero de forma exacta (normalizado) y después aproximada
+        
+        Args:
+            title: Título a buscar
+        
+        Returns:
+            Valor asociado o None si no hay coincidencia suficiente
+        """
+        normalized = normalize_title(title)
+        if not normalized:
+            return None
+        
+        value = self._exact.get(normalized)
+        if value is not None:
+            return value
+        
+        match = self._fuzzy_match(normalized)
+        return self._values[match] if match is not None else None
+    
+    def _fuzzy_match(self, normalized: str) -> Optional[int]:
+        """
+        Busca la entrada más parecida por coeficiente de Dice sobre trigramas
+        
+        Args:
+            normalized: Título normalizado
+        
+        Returns:
+            Posición de la mejor entrada o None si ninguna supera el umbral
+        """
+        query = title_trigrams(normalized)
+        query_size = len(query)
+        query_numbers = sequel_numbers(normalized)
+        threshold = self.threshold
+        
+        # Solapamiento mínimo que puede tener un candidato válido
+        min_overlap = minimum_overlap(query_size, threshold)
+        if min_overlap > query_size:
+            return None
+        
+        # Filtro por prefijo con los trigramas menos frecuentes; los que no
+        # aparecen en el índice cuentan como los más raros (no aportan candidatos)
+        known = sorted(
+            (trigram for trigram in query if trigram in self._postings),
+            key=lambda trigram: len(self._postings[trigram])
+        )
+        prefix_length = query_size - min_overlap + 1 - (query_size - len(known))
+        if prefix_length <= 0:
+            return None
+        candidates: Set[int] = set()
+        for trigram in known[:prefix_length]:
+            candidates.update(self._postings[trigram])
+        
+        min_size, max_size = size_bounds(query_size, threshold)
+        
+        # Ante empates gana la entrada añadida primero
+        best_id: Optional[int] = None
+        best_score = 0.0
+        for candidate in sorted(candidates):
+            trigrams = self._trigrams[candidate]
+            size = len(trigrams)
+            if size < min_size or size > max_size or self._numbers[candidate] != query_numbers:
+                continue
+            score = 2 * len(query & trigrams) / (query_size + size)
+            if score >= threshold and score > best_score:
+                best_id, best_score = candidate, score
+        
+        return best_id
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Obtiene el tamaño del índice
+        
+        Returns:
+            Diccionario con el número de títulos y de trigramas distintos
+        """
+        return {'titles': len(self._values), 'trigrams': len(self._postings)}
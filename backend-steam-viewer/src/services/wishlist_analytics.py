@@ -0,0 +1,215 @@
+"""
+Estadísticas de la wishlist de Steam
+Calcula todas las métricas recorriendo la lista una sola vez
+"""
+import time
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+
+# Categorías de reviews: (porcentaje mínimo, categoría), de mayor a menor
+REVIEW_CATEGORIES = (
+    (95, 'overwhelmingly_positive'),
+    (80, 'very_positive'),
+    (70, 'positive'),
+    (40, 'mixed'),
+    (0, 'negative')
+)
+# Porcentaje mínimo para contar un juego como bien valorado
+POSITIVE_REVIEWS_PERCENT = 70
+
+# Rangos de precio en céntimos: (precio máximo excluido, rango)
+PRICE_BUCKETS = (
+    (500, 'under_5'),
+    (1000, '5_to_10'),
+    (2000, '10_to_20'),
+    (4000, '20_to_40'),
+    (None, 'over_40')
+)
+
+# Etiquetas más frecuentes que se devuelven
+TOP_TAGS = 20
+
+
+def _percent(value: Any) -> int:
+    """Interpreta un porcentaje de Steam (número o texto; 0 si no es válido)"""
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _review_category(reviews_percent: Any) -> Tuple[str, bool]:
+    """
+    Categoría de reviews de un porcentaje
+    
+    Args:
+        reviews_percent: Porcentaje de reviews positivas tal como llega de Steam
+        
+    Returns:
+        Tupla (categoría, si cuenta como bien valorado)
+    """
+    percent = _percent(reviews_percent)
+    for minimum, category in REVIEW_CATEGORIES:
+        if percent >= minimum:
+            break
+    else:
+        category = 'negative'
+    return category, percent >= POSITIVE_REVIEWS_PERCENT
+
+
+def _flag(value: Any) -> bool:
+    """Interpreta los indicadores de plataforma de Steam (1, '1', True...)"""
+    try:
+        return bool(int(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _lowest_price(subs: List[Dict]) -> Optional[int]:
+    """
+    Precio más bajo (en céntimos) entre los paquetes de un juego
+    
+    Args:
+        subs: Paquetes del juego en la wishlist (con price y discount_pct)
+        
+    Returns:
+        Precio en céntimos o None si ningún paquete tiene precio
+    """
+    lowest = None
+    for sub in subs:
+        try:
+            price = int(sub.get('price'))
+        except (TypeError, ValueError):
+            continue
+        if lowest is None or price < lowest:
+            lowest = price
+    return lowest
+
+
+def _release_year(release_date: Any) -> Optional[int]:
+    """Año de lanzamiento a partir del timestamp de Steam (None si no tiene)"""
+    try:
+        timestamp = int(release_date)
+    except (TypeError, ValueError):
+        return None
+    if timestamp <= 0:
+        return None
+    return time.gmtime(timestamp).tm_year
+
+
+class WishlistAnalyticsService:
+    """Servicio para calcular las estadísticas de una wishlist"""
+    
+    @staticmethod
+    def calculate_statistics(wishlist: List[Dict]) -> Dict:
+        """
+        Calcula las estadísticas de una wishlist en una sola pasada
+        
+        El recorrido cuenta cuántos juegos tienen cada valor en bruto de
+        porcentaje de reviews, plataformas y fecha de lanzamiento; como muchos
+        juegos comparten valores, después cada valor distinto se interpreta
+        una sola vez. Las etiquetas se cuentan al final con un solo Counter.
+        
+        Args:
+            wishlist: Juegos de la wishlist (formato de SteamService.get_wishlist)
+            
+        Returns:
+            Diccionario con los totales y las categorías de reviews, la
+            distribución de precios (paquete más barato de cada juego), las
+            plataformas, las etiquetas más frecuentes y los juegos por año
+            de lanzamiento
+        """
+        free_games = 0
+        price_distribution = {'free': 0, **{bucket: 0 for _, bucket in PRICE_BUCKETS}, 'unknown': 0}
+        priced_games = 0
+        total_price = 0
+        discounted = 0
+        tag_lists = []
+        # Juegos por valor en bruto
+        review_counts: Dict[Any, int] = {}
+        platform_counts: Dict[Tuple, int] = {}
+        release_counts: Dict[Any, int] = {}
+        
+        for game in wishlist:
+            get = game.get
+            is_free = get('is_free_game')
+            subs = get('subs')
+            if is_free:
+                free_games += 1
+                price_distribution['free'] += 1
+            if subs:
+                if not is_free:
+                    price = _lowest_price(subs)
+                    if price is None:
+                        price_distribution['unknown'] += 1
+                    else:
+                        priced_games += 1
+                        total_price += price
+                        for maximum, bucket in PRICE_BUCKETS:
+                            if maximum is None or price < maximum:
+                                price_distribution[bucket] += 1
+                                break
+                for sub in subs:
+                    if _percent(sub.get('discount_pct')) > 0:
+                        discounted += 1
+                        break
+            elif not is_free:
+                price_distribution['unknown'] += 1
+            
+            value = get('reviews_percent')
+            review_counts[value] = review_counts.get(value, 0) + 1
+            value = (get('win'), get('mac'), get('linux'))
+            platform_counts[value] = platform_counts.get(value, 0) + 1
+            value = get('release_date')
+            release_counts[value] = release_counts.get(value, 0) + 1
+            tags = get('tags')
+            if tags:
+                tag_lists.append(tags)
+        
+        with_positive_reviews = 0
+        review_categories = {category: 0 for _, category in REVIEW_CATEGORIES}
+        for reviews_percent, count in review_counts.items():
+            category, positive = _review_category(reviews_percent)
+            review_categories[category] += count
+            if positive:
+                with_positive_reviews += count
+        
+        platforms = {'windows': 0, 'mac': 0, 'linux': 0, 'all': 0}
+        for (win, mac, linux), count in platform_counts.items():
+            win, mac, linux = _flag(win), _flag(mac), _flag(linux)
+            platforms['windows'] += win * count
+            platforms['mac'] += mac * count
+            platforms['linux'] += linux * count
+            platforms['all'] += (win and mac and linux) * count
+        
+        release_years = Counter()
+        unreleased = 0
+        for release_date, count in release_counts.items():
+            year = _release_year(release_date)
+            if year is None:
+                unreleased += count
+            else:
+                release_years[year] += count
+        
+        tags = Counter(chain.from_iterable(tag_lists))
+        
+        total_items = len(wishlist)
+        return {
+            'total_items': total_items,
+            'free_games': free_games,
+            'paid_games': total_items - free_games,
+            'with_positive_reviews': with_positive_reviews,
+            'review_categories': review_categories,
+            'price_distribution': price_distribution,
+            'prices': {
+                'priced_games': priced_games,
+                'discounted_games': discounted,
+                'total': round(total_price / 100, 2),
+                'average': round(total_price / priced_games / 100, 2) if priced_games > 0 else 0
+            },
+            'platforms': platforms,
+            'top_tags': [{'tag': tag, 'count': count} for tag, count in tags.most_common(TOP_TAGS)],
+            'release_years': {str(year): release_years[year] for year in sorted(release_years)},
+            'without_release_date': unreleased
+        }
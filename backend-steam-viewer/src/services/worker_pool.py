@@ -0,0 +1,228 @@
+"""
+Pool de procesos para tareas que consumen CPU (análisis de CSV, cruces)
+Mantiene libre el bucle de eventos y limita el trabajo pendiente
+"""
+import asyncio
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from src.config.config import Config
+
+# Los procesos no se crean con fork: el proceso principal tiene hilos en marcha
+# (escritor del historial, recarga de Metacritic) y conexiones SQLite abiertas
+MP_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class PoolSaturatedError(Exception):
+    """El pool ya tiene el máximo de tareas pendientes"""
+
+
+def _discard_result(waiter: asyncio.Future):
+    """Recoge el resultado de una tarea abandonada (evita avisos de excepción no leída)"""
+    if not waiter.cancelled():
+        waiter.exception()
+
+
+class CpuWorkerPool:
+    """
+    Pool de procesos con límite de tareas pendientes y plazo por tarea
+    
+    El pool se crea en el primer uso. Si ya hay max_pending tareas en curso
+    o en cola, las nuevas se rechazan con PoolSaturatedError en lugar de
+    esperar. Si una tarea en ejecución supera el plazo se terminan los
+    procesos del pool para liberar su hueco; las demás tareas que se
+    estaban ejecutando en ese pool se vuelven a enviar a uno nuevo
+    (dentro de su propio plazo).
+    """
+    
+    def __init__(self, max_workers: int, max_pending: int, timeout: float):
+        """
+        Args:
+            max_workers: Número de procesos
+            max_pending: Máximo de tareas en curso o en cola
+            timeout: Plazo por defecto de cada tarea en segundos
+        """
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Pools terminados a propósito tras superar una tarea el plazo
+        self._recycled: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._recycles = 0
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Obtiene el pool de procesos (lo crea si no existe o se rompió)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(MP_START_METHOD)
+                )
+            return self._executor
+    
+    def _submit(self, fn: Callable, args: tuple):
+        """
+        Envía una tarea al pool, creando uno nuevo si el actual está roto
+        
+        Returns:
+            Tupla (pool usado, future de la tarea)
+        """
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # Un proceso murió (por ejemplo por falta de memoria): crear un pool nuevo
+            self._discard(executor)
+            executor = self._get_executor()
+            return executor, executor.submit(fn, *args)
+    
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Deja de usar un pool (las tareas nuevas crearán otro)"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+    
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """
+        Termina los procesos de un pool para liberar los huecos de sus tareas
+        Las tareas que tenía pendientes fallan con BrokenProcessPool
+        """
+        self._discard(executor)
+        with self._lock:
+            if executor in self._recycled:
+                return
+            self._recycled.add(executor)
+            self._recycles += 1
+        terminate_workers = getattr(executor, 'terminate_workers', None)
+        if terminate_workers is not None:
+            terminate_workers()
+        else:
+            for process in list((getattr(executor, '_processes', None) or {}).values()):
+                process.terminate()
+            executor.shutdown(wait=False)
+    
+    def _task_done(self, cleanup: Optional[Callable[[], Any]]):
+        """Libera el hueco de una tarea terminada y ejecuta su limpieza"""
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+        if cleanup is not None:
+            try:
+                cleanup()
+            except Exception as e:
+                print(f"Error limpiando tarea del pool de procesos: {e}")
+    
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        cleanup: Optional[Callable[[], Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Ejecuta una función en un proceso del pool
+        
+        Args:
+            fn: Función de nivel de módulo (debe poder serializarse)
+            *args: Argumentos de la función
+            cleanup: Función a ejecutar cuando la tarea termine (aunque haya
+                superado el plazo); no se ejecuta si la tarea se rechaza
+            timeout: Plazo en segundos (por defecto el del pool)
+            
+        Returns:
+            Resultado de la función
+            
+        Raises:
+            PoolSaturatedError: Si el pool ya tiene el máximo de tareas pendientes
+            asyncio.TimeoutError: Si la tarea no terminó a tiempo
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                saturated = True
+            else:
+                self._pending += 1
+                saturated = False
+        if saturated:
+            raise PoolSaturatedError(f'Hay {self.max_pending} tareas pendientes')
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or self.timeout)
+        while True:
+            try:
+                executor, future = self._submit(fn, args)
+            except Exception:
+                self._task_done(cleanup)
+                raise
+            
+            waiter = asyncio.wrap_future(future)
+            try:
+                result = await asyncio.wait_for(
+                    asyncio.shield(waiter),
+                    timeout=max(0.0, deadline - loop.time())
+                )
+            except BrokenProcessPool:
+                self._discard(executor)
+                if executor in self._recycled:
+                    # El pool se terminó por el plazo de otra tarea, no por esta
+                    continue
+                self._task_done(cleanup)
+                raise
+            except BaseException as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    with self._lock:
+                        self._timeouts += 1
+                    if not future.cancel():
+                        self._recycle(executor)
+                else:
+                    # Cancelada desde fuera: si aún no empezó, no se ejecuta
+                    future.cancel()
+                # El hueco se libera cuando la tarea termina de verdad
+                future.add_done_callback(lambda _: self._task_done(cleanup))
+                waiter.add_done_callback(_discard_result)
+                raise
+            
+            self._task_done(cleanup)
+            return result
+    
+    def shutdown(self):
+        """Cierra el pool sin esperar a las tareas pendientes"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado del pool
+        
+        Returns:
+            Diccionario con procesos, tareas pendientes y contadores
+        """
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'started': self._executor is not None,
+                'pending': self._pending,
+                'max_pending': self.max_pending,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'timeouts': self._timeouts,
+                'recycles': self._recycles,
+                'start_method': MP_START_METHOD
+            }
+
+
+# Instancia global del pool
+cpu_pool = CpuWorkerPool(
+    max_workers=Config.CPU_POOL_WORKERS,
+    max_pending=Config.CPU_POOL_MAX_PENDING,
+    timeout=Config.CPU_TASK_TIMEOUT
+)
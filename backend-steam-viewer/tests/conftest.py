@@ -0,0 +1,7 @@
+"""
+Configuración común de las pruebas
+"""
+import os
+
+# Config exige una API key al importarse; las pruebas no llaman a la API real
+os.environ.setdefault('STEAM_API_KEY', 'test')
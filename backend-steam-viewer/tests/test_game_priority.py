@@ -0,0 +1,74 @@
+"""
+Pruebas del cálculo y la ordenación de prioridades
+
+Ejecutar desde backend-steam-viewer con: python -m pytest
+"""
+import random
+
+import numpy as np
+import pytest
+
+from src.services.game_priority_service import GamePriorityService, MetacriticDataset
+from src.services.metacritic_snapshot import MetacriticSnapshot
+
+service = GamePriorityService()
+
+
+def reference_order(values, limit):
+    """Orden esperado: sorted es estable también con reverse=True"""
+    return sorted(range(len(values)), key=lambda position: values[position], reverse=True)[:limit]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_top_k_order_matches_sorted(seed):
+    rnd = random.Random(seed)
+    count = rnd.randint(0, 300)
+    # Pocos valores distintos para forzar empates
+    values = [rnd.choice([0.0, 10.5, 20.25, 33.0, 47.75]) for _ in range(count)]
+    array = np.array(values)
+    
+    for limit in (None, 0, 1, 5, count // 2, count, count + 10):
+        expected = reference_order(values, limit)
+        assert GamePriorityService.top_k_order(array, limit).tolist() == expected
+
+
+def test_calculate_priorities_matches_scalar_formula():
+    rnd = random.Random(7)
+    scores = [rnd.choice([None, 50.0, 69.9, 70.0, 85.0, 100.0]) for _ in range(500)]
+    durations = [rnd.choice([None, -1.0, 0.0, 0.5, 1.0, 12.0, 80.0]) for _ in range(500)]
+    
+    priorities = GamePriorityService.calculate_priorities(
+        np.array([np.nan if score is None else score for score in scores]),
+        np.array([np.nan if duration is None else duration for duration in durations])
+    )
+    
+    expected = [service.calculate_priority(score, duration) for score, duration in zip(scores, durations)]
+    assert priorities.tolist() == expected
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_prioritized_games_match_sorted(seed):
+    rnd = random.Random(seed)
+    records = [
+        {
+            'name': f'Juego {row}',
+            'score': float(rnd.choice([60, 75, 90])),
+            'duration': float(rnd.choice([5, 20])),
+            'accounts': ''
+        }
+        for row in range(50)
+    ]
+    dataset = MetacriticDataset(MetacriticSnapshot.from_records(records))
+    # Varios juegos de la biblioteca apuntan a las mismas filas (empates) y alguno no está
+    games = [{'appid': position, 'name': rnd.choice(records)['name']} for position in range(200)]
+    games.append({'appid': 200, 'name': 'Sin datos'})
+    
+    enriched = service.enrich_games_with_priority(games, dataset=dataset)
+    for limit in (None, 1, 10, 150):
+        prioritized = service.get_prioritized_games(games, min_priority=1, limit=limit, dataset=dataset)
+        expected = sorted(
+            (game for game in enriched if game['priority'] >= 1),
+            key=lambda game: game['priority'],
+            reverse=True
+        )[:limit]
+        assert [game['appid'] for game in prioritized] == [game['appid'] for game in expected]
@@ -0,0 +1,87 @@
+"""
+Pruebas del middleware de caché HTTP con una aplicación mínima
+
+Ejecutar desde backend-steam-viewer con: python -m pytest
+"""
+import re
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from src.http_cache import CachePolicy, ConditionalCacheMiddleware
+from src.responses import FastJSONResponse, etag_matches, make_etag, not_modified
+
+POLICIES = [
+    CachePolicy(re.compile(r'^/api/items/[^/]+$'), 'private, no-cache'),
+    CachePolicy(re.compile(r'^/api/admin/'), 'no-store'),
+]
+ITEMS = {'a': {'name': 'Juego A'}}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(ConditionalCacheMiddleware, policies=POLICIES)
+    
+    @app.get('/api/items/{item_id}')
+    async def get_item(item_id: str, request: Request):
+        # Igual que las rutas de la API: ETag calculado antes de generar la respuesta
+        if item_id not in ITEMS:
+            raise HTTPException(status_code=404, detail='No existe')
+        etag = make_etag(item_id, ITEMS[item_id])
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            return not_modified(etag)
+        return FastJSONResponse(content=ITEMS[item_id], headers={'ETag': etag})
+    
+    @app.post('/api/items/{item_id}')
+    async def post_item(item_id: str):
+        return {'ok': True}
+    
+    @app.get('/api/admin/stats')
+    async def admin_stats():
+        return FastJSONResponse(content={'ok': True}, headers={'Cache-Control': 'max-age=5'})
+    
+    @app.get('/health')
+    async def health():
+        return {'ok': True}
+    
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_adds_cache_control_to_ok_responses(client):
+    response = client.get('/api/items/a')
+    
+    assert response.status_code == 200
+    assert response.headers['cache-control'] == 'private, no-cache'
+    assert response.headers['etag']
+    assert response.json() == ITEMS['a']
+
+
+def test_not_modified_keeps_etag_and_cache_control(client):
+    etag = client.get('/api/items/a').headers['etag']
+    
+    response = client.get('/api/items/a', headers={'If-None-Match': etag})
+    
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+    assert response.headers['cache-control'] == 'private, no-cache'
+
+
+def test_stale_etag_gets_the_full_response(client):
+    response = client.get('/api/items/a', headers={'If-None-Match': '"otra-version"'})
+    
+    assert response.status_code == 200
+    assert response.json() == ITEMS['a']
+
+
+def test_errors_and_other_methods_are_not_cached(client):
+    assert 'cache-control' not in client.get('/api/items/b').headers
+    assert 'cache-control' not in client.post('/api/items/a').headers
+    assert 'cache-control' not in client.get('/health').headers
+
+
+def test_route_cache_control_wins(client):
+    assert client.get('/api/admin/stats').headers['cache-control'] == 'max-age=5'
@@ -0,0 +1,118 @@
+"""
+Pruebas del índice de títulos (en memoria y dentro de la instantánea)
+
+Ejecutar desde backend-steam-viewer con: python -m pytest
+"""
+import pytest
+
+from src.services.metacritic_snapshot import MetacriticSnapshot
+from src.services.title_index import (
+    TitleIndex,
+    minimum_overlap,
+    normalize_title,
+    sequel_numbers,
+    size_bounds,
+    title_trigrams
+)
+
+TITLES = [
+    'The Witcher 3: Wild Hunt',
+    'Hollow Knight',
+    'Game 2',
+    'Game 3',
+    'Portal',
+    'Portal 2',
+    'Dark Souls III',
+    'Divinity: Original Sin II',
+    'Celeste',
+]
+
+
+@pytest.fixture(params=['memoria', 'instantánea'])
+def index(request):
+    """Mismo índice en las dos implementaciones (valor = posición del título)"""
+    if request.param == 'memoria':
+        return TitleIndex.build(((title, row) for row, title in enumerate(TITLES)), threshold=0.8)
+    records = [{'name': title, 'score': None, 'duration': None, 'accounts': ''} for title in TITLES]
+    return MetacriticSnapshot.from_records(records).title_index(0.8)
+
+
+@pytest.mark.parametrize('title, expected', [
+    ('The Witcher® 3: Wild Hunt™', 'the witcher 3 wild hunt'),
+    ('Dark Souls™ III - Deluxe Edition', 'dark souls iii'),
+    ('Portal 2: Game of the Year Edition', 'portal 2'),
+    ('Tom Clancy’s Rainbow Six', 'tom clancy s rainbow six'),
+    ('Pokémon Café', 'pokemon cafe'),
+    ('Skyrim Special Edition', 'skyrim'),
+    ('Some Game: Platinum Edition', 'some game'),
+    ('™®', ''),
+])
+def test_normalize_title(title, expected):
+    assert normalize_title(title) == expected
+
+
+def test_sequel_numbers_and_trigrams():
+    assert sequel_numbers('dark souls iii') == frozenset({'iii'})
+    assert sequel_numbers('game 2 vs 3') == frozenset({'2', '3'})
+    assert sequel_numbers('celeste') == frozenset()
+    assert title_trigrams('ab') == {'  a', ' ab', 'ab '}
+
+
+def test_exact_match(index):
+    assert index.lookup('Hollow Knight') == TITLES.index('Hollow Knight')
+    assert index.lookup('hollow knight') == TITLES.index('Hollow Knight')
+
+
+def test_trademarks_and_editions_are_ignored(index):
+    assert index.lookup('The Witcher® 3: Wild Hunt™ - Game of the Year Edition') == 0
+    assert index.lookup('Hollow Knight: Voidheart Edition') == TITLES.index('Hollow Knight')
+    assert index.lookup('Celeste™') == TITLES.index('Celeste')
+
+
+def test_fuzzy_match(index):
+    assert index.lookup('The Witcher 3 Wild Hunts') == 0
+    assert index.lookup('Divinity Original Sin 2') is None
+    assert index.lookup('Divinity - Original Sin II') == TITLES.index('Divinity: Original Sin II')
+
+
+def test_sequels_do_not_match(index):
+    assert index.lookup('Game 2') == TITLES.index('Game 2')
+    assert index.lookup('Game 3') == TITLES.index('Game 3')
+    assert index.lookup('Game 4') is None
+    assert index.lookup('Portal 3') is None
+    assert index.lookup('Dark Souls II') is None
+
+
+def test_below_threshold_misses(index):
+    assert index.lookup('Hollow') is None
+    assert index.lookup('Celestial Knights') is None
+    assert index.lookup('') is None
+    assert index.lookup('™') is None
+
+
+def test_first_title_wins_on_duplicates():
+    index = TitleIndex.build([('Portal', 'primero'), ('PORTAL™', 'segundo')])
+    assert index.lookup('portal') == 'primero'
+    assert len(index) == 1
+
+
+def test_dice_score_at_the_threshold():
+    # 'abcd' tiene 5 trigramas; 'abcde' 6 y comparte 4: Dice = 8 / 11 < 0.8
+    index = TitleIndex.build([('abcde', 1)], threshold=0.8)
+    assert index.lookup('abcd') is None
+    index = TitleIndex.build([('abcde', 1)], threshold=0.7)
+    assert index.lookup('abcd') == 1
+
+
+def test_prefix_filter_bounds():
+    # Con 10 trigramas y umbral 0.8 un candidato debe compartir al menos 7
+    assert minimum_overlap(10, 0.8) == 7
+    assert minimum_overlap(1, 0.5) == 1
+    min_size, max_size = size_bounds(10, 0.8)
+    assert min_size == pytest.approx(6.666, abs=1e-3)
+    assert max_size == pytest.approx(15.0)
+
+
+def test_stats(index):
+    assert index.stats()['titles'] == len(TITLES)
+    assert index.stats()['trigrams'] > 0
@@ -0,0 +1,159 @@
+"""
+Pruebas de la descarga paginada de la wishlist contra un Steam Store falso local
+
+Ejecutar desde backend-steam-viewer con: python -m pytest
+"""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import create_app
+from src.config.config import Config
+from src.services.cache_service import response_cache
+from src.services.http_client import steam_http_client
+from src.services.steam_service import SteamService, SteamUpstreamError
+
+# Juegos por página de la wishlist falsa
+PAGE_SIZE = 2
+STEAM_ID = '76561198000000000'
+
+
+def wishlist_page(first_appid: int, count: int) -> Dict:
+    """Página de wishlistdata con `count` juegos a partir de first_appid"""
+    return {
+        str(appid): {'name': f'Juego {appid}', 'priority': appid}
+        for appid in range(first_appid, first_appid + count)
+    }
+
+
+class FakeStore:
+    """Servidor local que imita /wishlist/profiles/{id}/wishlistdata/?p=N"""
+    
+    def __init__(self):
+        # Página -> (estado HTTP, tipo de contenido, cuerpo); el resto responde []
+        self.pages: Dict[int, Tuple[int, str, bytes]] = {}
+        self.requested: List[int] = []
+        store = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                page = int(parse_qs(urlsplit(self.path).query).get('p', ['0'])[0])
+                store.requested.append(page)
+                status, content_type, body = store.pages.get(page, (200, 'application/json', b'[]'))
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+    
+    def set_page(self, page: int, games: Dict):
+        self.pages[page] = (200, 'application/json', json.dumps(games).encode('utf-8'))
+    
+    def set_html(self, page: int):
+        self.pages[page] = (200, 'text/html; charset=utf-8', b'<html><body>Private</body></html>')
+    
+    def set_error(self, page: int, status: int = 500):
+        self.pages[page] = (status, 'text/plain', b'error')
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def store(monkeypatch):
+    fake = FakeStore()
+    monkeypatch.setattr(Config, 'STEAM_STORE_BASE_URL', fake.url)
+    monkeypatch.setattr(Config, 'WISHLIST_PAGE_SIZE', PAGE_SIZE)
+    monkeypatch.setattr(Config, 'WISHLIST_PAGE_CONCURRENCY', 2)
+    response_cache.clear()
+    yield fake
+    response_cache.clear()
+    fake.close()
+
+
+def fetch_wishlist() -> List[Dict]:
+    """Descarga la wishlist en un bucle de eventos propio"""
+    async def run():
+        try:
+            return await SteamService.get_wishlist(STEAM_ID)
+        finally:
+            await steam_http_client.close()
+    return asyncio.run(run())
+
+
+def test_merges_all_pages(store):
+    store.set_page(0, wishlist_page(1, PAGE_SIZE))
+    store.set_page(1, wishlist_page(3, PAGE_SIZE))
+    store.set_page(2, wishlist_page(5, PAGE_SIZE))
+    
+    wishlist = fetch_wishlist()
+    
+    assert [game['appid'] for game in wishlist] == [1, 2, 3, 4, 5, 6]
+    # La página 3 llega vacía y termina la descarga
+    assert sorted(set(store.requested)) == [0, 1, 2, 3, 4]
+
+
+def test_short_last_page_ends_the_wishlist(store):
+    store.set_page(0, wishlist_page(1, PAGE_SIZE))
+    store.set_page(1, wishlist_page(3, 1))
+    
+    wishlist = fetch_wishlist()
+    
+    assert [game['appid'] for game in wishlist] == [1, 2, 3]
+    assert max(store.requested) == 2
+
+
+def test_private_wishlist_is_empty(store):
+    store.set_html(0)
+    
+    assert fetch_wishlist() == []
+    assert response_cache.get('wishlist', STEAM_ID) is None
+
+
+def test_failing_page_raises_and_is_not_cached(store):
+    store.set_page(0, wishlist_page(1, PAGE_SIZE))
+    store.set_error(1)
+    
+    with pytest.raises(SteamUpstreamError):
+        fetch_wishlist()
+    assert response_cache.get('wishlist', STEAM_ID) is None
+    
+    # Cuando Steam se recupera, la siguiente petición descarga la wishlist completa
+    store.set_page(1, wishlist_page(3, 1))
+    assert [game['appid'] for game in fetch_wishlist()] == [1, 2, 3]
+
+
+def test_failing_first_page_raises(store):
+    store.set_error(0, status=503)
+    
+    with pytest.raises(SteamUpstreamError):
+        fetch_wishlist()
+
+
+def test_route_distinguishes_private_and_upstream_errors(store):
+    with TestClient(create_app()) as client:
+        store.set_html(0)
+        assert client.get(f'/api/wishlist/{STEAM_ID}').status_code == 400
+        
+        store.set_page(0, wishlist_page(1, PAGE_SIZE))
+        store.set_error(1)
+        assert client.get(f'/api/wishlist/{STEAM_ID}').status_code == 502
+        
+        store.set_page(1, wishlist_page(3, 1))
+        response = client.get(f'/api/wishlist/{STEAM_ID}')
+        assert response.status_code == 200
+        assert response.json()['stats']['total_items'] == 3
@@ -0,0 +1,105 @@
+"""
+Pruebas de las estadísticas de la wishlist
+
+Ejecutar desde backend-steam-viewer con: python -m pytest
+"""
+import calendar
+
+from src.services.wishlist_analytics import WishlistAnalyticsService
+
+
+def timestamp(year: int) -> int:
+    """Timestamp del 1 de enero de un año (UTC)"""
+    return calendar.timegm((year, 1, 1, 0, 0, 0))
+
+
+def game(**fields):
+    """Juego de la wishlist con valores por defecto"""
+    return {'is_free_game': False, 'subs': [], 'reviews_percent': 0, 'tags': [], **fields}
+
+
+def test_price_buckets():
+    wishlist = [
+        game(subs=[{'price': 499, 'discount_pct': 0}]),
+        game(subs=[{'price': 2500, 'discount_pct': 0}, {'price': '999', 'discount_pct': '50'}]),
+        game(subs=[{'price': 1999}]),
+        game(subs=[{'price': 3999}]),
+        game(subs=[{'price': 4000}]),
+        game(subs=[{'price': None}]),
+        game(),
+        game(is_free_game=True, subs=[{'price': 0}]),
+    ]
+    
+    stats = WishlistAnalyticsService.calculate_statistics(wishlist)
+    
+    assert stats['price_distribution'] == {
+        'free': 1,
+        'under_5': 1,
+        '5_to_10': 1,
+        '10_to_20': 1,
+        '20_to_40': 1,
+        'over_40': 1,
+        'unknown': 2
+    }
+    assert stats['prices'] == {
+        'priced_games': 5,
+        'discounted_games': 1,
+        'total': round((499 + 999 + 1999 + 3999 + 4000) / 100, 2),
+        'average': round((499 + 999 + 1999 + 3999 + 4000) / 5 / 100, 2)
+    }
+    assert stats['free_games'] == 1
+    assert stats['paid_games'] == 7
+
+
+def test_platforms():
+    wishlist = [
+        game(win=1, mac=1, linux=1),
+        game(win='1', mac='0', linux=None),
+        game(win=True, mac=0, linux='1'),
+        game(win='x'),
+    ]
+    
+    stats = WishlistAnalyticsService.calculate_statistics(wishlist)
+    
+    assert stats['platforms'] == {'windows': 3, 'mac': 1, 'linux': 2, 'all': 1}
+
+
+def test_review_categories_accept_strings():
+    percents = [100, 95, '94', 80, 79, '70', 69, 40, 39, 0, None, 'sin datos']
+    
+    stats = WishlistAnalyticsService.calculate_statistics([game(reviews_percent=p) for p in percents])
+    
+    assert stats['review_categories'] == {
+        'overwhelmingly_positive': 2,
+        'very_positive': 2,
+        'positive': 2,
+        'mixed': 2,
+        'negative': 4
+    }
+    assert stats['with_positive_reviews'] == 6
+
+
+def test_release_years_and_tags():
+    wishlist = [
+        game(release_date=timestamp(2020), tags=['RPG', 'Indie']),
+        game(release_date=str(timestamp(2020)), tags=['RPG']),
+        game(release_date=timestamp(2023), tags=['Acción']),
+        game(release_date=0),
+        game(release_date='próximamente'),
+        game(),
+    ]
+    
+    stats = WishlistAnalyticsService.calculate_statistics(wishlist)
+    
+    assert stats['release_years'] == {'2020': 2, '2023': 1}
+    assert stats['without_release_date'] == 3
+    assert stats['top_tags'][0] == {'tag': 'RPG', 'count': 2}
+    assert {entry['tag'] for entry in stats['top_tags']} == {'RPG', 'Indie', 'Acción'}
+
+
+def test_empty_wishlist():
+    stats = WishlistAnalyticsService.calculate_statistics([])
+    
+    assert stats['total_items'] == 0
+    assert stats['prices']['average'] == 0
+    assert stats['top_tags'] == []
@@ -0,0 +1,76 @@
+"""
+Pruebas del pool de procesos: plazo por tarea y reenvío de las tareas
+que se estaban ejecutando cuando se terminó el pool
+
+Ejecutar desde backend-steam-viewer con: python -m pytest
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from src.services.worker_pool import CpuWorkerPool, PoolSaturatedError
+
+
+def sleep_task(seconds: float, tag: str):
+    """Tarea de prueba (de nivel de módulo para que los procesos la importen)"""
+    time.sleep(seconds)
+    return tag, os.getpid()
+
+
+async def wait_until_idle(pool: CpuWorkerPool, timeout: float = 10.0):
+    """Espera a que el pool no tenga tareas pendientes"""
+    deadline = time.monotonic() + timeout
+    while pool.get_stats()['pending'] and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+
+def test_timeout_recycles_the_pool_and_resubmits_siblings():
+    async def run():
+        pool = CpuWorkerPool(max_workers=2, max_pending=4, timeout=20)
+        cleaned = []
+        try:
+            # Arrancar los dos procesos antes de medir
+            warm = await asyncio.gather(pool.run(sleep_task, 0, 'a'), pool.run(sleep_task, 0, 'b'))
+            first_pids = {pid for _, pid in warm}
+            
+            slow = pool.run(sleep_task, 30, 'lenta', timeout=1, cleanup=lambda: cleaned.append('lenta'))
+            short = pool.run(sleep_task, 2, 'corta', cleanup=lambda: cleaned.append('corta'))
+            slow_result, short_result = await asyncio.gather(slow, short, return_exceptions=True)
+            
+            await wait_until_idle(pool)
+            return first_pids, slow_result, short_result, pool.get_stats(), cleaned
+        finally:
+            pool.shutdown()
+    
+    first_pids, slow_result, short_result, stats, cleaned = asyncio.run(run())
+    
+    assert isinstance(slow_result, asyncio.TimeoutError)
+    # La tarea corta estaba en el pool terminado y se reenvió a uno nuevo
+    assert short_result[0] == 'corta'
+    assert short_result[1] not in first_pids
+    assert stats['pending'] == 0
+    assert stats['timeouts'] == 1
+    assert stats['recycles'] == 1
+    assert sorted(cleaned) == ['corta', 'lenta']
+
+
+def test_rejects_tasks_over_max_pending():
+    async def run():
+        pool = CpuWorkerPool(max_workers=1, max_pending=1, timeout=20)
+        try:
+            running = asyncio.ensure_future(pool.run(sleep_task, 0.5, 'primera'))
+            await asyncio.sleep(0)
+            with pytest.raises(PoolSaturatedError):
+                await pool.run(sleep_task, 0, 'segunda')
+            result = await running
+            return result, pool.get_stats()
+        finally:
+            pool.shutdown()
+    
+    result, stats = asyncio.run(run())
+    
+    assert result[0] == 'primera'
+    assert stats['rejected'] == 1
+    assert stats['pending'] == 0
@@ -1,9 +1,9 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import SearchBox from '../componets/common/SearchBox';
 import PlayerInfo from '../componets/ui/PlayerInfo';
 import GamesList from '../componets/ui/GamesList';
 import FavoriteButton from '../componets/common/FavoriteButton';
-import { getGames, addFavorite, removeFavorite } from '../services/steamApi';
+import { streamGames, addFavorite, removeFavorite } from '../services/steamApi';
 import { AlertTriangle } from 'lucide-react';
 
 const ProfileExplorer = ({ initialSteamId, onUserLoaded }) => {
@@ -12,32 +12,58 @@ const ProfileExplorer = ({ initialSteamId, onUserLoaded }) => {
   const [playerData, setPlayerData] = useState(null);
   const [currentSteamId, setCurrentSteamId] = useState('');
   const [isFavorite, setIsFavorite] = useState(false);
+  const cancelStreamRef = useRef(null);
+
+  const handleSearch = (steamId) => {
+    // Cancelar la búsqueda anterior si sigue en curso
+    cancelStreamRef.current?.();
 
-  const handleSearch = async (steamId) => {
     setLoading(true);
     setError(null);
     setPlayerData(null);
     setCurrentSteamId(steamId);
 
-    try {
-      const data = await getGames(steamId);
+    // Los datos se muestran a medida que llegan: perfil, juegos, estadísticas y prioridad
+    let data = { player: null, games: [], stats: null };
+    const update = (changes) => {
+      data = { ...data, ...changes };
       setPlayerData(data);
-      setIsFavorite(data.is_favorite || false);
-      
-      // Notificar al componente padre que se cargó un usuario
-      if (onUserLoaded) {
-        onUserLoaded({
-          steamId: steamId,
-          playerData: data.player,
-          stats: data.stats,
-          games: data.games
+    };
+
+    cancelStreamRef.current = streamGames(steamId, {
+      onPlayer: (player) => update({ player }),
+      onGames: (games) => update({ games: [...data.games, ...games] }),
+      onStats: ({ is_favorite, ...stats }) => {
+        update({ stats });
+        setIsFavorite(is_favorite || false);
+      },
+      onPriority: (priorities) => {
+        const byAppId = new Map(priorities.map((priority) => [priority.appid, priority]));
+        update({
+          games: data.games.map((game) =>
+            byAppId.has(game.appid) ? { ...game, ...byAppId.get(game.appid) } : game
+          )
         });
+      },
+      onDone: () => {
+        setLoading(false);
+
+        // Notificar al componente padre que se cargó un usuario
+        if (onUserLoaded) {
+          onUserLoaded({
+            steamId: steamId,
+            playerData: data.player,
+            stats: data.stats,
+            games: data.games
+          });
+        }
+      },
+      onError: (err) => {
+        setError(err.message);
+        setPlayerData(null);
+        setLoading(false);
       }
-    } catch (err) {
-      setError(err.message);
-    } finally {
-      setLoading(false);
-    }
+    });
   };
 
   const handleToggleFavorite = async (steamId, player) => {
@@ -61,6 +87,9 @@ const ProfileExplorer = ({ initialSteamId, onUserLoaded }) => {
     }
   }, [initialSteamId]);
 
+  // Cerrar la conexión al desmontar el componente
+  useEffect(() => () => cancelStreamRef.current?.(), []);
+
   return (
     <div className="content-section">
       <div className="section-header">
@@ -94,10 +123,12 @@ const ProfileExplorer = ({ initialSteamId, onUserLoaded }) => {
             stats={playerData.stats} 
           />
 
-          <GamesList 
-            games={playerData.games} 
-            steamId={currentSteamId} 
-          />
+          {(playerData.games.length > 0 || playerData.stats) && (
+            <GamesList 
+              games={playerData.games} 
+              steamId={currentSteamId} 
+            />
+          )}
         </>
       )}
     </div>
@@ -31,6 +31,42 @@ export const getGames = async (steamId) => {
   }
 };
 
+/**
+ * Recibe la biblioteca de un usuario por partes (Server-Sent Events)
+ * El perfil llega primero, después los juegos por bloques, las estadísticas
+ * y por último los datos de prioridad
+ * @param {string} steamId - Steam ID del usuario
+ * @param {Object} handlers - Funciones onPlayer, onGames, onStats, onPriority, onDone y onError
+ * @returns {Function} Función para cancelar la recepción
+ */
+export const streamGames = (steamId, handlers = {}) => {
+  const source = new EventSource(`${API_BASE_URL}/games/${steamId}/stream`);
+  const listen = (event, handler) => {
+    source.addEventListener(event, (e) => handler?.(JSON.parse(e.data)));
+  };
+
+  listen('player', handlers.onPlayer);
+  listen('games', handlers.onGames);
+  listen('stats', handlers.onStats);
+  listen('priority', handlers.onPriority);
+  source.addEventListener('done', (e) => {
+    source.close();
+    handlers.onDone?.(JSON.parse(e.data));
+  });
+  source.addEventListener('failed', (e) => {
+    source.close();
+    handlers.onError?.(new Error(JSON.parse(e.data).detail));
+  });
+  // Error de conexión (EventSource reintentaría indefinidamente)
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) return;
+    source.close();
+    handlers.onError?.(new Error('Error al cargar los juegos. Verifica que el backend esté en marcha.'));
+  };
+
+  return () => source.close();
+};
+
 /**
  * Exporta la biblioteca de juegos a CSV
  * @param {string} steamId - Steam ID del usuario